@@ -17,7 +17,7 @@ class AutoLabeler:
     """자동 라벨링 클래스"""
     
     def __init__(self):
-        self.llm_client = LLMClient()
+        self.llm_client = LLMClient(feature="auto_label")
         
         # 카테고리 정의
         self.categories = [
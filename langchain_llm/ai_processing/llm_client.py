@@ -1,9 +1,11 @@
 """
 LLM 클라이언트 모듈
 OpenAI GPT-4o-mini API 인터페이스
+ENHANCED: 스트리밍 생성 (토큰 조각을 도착하는 대로 반환)
+ENHANCED: 프로세스 전역 공유 OpenAI 클라이언트 사용 (연결 풀 재사용)
 """
-from typing import List, Dict, Optional
-from openai import AsyncOpenAI
+from typing import AsyncIterator, List, Dict, Optional
+from ai_processing.openai_clients import openai_clients
 from config.settings import settings
 from utils.logger import get_logger
 
@@ -12,8 +14,9 @@ logger = get_logger(__name__)
 class LLMClient:
     """LLM 클라이언트 클래스"""
     
-    def __init__(self):
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+    def __init__(self, feature: str = "llm"):
+        # feature: 호출 메트릭 레이블 (호출한 기능 구분)
+        self.client = openai_clients.get("chat", feature)
         self.model = settings.OPENAI_MODEL
     
     async def generate(
@@ -24,17 +27,10 @@ class LLMClient:
         max_tokens: int = 1000
     ) -> str:
         """LLM 응답 생성"""
-        messages = []
-        
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-        
-        messages.append({"role": "user", "content": prompt})
-        
         try:
             response = await self.client.chat.completions.create(
                 model=self.model,
-                messages=messages,
+                messages=self._messages(prompt, system_prompt),
                 temperature=temperature,
                 max_tokens=max_tokens
             )
@@ -43,6 +39,40 @@ class LLMClient:
             logger.error(f"LLM 생성 실패: {e}")
             raise
     
+    async def generate_stream(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1000
+    ) -> AsyncIterator[str]:
+        """LLM 응답 스트리밍 생성 (텍스트 조각 단위)"""
+        try:
+            stream = await self.client.chat.completions.create(
+                model=self.model,
+                messages=self._messages(prompt, system_prompt),
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True
+            )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            logger.error(f"LLM 스트리밍 생성 실패: {e}")
+            raise
+    
+    @staticmethod
+    def _messages(prompt: str, system_prompt: Optional[str]) -> List[Dict]:
+        """채팅 메시지 목록 구성"""
+        messages = []
+        
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        
+        messages.append({"role": "user", "content": prompt})
+        return messages
+    
     async def generate_with_context(
         self,
         query: str,
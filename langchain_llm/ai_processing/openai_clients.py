@@ -0,0 +1,241 @@
+"""
+OpenAI 클라이언트 레지스트리 모듈
+프로세스 전역에서 하나의 HTTP 연결 풀(keep-alive)을 공유하는 용도별 AsyncOpenAI 클라이언트 관리
+- 용도(chat, embedding, report)별로 타임아웃만 다른 클라이언트를 만들고 연결 풀은 공유
+- LangChain ChatOpenAI/OpenAIEmbeddings도 같은 비동기 클라이언트를 사용하도록 공유 인스턴스 제공
+- 앱 시작 시 startup(), 종료 시 aclose() 호출 (FastAPI lifespan)
+ENHANCED: 호출 계측 - 완성/임베딩 create()의 지연 시간, 토큰 수, 오류를 feature 레이블로 기록 (utils.metrics)
+"""
+import time
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+import httpx
+from openai import AsyncOpenAI
+
+from config.settings import settings
+from utils.logger import get_logger
+from utils.metrics import record_http_response, record_llm_call
+from utils.tokenizer import count_tokens
+
+logger = get_logger(__name__)
+
+# 용도별 요청 타임아웃 설정 이름 (연결 타임아웃은 공통)
+PURPOSE_TIMEOUTS = {
+    "chat": "OPENAI_CHAT_TIMEOUT_SECONDS",
+    "embedding": "OPENAI_EMBEDDING_TIMEOUT_SECONDS",
+    "report": "OPENAI_REPORT_TIMEOUT_SECONDS"
+}
+
+class _MeteredCompletions:
+    """chat.completions.create() 계측 (나머지 속성은 원본에 위임)"""
+
+    def __init__(self, resource, feature: str):
+        self._resource = resource
+        self._feature = feature
+
+    def __getattr__(self, name):
+        return getattr(self._resource, name)
+
+    async def create(self, **kwargs):
+        model = kwargs.get("model", "")
+        started = time.perf_counter()
+        try:
+            response = await self._resource.create(**kwargs)
+        except Exception as e:
+            record_llm_call("chat", model, self._feature, time.perf_counter() - started, type(e).__name__)
+            raise
+
+        if kwargs.get("stream"):
+            return self._metered_stream(response, model, kwargs.get("messages") or [], started)
+
+        usage = getattr(response, "usage", None)
+        record_llm_call(
+            "chat", model, self._feature, time.perf_counter() - started,
+            input_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            output_tokens=getattr(usage, "completion_tokens", 0) or 0
+        )
+        return response
+
+    async def _metered_stream(self, stream, model: str, messages: list, started: float) -> AsyncIterator:
+        """스트림 조각을 그대로 전달하고 종료(완료/오류/중단) 시 기록 (토큰 수는 추정치)"""
+        first_token = None
+        parts = []
+        status = "ok"
+        try:
+            async for chunk in stream:
+                if first_token is None:
+                    first_token = time.perf_counter() - started
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                yield chunk
+        except GeneratorExit:
+            status = "cancelled"
+            raise
+        except Exception as e:
+            status = type(e).__name__
+            raise
+        finally:
+            prompt = "\n".join(
+                message.get("content") for message in messages if isinstance(message.get("content"), str)
+            )
+            record_llm_call(
+                "chat", model, self._feature, time.perf_counter() - started, status,
+                input_tokens=count_tokens(prompt, model),
+                output_tokens=count_tokens("".join(parts), model),
+                first_token=first_token
+            )
+
+class _MeteredEmbeddings:
+    """embeddings.create() 계측 (나머지 속성은 원본에 위임)"""
+
+    def __init__(self, resource, feature: str):
+        self._resource = resource
+        self._feature = feature
+
+    def __getattr__(self, name):
+        return getattr(self._resource, name)
+
+    async def create(self, **kwargs):
+        model = kwargs.get("model", "")
+        started = time.perf_counter()
+        try:
+            response = await self._resource.create(**kwargs)
+        except Exception as e:
+            record_llm_call("embedding", model, self._feature, time.perf_counter() - started, type(e).__name__)
+            raise
+
+        usage = getattr(response, "usage", None)
+        record_llm_call(
+            "embedding", model, self._feature, time.perf_counter() - started,
+            input_tokens=getattr(usage, "prompt_tokens", 0) or 0
+        )
+        return response
+
+class MeteredOpenAI:
+    """계측되는 AsyncOpenAI 래퍼 (chat.completions/embeddings 외 속성은 원본에 위임)"""
+
+    def __init__(self, client: AsyncOpenAI, feature: str):
+        self._client = client
+        self.feature = feature
+        self.chat = SimpleNamespace(completions=_MeteredCompletions(client.chat.completions, feature))
+        self.embeddings = _MeteredEmbeddings(client.embeddings, feature)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+class OpenAIClientRegistry:
+    """용도별 AsyncOpenAI 클라이언트 레지스트리 (프로세스 전역)"""
+
+    def __init__(self):
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._clients: Dict[Tuple[str, Optional[int]], AsyncOpenAI] = {}
+        self._metered: Dict[Tuple[str, Optional[int], str], MeteredOpenAI] = {}
+        self._langchain_models: Dict[Tuple, Any] = {}
+
+    def _pool(self) -> httpx.AsyncClient:
+        """공유 HTTP 연결 풀 (처음 사용할 때 생성)"""
+        if self._http_client is None or self._http_client.is_closed:
+            self._http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=settings.OPENAI_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY_SECONDS
+                ),
+                timeout=self._timeout("chat"),
+                event_hooks={"response": [self._on_response]}
+            )
+            self._clients.clear()
+            self._metered.clear()
+            self._langchain_models.clear()
+        return self._http_client
+
+    @staticmethod
+    async def _on_response(response: httpx.Response):
+        """HTTP 응답 상태 기록 (SDK 내부 재시도도 각각 기록)"""
+        record_http_response(response.status_code)
+
+    @staticmethod
+    def _timeout(purpose: str) -> httpx.Timeout:
+        return httpx.Timeout(
+            getattr(settings, PURPOSE_TIMEOUTS[purpose]),
+            connect=settings.OPENAI_CONNECT_TIMEOUT_SECONDS
+        )
+
+    def get(
+        self,
+        purpose: str = "chat",
+        feature: Optional[str] = None,
+        max_retries: Optional[int] = None
+    ) -> MeteredOpenAI:
+        """용도별 공유 AsyncOpenAI 클라이언트 (feature: 메트릭 레이블, max_retries: SDK 재시도 횟수, None이면 SDK 기본값)"""
+        if purpose not in PURPOSE_TIMEOUTS:
+            raise ValueError(f"알 수 없는 OpenAI 클라이언트 용도: {purpose}")
+
+        http_client = self._pool()
+        client = self._clients.get((purpose, max_retries))
+        if client is None:
+            options = {} if max_retries is None else {"max_retries": max_retries}
+            client = AsyncOpenAI(
+                api_key=settings.OPENAI_API_KEY,
+                base_url=settings.OPENAI_BASE_URL,
+                timeout=self._timeout(purpose),
+                http_client=http_client,
+                **options
+            )
+            self._clients[(purpose, max_retries)] = client
+
+        key = (purpose, max_retries, feature or purpose)
+        if key not in self._metered:
+            self._metered[key] = MeteredOpenAI(client, feature or purpose)
+        return self._metered[key]
+
+    def chat_model(self, temperature: float = 0.1, model: Optional[str] = None, feature: str = "langchain"):
+        """공유 LangChain ChatOpenAI (같은 모델/온도/feature면 같은 인스턴스)"""
+        from langchain_openai import ChatOpenAI
+
+        model = model or settings.OPENAI_MODEL
+        key = ("chat", model, temperature, feature)
+        if key not in self._langchain_models:
+            self._langchain_models[key] = ChatOpenAI(
+                openai_api_key=settings.OPENAI_API_KEY,
+                model_name=model,
+                temperature=temperature,
+                async_client=self.get("chat", feature).chat.completions
+            )
+        return self._langchain_models[key]
+
+    def embeddings_model(self, model: Optional[str] = None, feature: str = "langchain"):
+        """공유 LangChain OpenAIEmbeddings"""
+        from langchain_openai import OpenAIEmbeddings
+
+        model = model or settings.OPENAI_EMBEDDING_MODEL
+        key = ("embedding", model, feature)
+        if key not in self._langchain_models:
+            self._langchain_models[key] = OpenAIEmbeddings(
+                openai_api_key=settings.OPENAI_API_KEY,
+                model=model,
+                async_client=self.get("embedding", feature).embeddings
+            )
+        return self._langchain_models[key]
+
+    def startup(self):
+        """연결 풀 생성 (앱 시작 시)"""
+        self._pool()
+        logger.info(
+            f"OpenAI 클라이언트 풀 준비 (최대 연결 {settings.OPENAI_MAX_CONNECTIONS}, "
+            f"keep-alive {settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS}개/{settings.OPENAI_KEEPALIVE_EXPIRY_SECONDS}초)"
+        )
+
+    async def aclose(self):
+        """연결 풀 종료 (앱 종료 시)"""
+        if self._http_client is not None and not self._http_client.is_closed:
+            await self._http_client.aclose()
+            logger.info("OpenAI 클라이언트 풀 종료")
+        self._http_client = None
+        self._clients.clear()
+        self._metered.clear()
+        self._langchain_models.clear()
+
+# 싱글톤 인스턴스
+openai_clients = OpenAIClientRegistry()
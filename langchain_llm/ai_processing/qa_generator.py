@@ -16,7 +16,7 @@ class QAGenerator:
     """QA 생성 클래스"""
     
     def __init__(self):
-        self.llm_client = LLMClient()
+        self.llm_client = LLMClient(feature="qa_generation")
     
     async def generate_qa_pairs(
         self,
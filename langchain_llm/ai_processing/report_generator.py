@@ -3,13 +3,13 @@
 AI 기반 학술적 보고서 자동 생성
 CREATED 2024-12-20: 폴더 기반 문서 분석 및 구조화된 보고서 생성
 MODIFIED 2024-12-20: JSON 파싱 안정성 개선 - Markdown 코드블럭 처리 추가
+ENHANCED: 프로세스 전역 공유 OpenAI 클라이언트 사용 (보고서용 긴 타임아웃)
 """
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 import uuid
 import asyncio
-from openai import AsyncOpenAI
-from config.settings import settings
+from ai_processing.openai_clients import openai_clients
 from utils.logger import get_logger
 from utils.json_parser import safe_json_loads
 
@@ -19,7 +19,7 @@ class ReportGenerator:
     """학술적 보고서 자동 생성 클래스"""
     
     def __init__(self):
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        self.client = openai_clients.get("report", "report")
         self.model = "gpt-4o-mini"
     
     async def generate_report(
@@ -20,7 +20,7 @@ class QueryChain:
         self.db = db
         self.hybrid_search = HybridSearch(db)
         self.context_builder = ContextBuilder()
-        self.llm_client = LLMClient()
+        self.llm_client = LLMClient(feature="query_chain")
         
         # 프롬프트 템플릿
         self.prompt_template = """다음 컨텍스트를 참고하여 사용자의 질문에 답변해주세요.
@@ -74,9 +74,12 @@ class QueryChain:
                 chunk = result.get("chunk", {})
                 document = result.get("document", {})
                 
+                # score: 결합 관련도(RRF), similarity: 벡터 코사인 유사도 (어휘 검색에서만 나온 청크는 None)
+                similarity = result["vector_score"] if "vector_score" in result else result.get("score")
                 source_info = {
                     "text": chunk.get("text", "")[:200] + "...",
                     "score": round(result.get("score", 0.0), 3),
+                    "similarity": round(similarity, 3) if similarity is not None else None,
                     "filename": document.get("original_filename", "알 수 없는 파일"),
                     "file_id": chunk.get("file_id", ""),
                     "chunk_id": chunk.get("chunk_id", ""),
@@ -2,8 +2,9 @@
 요약 체인
 문서 요약 생성
 MODIFIED 2024-12-20: 요약 결과 캐싱 기능 추가 및 새 DB 구조 적용
+ENHANCED: 스트리밍 요약 (생성 토큰을 바로 전달하고 완료 시점에 캐시 저장)
 """
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from ai_processing.llm_client import LLMClient
 from database.operations import DatabaseOperations
@@ -18,7 +19,7 @@ class SummaryChain:
     def __init__(self, db: AsyncIOMotorDatabase):
         self.db = db
         self.db_ops = DatabaseOperations(db)
-        self.llm_client = LLMClient()
+        self.llm_client = LLMClient(feature="summary")
         self.documents = db.documents
         self.chunks = db.chunks
         self.file_info = db.file_info
@@ -31,20 +32,7 @@ class SummaryChain:
     ) -> Dict:
         """요약 처리"""
         try:
-            # document_ids 정리 - "string", "null" 같은 기본값 제거
-            clean_document_ids = None
-            if document_ids:
-                clean_document_ids = [
-                    doc_id.strip() for doc_id in document_ids 
-                    if doc_id and doc_id.strip() and doc_id.strip() not in ["string", "null"]
-                ]
-                if not clean_document_ids:
-                    clean_document_ids = None
-            
-            # folder_id 정리
-            clean_folder_id = None
-            if folder_id and folder_id.strip() and folder_id.strip() not in ["string", "null"]:
-                clean_folder_id = folder_id.strip()
+            clean_document_ids, clean_folder_id = self._clean_ids(document_ids, folder_id)
             
             logger.info(f"요약 처리 시작 - document_ids: {clean_document_ids}, folder_id: '{clean_folder_id}'")
             
@@ -73,21 +61,8 @@ class SummaryChain:
                 clean_document_ids, clean_folder_id, summary_type
             )
             
-            # 3. 요약 결과 캐싱
-            try:
-                await self.db_ops.save_summary_cache(
-                    summary=summary_result["summary"],
-                    folder_id=clean_folder_id,
-                    document_ids=clean_document_ids,
-                    summary_type=summary_type
-                )
-                logger.info("요약 결과 캐시 저장 완료")
-            except Exception as cache_error:
-                logger.warning(f"요약 캐시 저장 실패: {cache_error}")
-            
-            # 4. 폴더 접근 시간 업데이트
-            if clean_folder_id:
-                await self.db_ops.update_folder_access(clean_folder_id)
+            # 3. 요약 결과 캐싱 및 폴더 접근 시간 업데이트
+            await self._save_result(summary_result["summary"], clean_document_ids, clean_folder_id, summary_type)
             
             summary_result["from_cache"] = False
             return summary_result
@@ -96,6 +71,101 @@ class SummaryChain:
             logger.error(f"요약 처리 실패: {e}")
             raise
     
+    async def process_stream(
+        self,
+        document_ids: Optional[List[str]] = None,
+        folder_id: Optional[str] = None,
+        summary_type: str = "brief"
+    ) -> AsyncIterator[Dict]:
+        """스트리밍 요약 처리 - meta 이벤트, token 이벤트들, done 이벤트 순서"""
+        clean_document_ids, clean_folder_id = self._clean_ids(document_ids, folder_id)
+        logger.info(f"스트리밍 요약 처리 시작 - document_ids: {clean_document_ids}, folder_id: '{clean_folder_id}'")
+        
+        cached_summary = await self.db_ops.get_summary_cache(
+            folder_id=clean_folder_id,
+            document_ids=clean_document_ids,
+            summary_type=summary_type
+        )
+        if cached_summary:
+            logger.info("캐시된 요약 발견, 캐시 사용")
+            if clean_folder_id:
+                await self.db_ops.update_folder_access(clean_folder_id)
+            
+            result = {
+                "summary": cached_summary["summary"],
+                "document_count": len(cached_summary.get("document_ids", [])),
+                "from_cache": True,
+                "cache_created_at": cached_summary.get("created_at")
+            }
+            yield {"event": "meta", "data": {"document_count": result["document_count"], "summary_type": summary_type, "from_cache": True}}
+            yield {"event": "token", "data": {"text": result["summary"]}}
+            yield {"event": "done", "data": result}
+            return
+        
+        request = await self._build_summary_prompt(clean_document_ids, clean_folder_id, summary_type)
+        yield {"event": "meta", "data": {"document_count": request["document_count"], "summary_type": summary_type, "from_cache": False}}
+        
+        if "prompt" in request:
+            parts = []
+            async for text in self.llm_client.generate_stream(request["prompt"], max_tokens=500):
+                parts.append(text)
+                yield {"event": "token", "data": {"text": text}}
+            summary = "".join(parts)
+            logger.info(f"요약 완료 - 문서 수: {request['document_count']}, 요약 길이: {len(summary)}")
+        else:
+            summary = request["summary"]
+            yield {"event": "token", "data": {"text": summary}}
+        
+        # 스트림이 끝까지 전달된 경우에만 캐시 저장 (중간에 연결이 끊기면 저장하지 않음)
+        await self._save_result(summary, clean_document_ids, clean_folder_id, summary_type)
+        yield {
+            "event": "done",
+            "data": {"summary": summary, "document_count": request["document_count"], "from_cache": False}
+        }
+    
+    @staticmethod
+    def _clean_ids(
+        document_ids: Optional[List[str]],
+        folder_id: Optional[str]
+    ) -> Tuple[Optional[List[str]], Optional[str]]:
+        """document_ids/folder_id 정리 - "string", "null" 같은 기본값 제거"""
+        clean_document_ids = None
+        if document_ids:
+            clean_document_ids = [
+                doc_id.strip() for doc_id in document_ids 
+                if doc_id and doc_id.strip() and doc_id.strip() not in ["string", "null"]
+            ]
+            if not clean_document_ids:
+                clean_document_ids = None
+        
+        clean_folder_id = None
+        if folder_id and folder_id.strip() and folder_id.strip() not in ["string", "null"]:
+            clean_folder_id = folder_id.strip()
+        
+        return clean_document_ids, clean_folder_id
+    
+    async def _save_result(
+        self,
+        summary: str,
+        document_ids: Optional[List[str]],
+        folder_id: Optional[str],
+        summary_type: str
+    ):
+        """요약 결과 캐싱 및 폴더 접근 시간 업데이트"""
+        try:
+            await self.db_ops.save_summary_cache(
+                summary=summary,
+                folder_id=folder_id,
+                document_ids=document_ids,
+                summary_type=summary_type
+            )
+            logger.info("요약 결과 캐시 저장 완료")
+        except Exception as cache_error:
+            logger.warning(f"요약 캐시 저장 실패: {cache_error}")
+        
+        if folder_id:
+            await self.db_ops.update_folder_access(folder_id)
+    
     async def _generate_new_summary(
         self,
         document_ids: Optional[List[str]],
@@ -103,6 +173,27 @@ class SummaryChain:
         summary_type: str
     ) -> Dict:
         """새로운 요약 생성"""
+        request = await self._build_summary_prompt(document_ids, folder_id, summary_type)
+        if "prompt" not in request:
+            return request
+        
+        # 요약 생성
+        summary = await self.llm_client.generate(request["prompt"], max_tokens=500)
+        
+        logger.info(f"요약 완료 - 문서 수: {request['document_count']}, 요약 길이: {len(summary)}")
+        
+        return {
+            "summary": summary,
+            "document_count": request["document_count"]
+        }
+    
+    async def _build_summary_prompt(
+        self,
+        document_ids: Optional[List[str]],
+        folder_id: Optional[str],
+        summary_type: str
+    ) -> Dict:
+        """요약 프롬프트 구성 (요약할 내용이 없으면 prompt 대신 summary 반환)"""
         
         # 문서 조회 조건 설정
         if document_ids:
@@ -185,13 +276,8 @@ class SummaryChain:
         else:  # bullets
             prompt = f"다음 텍스트의 핵심 내용을 불릿 포인트로 정리해주세요:\n\n{combined_text}"
         
-        # 요약 생성
-        summary = await self.llm_client.generate(prompt, max_tokens=500)
-        
-        logger.info(f"요약 완료 - 문서 수: {document_count}, 요약 길이: {len(summary)}")
-        
         return {
-            "summary": summary,
+            "prompt": prompt,
             "document_count": document_count
         }
     
@@ -1,14 +1,18 @@
 """
 폴더 관리 API 라우터
 정규화된 폴더 시스템 - folders 컬렉션 중심 관리
+ENHANCED: 폴더별 카운터(문서/파일/청크/용량)를 적재/삭제 시 유지하여 목록을 단일 인덱스 조회로 제공
 """
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
 from bson import ObjectId
+from pymongo import ReturnDocument
 from database.connection import get_database
 from database.operations import DatabaseOperations
+from retrieval.file_search_index import remove_folder_search_index
+from retrieval.index_sync import on_folder_chunks_deleted
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -36,12 +40,29 @@ class FolderResponse(BaseModel):
     cover_image_url: Optional[str] = None
     document_count: int = 0
     file_count: int = 0
+    chunk_count: int = 0
+    total_size: int = 0  # 폴더 내 파일 크기 합 (bytes)
 
 class FolderListResponse(BaseModel):
     """폴더 목록 응답 모델"""
     folders: List[FolderResponse]
     total_count: int
 
+def _folder_response(folder: dict) -> FolderResponse:
+    """폴더 문서를 응답 모델로 변환 (카운터는 폴더 문서에 유지된 값 사용)"""
+    return FolderResponse(
+        folder_id=str(folder["_id"]),
+        title=folder["title"],
+        folder_type=folder["folder_type"],
+        created_at=folder.get("created_at"),
+        last_accessed_at=folder.get("last_accessed_at"),
+        cover_image_url=folder.get("cover_image_url"),
+        document_count=folder.get("document_count", 0),
+        file_count=folder.get("file_count", 0),
+        chunk_count=folder.get("chunk_count", 0),
+        total_size=folder.get("total_size", 0)
+    )
+
 @router.post("/", response_model=FolderResponse)
 async def create_folder(request: FolderCreateRequest):
     """폴더 생성 엔드포인트"""
@@ -93,43 +114,10 @@ async def list_folders(limit: int = 50, skip: int = 0):
     """폴더 목록 조회 엔드포인트"""
     try:
         db = await get_database()
-        db_ops = DatabaseOperations(db)
-        
-        # 폴더 목록 조회 (최근 접근 순)
-        folders = await db_ops.find_many(
-            "folders", 
-            {}, 
-            limit=limit, 
-            skip=skip
-        )
         
-        # 각 폴더의 문서 및 파일 수 계산
-        folder_responses = []
-        for folder in sorted(folders, key=lambda x: x.get('last_accessed_at', x.get('created_at', datetime.utcnow())), reverse=True):
-            folder_id_str = str(folder["_id"])
-            
-            # 문서 수 (documents 컬렉션에서)
-            doc_count = await db.documents.count_documents({"folder_id": folder_id_str})
-            
-            # 고유 파일 수 계산
-            pipeline = [
-                {"$match": {"folder_id": folder_id_str}},
-                {"$group": {"_id": "$file_metadata.file_id"}},
-                {"$count": "unique_files"}
-            ]
-            file_count_result = await db.documents.aggregate(pipeline).to_list(1)
-            file_count = file_count_result[0]["unique_files"] if file_count_result else 0
-            
-            folder_responses.append(FolderResponse(
-                folder_id=folder_id_str,
-                title=folder["title"],
-                folder_type=folder["folder_type"],
-                created_at=folder.get("created_at"),
-                last_accessed_at=folder.get("last_accessed_at"),
-                cover_image_url=folder.get("cover_image_url"),
-                document_count=doc_count,
-                file_count=file_count
-            ))
+        # 폴더 목록 조회 (최근 접근 순, 복합 인덱스 사용 - 카운터는 폴더 문서에 유지됨)
+        cursor = db.folders.find({}).sort([("last_accessed_at", -1), ("_id", -1)]).skip(skip).limit(limit)
+        folder_responses = [_folder_response(folder) async for folder in cursor]
         
         return FolderListResponse(
             folders=folder_responses,
@@ -148,37 +136,18 @@ async def get_folder(folder_id: str):
             raise HTTPException(status_code=400, detail="유효하지 않은 폴더 ID입니다.")
         
         db = await get_database()
-        db_ops = DatabaseOperations(db)
         
-        # 폴더 존재 확인
-        folder = await db_ops.find_one("folders", {"_id": ObjectId(folder_id)})
+        # 폴더 접근 시간 업데이트와 조회를 한 번에 처리
+        now = datetime.utcnow()
+        folder = await db.folders.find_one_and_update(
+            {"_id": ObjectId(folder_id)},
+            {"$set": {"last_accessed_at": now, "updated_at": now}},
+            return_document=ReturnDocument.AFTER
+        )
         if not folder:
             raise HTTPException(status_code=404, detail="폴더를 찾을 수 없습니다.")
         
-        # 폴더 접근 시간 업데이트
-        await db_ops.update_folder_access(folder_id)
-        
-        # 문서 및 파일 수 계산
-        doc_count = await db.documents.count_documents({"folder_id": folder_id})
-        
-        pipeline = [
-            {"$match": {"folder_id": folder_id}},
-            {"$group": {"_id": "$file_metadata.file_id"}},
-            {"$count": "unique_files"}
-        ]
-        file_count_result = await db.documents.aggregate(pipeline).to_list(1)
-        file_count = file_count_result[0]["unique_files"] if file_count_result else 0
-        
-        return FolderResponse(
-            folder_id=str(folder["_id"]),
-            title=folder["title"],
-            folder_type=folder["folder_type"],
-            created_at=folder.get("created_at"),
-            last_accessed_at=folder.get("last_accessed_at"),
-            cover_image_url=folder.get("cover_image_url"),
-            document_count=doc_count,
-            file_count=file_count
-        )
+        return _folder_response(folder)
         
     except HTTPException:
         raise
@@ -226,40 +195,18 @@ async def update_folder(folder_id: str, request: FolderUpdateRequest):
         if not update_fields:
             raise HTTPException(status_code=400, detail="업데이트할 내용이 없습니다.")
         
-        # 폴더 업데이트
-        success = await db_ops.update_one(
-            "folders",
+        # 폴더 업데이트 후 갱신된 폴더 정보 반환
+        update_fields["updated_at"] = datetime.utcnow()
+        updated_folder = await db.folders.find_one_and_update(
             {"_id": ObjectId(folder_id)},
-            {"$set": update_fields}
+            {"$set": update_fields},
+            return_document=ReturnDocument.AFTER
         )
         
-        if not success:
+        if not updated_folder:
             raise HTTPException(status_code=500, detail="폴더 업데이트에 실패했습니다.")
         
-        # 업데이트된 폴더 정보 반환
-        updated_folder = await db_ops.find_one("folders", {"_id": ObjectId(folder_id)})
-        
-        # 문서 및 파일 수 계산
-        doc_count = await db.documents.count_documents({"folder_id": folder_id})
-        
-        pipeline = [
-            {"$match": {"folder_id": folder_id}},
-            {"$group": {"_id": "$file_metadata.file_id"}},
-            {"$count": "unique_files"}
-        ]
-        file_count_result = await db.documents.aggregate(pipeline).to_list(1)
-        file_count = file_count_result[0]["unique_files"] if file_count_result else 0
-        
-        return FolderResponse(
-            folder_id=str(updated_folder["_id"]),
-            title=updated_folder["title"],
-            folder_type=updated_folder["folder_type"],
-            created_at=updated_folder.get("created_at"),
-            last_accessed_at=updated_folder.get("last_accessed_at"),
-            cover_image_url=updated_folder.get("cover_image_url"),
-            document_count=doc_count,
-            file_count=file_count
-        )
+        return _folder_response(updated_folder)
         
     except HTTPException:
         raise
@@ -298,12 +245,15 @@ async def delete_folder(folder_id: str, force: bool = False):
             # 관련 데이터 모두 삭제
             await db.documents.delete_many({"folder_id": folder_id})
             await db.chunks.delete_many({"folder_id": folder_id})
+            on_folder_chunks_deleted(folder_id)
+            await remove_folder_search_index(db, folder_id)
             await db.summaries.delete_many({"folder_id": folder_id})
             await db.qapairs.delete_many({"folder_id": folder_id})
             await db.recommendations.delete_many({"folder_id": folder_id})
             await db.labels.delete_many({"folder_id": folder_id})
             await db.memos.delete_many({"folder_id": folder_id})
             await db.highlights.delete_many({"folder_id": folder_id})
+            await db.ingestion_jobs.delete_many({"folder_id": folder_id})
         
         # 폴더 삭제
         success = await db_ops.delete_one("folders", {"_id": ObjectId(folder_id)})
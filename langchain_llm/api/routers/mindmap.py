@@ -48,7 +48,7 @@ async def generate_mindmap(request: MindmapRequest):
         db = await get_database()
         hybrid_search = HybridSearch(db)
         labeler = AutoLabeler()
-        llm_client = LLMClient()
+        llm_client = LLMClient(feature="mindmap")
         
         # 1. 루트 키워드와 관련된 문서 검색
         search_results = await hybrid_search.search(
@@ -439,7 +439,7 @@ def _generate_fallback_mindmap(root_keyword: str) -> MindmapResponse:
 async def _generate_enhanced_fallback_mindmap(root_keyword: str, max_nodes: int) -> MindmapResponse:
     """향상된 기본 마인드맵 생성 (LLM 사용)"""
     try:
-        llm_client = LLMClient()
+        llm_client = LLMClient(feature="mindmap")
         keywords = await _generate_llm_keywords(llm_client, root_keyword, max_nodes - 1)
         
         if not keywords:
@@ -15,6 +15,7 @@ from bson import ObjectId
 
 from database.connection import get_database
 from database.ocr_bridge import OCRBridge
+from data_processing.embedding_codec import embedding_dimension, embedding_format
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -319,7 +320,8 @@ async def debug_ocr_chunks(
                 "sequence": chunk.get("sequence"),
                 "text_preview": chunk.get("text", "")[:200] + "..." if len(chunk.get("text", "")) > 200 else chunk.get("text", ""),
                 "has_embedding": "text_embedding" in chunk and chunk["text_embedding"] is not None,
-                "embedding_size": len(chunk["text_embedding"]) if "text_embedding" in chunk and chunk["text_embedding"] else 0,
+                "embedding_size": embedding_dimension(chunk.get("text_embedding")),
+                "embedding_format": embedding_format(chunk["text_embedding"]) if chunk.get("text_embedding") else None,
                 "metadata": chunk.get("metadata", {})
             }
             formatted_chunks.append(formatted_chunk)
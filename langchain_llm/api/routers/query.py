@@ -1,12 +1,17 @@
 """
 질의응답 API 라우터 (AgentHub 통합 - 대화형 메모리 지원, 자동 세션 생성)
+ENHANCED: SSE 스트리밍 질의 엔드포인트 (/stream)
 """
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import AsyncIterator, Dict, Optional, List
 from database.connection import get_database
+from data_processing.embedding_cache import embedding_cache, query_embedding_cache
+from retrieval.answer_cache import answer_cache
 from utils.logger import get_logger
 from utils.session import ensure_valid_session_id, generate_query_session_id
+from utils.sse import SSE_HEADERS, sse_stream
 
 logger = get_logger(__name__)
 router = APIRouter()
@@ -30,6 +35,14 @@ async def get_agent_hub():
             return None
     return _agent_hub
 
+async def shutdown_agent_hub():
+    """AgentHub 종료 (저장 대기 중인 대화 기록 반영)"""
+    if _agent_hub is not None:
+        try:
+            await _agent_hub.close()
+        except Exception as e:
+            logger.error(f"AgentHub 종료 처리 실패: {e}")
+
 class QueryRequest(BaseModel):
     """질의 요청 모델"""
     query: str
@@ -124,6 +137,55 @@ async def process_query(request: QueryRequest):
         except:
             raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/stream")
+async def process_query_stream(request: QueryRequest):
+    """스트리밍 질의 처리 엔드포인트 (SSE: sources -> token... -> done)"""
+    request.session_id = ensure_valid_session_id(request.session_id, "query_session")
+    return StreamingResponse(
+        sse_stream(_query_events(request)),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+async def _query_events(request: QueryRequest) -> AsyncIterator[Dict]:
+    """질의 스트림 이벤트 (AgentHub 사용 불가 또는 첫 이벤트 전 실패 시 Fallback 결과를 한 번에 전달)"""
+    agent_hub = await get_agent_hub()
+    started = False
+    
+    if agent_hub:
+        context = {}
+        if request.folder_id and request.folder_id.strip() and request.folder_id not in ["string", "null"]:
+            context["folder_id"] = request.folder_id.strip()
+        if request.top_k:
+            context["k"] = request.top_k
+        
+        try:
+            async for event in agent_hub.process_query_stream(
+                query=request.query,
+                session_id=request.session_id,
+                context=context
+            ):
+                started = True
+                if not request.include_sources and event["event"] in ("sources", "done"):
+                    event = {**event, "data": {**event["data"], "sources": None}}
+                yield event
+            return
+        except Exception as e:
+            # 이미 토큰을 보낸 뒤의 오류는 error 이벤트로 전달
+            if started:
+                raise
+            logger.warning(f"AgentHub 스트리밍 처리 실패, Fallback 사용: {e}")
+    else:
+        logger.warning("AgentHub 사용 불가, Fallback 사용")
+    
+    response = (await _fallback_query_processing(request)).model_dump()
+    yield {
+        "event": "sources",
+        "data": {key: response[key] for key in ("sources", "strategy", "confidence")}
+    }
+    yield {"event": "token", "data": {"text": response["answer"]}}
+    yield {"event": "done", "data": response}
+
 async def _fallback_query_processing(request: QueryRequest) -> QueryResponse:
     """Fallback: 기존 QueryChain 사용 (자동 세션 생성 포함)"""
     try:
@@ -184,6 +246,19 @@ async def get_agent_info():
         logger.error(f"에이전트 정보 조회 실패: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/embedding-cache/stats")
+async def get_embedding_cache_stats():
+    """질의/콘텐츠 임베딩 캐시 적중 통계 조회 엔드포인트"""
+    return {
+        "query_embedding_cache": query_embedding_cache.stats(),
+        "content_embedding_cache": embedding_cache.stats()
+    }
+
+@router.get("/answer-cache/stats")
+async def get_answer_cache_stats():
+    """의미 기반 답변 캐시 적중/무효화 통계 조회 엔드포인트"""
+    return answer_cache.stats()
+
 @router.get("/sessions")
 async def get_all_sessions():
     """모든 세션 조회 엔드포인트"""
@@ -1,13 +1,16 @@
 """
 요약 API 라우터
 MODIFIED 2024-12-20: 요약 캐시 관리 기능 추가
+ENHANCED: SSE 스트리밍 요약 엔드포인트 (/stream)
 """
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
 from api.chains.summary_chain import SummaryChain
 from database.connection import get_database
 from utils.logger import get_logger
+from utils.sse import SSE_HEADERS, sse_stream
 
 logger = get_logger(__name__)
 router = APIRouter()
@@ -66,6 +69,19 @@ async def create_summary(request: SummaryRequest):
         logger.error(f"요약 생성 실패: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/stream")
+async def create_summary_stream(request: SummaryRequest):
+    """스트리밍 요약 생성 엔드포인트 (SSE: meta -> token... -> done)"""
+    db = await get_database()
+    summary_chain = SummaryChain(db)
+    
+    events = summary_chain.process_stream(
+        document_ids=request.document_ids,
+        folder_id=request.folder_id,
+        summary_type=request.summary_type
+    )
+    return StreamingResponse(sse_stream(events), media_type="text/event-stream", headers=SSE_HEADERS)
+
 @router.get("/cached", response_model=CachedSummariesResponse)
 async def get_cached_summaries(folder_id: Optional[str] = None, limit: int = 10):
     """캐시된 요약 목록 조회 엔드포인트"""
@@ -5,26 +5,43 @@ ENHANCED 2024-01-21: 파일 미리보기 기능 추가
 REFACTORED 2024-01-21: 중복 검색 API 제거 및 코드 정리
 FIXED 2024-01-21: import 경로 수정 (file_processing -> data_processing)
 FIXED 2025-06-03: DocumentProcessor 초기화 및 메서드 호출 오류 수정
+ENHANCED: 업로드를 백그라운드 적재 작업으로 등록하고 상태 조회로 진행률 제공
+ENHANCED: 업로드 스트리밍 SHA-256 및 동일 내용 문서 재사용 (재적재 없이 복제)
+ENHANCED: 텍스트 수정 API (변경된 청크만 재임베딩)
+ENHANCED: 파일 검색을 파일명/본문 2-gram 인덱스로 처리 (커서 페이지네이션, 저장된 위치 기반 스니펫)
 """
+import hashlib
 import os
+import re
 import time
 import uuid
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
+from bson import ObjectId
 from fastapi import APIRouter, File, Form, HTTPException, UploadFile
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
+from config.settings import settings
 from database.connection import get_database
+from database.operations import DatabaseOperations
 from data_processing.document_processor import DocumentProcessor
+from data_processing.ingestion_jobs import enqueue_ingestion_job, get_latest_job_for_file, JOB_COMPLETED
+from retrieval.file_search_index import (
+    FIELD_CONTENT, FIELD_FILENAME, FileSearchIndex, remove_file_search_index, sync_file_search_index
+)
 from retrieval.vector_search import VectorSearch
+from retrieval.index_sync import on_document_updated, on_file_chunks_deleted
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 router = APIRouter()
 
+MAX_UPLOAD_SIZE = 10 * 1024 * 1024  # 10MB
+UPLOAD_READ_BLOCK_SIZE = 1024 * 1024
+
 class UploadResponse(BaseModel):
     """업로드 응답 모델"""
     success: bool
@@ -33,6 +50,10 @@ class UploadResponse(BaseModel):
     original_filename: str
     processed_chunks: int
     storage_path: Optional[str] = None
+    job_id: Optional[str] = None  # 백그라운드 적재 작업 ID
+    status: Optional[str] = None  # 'queued', 'processing', 'retrying', 'completed', 'failed'
+    duplicate: bool = False  # 같은 폴더에 동일 내용 파일이 이미 있는 경우
+    reused_from: Optional[str] = None  # 동일 내용 문서를 복제한 경우 원본 file_id
 
 class FileStatus(BaseModel):
     """파일 상태 모델"""
@@ -40,10 +61,14 @@ class FileStatus(BaseModel):
     original_filename: str
     file_type: str
     file_size: int
-    status: str  # 'uploading', 'processing', 'completed', 'failed'
+    status: str  # 'uploading', 'queued', 'processing', 'retrying', 'completed', 'failed'
     processed_chunks: int
     upload_time: datetime
     folder_id: Optional[str] = None
+    job_id: Optional[str] = None
+    progress: Optional[dict] = None  # 적재 단계별 진행 상황 (stage, chunked, embedded, stored)
+    attempts: Optional[int] = None
+    error: Optional[str] = None
 
 class FileSearchRequest(BaseModel):
     """파일 검색 요청 모델"""
@@ -52,6 +77,7 @@ class FileSearchRequest(BaseModel):
     folder_id: Optional[str] = None
     limit: int = 20
     skip: int = 0
+    cursor: Optional[str] = None  # 이전 응답의 next_cursor (지정 시 skip 대신 사용)
 
 class FileSearchResult(BaseModel):
     """파일 검색 결과 모델"""
@@ -74,6 +100,7 @@ class FileSearchResponse(BaseModel):
     query: str
     search_type: str
     execution_time: float
+    next_cursor: Optional[str] = None  # 다음 페이지 조회용 커서 (마지막 페이지면 None)
 
 class FileUpdateRequest(BaseModel):
     """파일 정보 업데이트 요청 모델"""
@@ -82,6 +109,11 @@ class FileUpdateRequest(BaseModel):
     folder_id: Optional[str] = None
     folder_title: Optional[str] = None
 
+class FileContentUpdateRequest(BaseModel):
+    """파일 텍스트 수정 요청 모델"""
+    raw_text: str
+    preserve_formatting: bool = True
+
 class FilePreviewResponse(BaseModel):
     """파일 미리보기 응답 모델"""
     file_id: str
@@ -127,29 +159,20 @@ async def upload_file(
                 detail=f"지원하지 않는 파일 형식입니다. 지원 형식: {', '.join(allowed_types)}"
             )
         
-        # 파일 크기 확인 (10MB 제한)
-        file_content = await file.read()
-        if len(file_content) > 10 * 1024 * 1024:  # 10MB
-            raise HTTPException(status_code=400, detail="파일 크기는 10MB를 초과할 수 없습니다.")
-        
-        # 파일을 다시 처음으로 되돌리기
-        await file.seek(0)
-        
         # 데이터베이스 연결
         db = await get_database()
         
         # 파일 ID 생성
         file_id = str(uuid.uuid4())
         
-        # 임시 파일로 저장
+        # 임시 파일로 저장 (읽는 동안 SHA-256 계산 및 10MB 제한 확인)
         upload_dir = Path("uploads")
         upload_dir.mkdir(exist_ok=True)
         
         temp_filename = f"{file_id}_{file.filename}"
         temp_file_path = upload_dir / temp_filename
         
-        with open(temp_file_path, "wb") as temp_file:
-            temp_file.write(file_content)
+        content_hash, file_size = await _save_upload_with_hash(file, temp_file_path)
         
         # Form 데이터 정리 및 폴더 ID 결정
         clean_folder_id = None
@@ -161,7 +184,6 @@ async def upload_file(
             logger.info(f"folder_id로 폴더 지정: {clean_folder_id}")
             
             # folder_id 유효성 검증
-            from bson import ObjectId
             try:
                 if not ObjectId.is_valid(clean_folder_id):
                     raise HTTPException(status_code=400, detail="유효하지 않은 folder_id 형식입니다.")
@@ -198,19 +220,92 @@ async def upload_file(
         
         logger.info(f"최종 정리된 데이터 - clean_folder_id: '{clean_folder_id}', clean_description: '{clean_description}'")
         
+        # 저장될 폴더를 먼저 확정 (미지정이면 기본 폴더) - 중복 확인/재사용/작업 등록에 같은 folder_id 사용
+        processor = DocumentProcessor(db)
+        clean_folder_id = await processor._validate_and_get_folder_id(clean_folder_id)
+        
         # 파일 메타데이터 준비
         file_metadata = {
             "file_id": file_id,
             "original_filename": file.filename,
             "file_type": file_ext[1:],  # 점 제거
-            "file_size": len(file_content),
+            "file_size": file_size,
             "upload_time": datetime.utcnow(),
             "folder_id": clean_folder_id,
-            "description": clean_description
+            "description": clean_description,
+            "content_hash": content_hash,
+            "preserve_formatting": preserve_formatting
         }
         
+        # 동일 내용으로 적재 완료된 문서가 있으면 파싱/라벨링/임베딩 없이 재사용
+        source_document = await processor.find_reusable_document(
+            content_hash, preserve_formatting, clean_folder_id
+        )
+        if source_document:
+            if source_document.get("folder_id") == clean_folder_id:
+                # 같은 폴더에 이미 있으면 기존 파일 반환
+                _remove_temp_file(temp_file_path)
+                existing_file_id = source_document["file_metadata"]["file_id"]
+                logger.info(f"같은 폴더의 동일 내용 파일 반환: {file.filename} -> {existing_file_id}")
+                return UploadResponse(
+                    success=True,
+                    message="같은 폴더에 동일한 내용의 파일이 이미 업로드되어 있습니다.",
+                    file_id=existing_file_id,
+                    original_filename=file.filename,
+                    processed_chunks=source_document.get("chunks_count", 0),
+                    status=JOB_COMPLETED,
+                    duplicate=True
+                )
+            
+            try:
+                result = await processor.clone_document(source_document, file_metadata)
+            except Exception:
+                _remove_temp_file(temp_file_path)
+                raise
+            if result:
+                _remove_temp_file(temp_file_path)
+                return UploadResponse(
+                    success=True,
+                    message="동일한 내용의 기존 문서를 재사용하여 업로드가 완료되었습니다.",
+                    file_id=file_id,
+                    original_filename=file.filename,
+                    processed_chunks=result["chunks_count"],
+                    status=JOB_COMPLETED,
+                    reused_from=result["cloned_from"]
+                )
+            # 원본이 사라져 복제하지 못함 - 아래 일반 적재 경로로 진행
+        
+        # 백그라운드 적재 작업으로 등록 후 즉시 반환
+        if settings.INGEST_JOBS_ENABLED:
+            job = await enqueue_ingestion_job(
+                db,
+                file_path=temp_file_path,
+                file_metadata=file_metadata,
+                content_hash=content_hash,
+                preserve_formatting=preserve_formatting
+            )
+            
+            if job["duplicate"]:
+                # 동일 내용 파일이 이미 처리 중/완료 - 새 임시 파일은 불필요
+                _remove_temp_file(temp_file_path)
+                message = "같은 폴더에 동일한 내용의 파일이 이미 업로드되어 있습니다."
+            else:
+                message = "파일 업로드가 접수되었습니다. 상태 조회로 처리 진행 상황을 확인할 수 있습니다."
+            
+            logger.info(f"파일 적재 작업 등록: {file.filename} -> {job['file_id']} (작업: {job['_id']})")
+            return UploadResponse(
+                success=True,
+                message=message,
+                file_id=job["file_id"],
+                original_filename=file.filename,
+                processed_chunks=job.get("progress", {}).get("stored", 0),
+                storage_path=job["file_path"],
+                job_id=job["_id"],
+                status=job["status"],
+                duplicate=job["duplicate"]
+            )
+        
         # 문서 처리기로 파일 처리 (줄바꿈 보존 옵션 전달)
-        processor = DocumentProcessor(db)
         result = await processor.process_and_store(
             file_path=temp_file_path,
             file_metadata=file_metadata,
@@ -218,10 +313,7 @@ async def upload_file(
         )
         
         # 임시 파일 삭제
-        try:
-            temp_file_path.unlink()
-        except Exception as e:
-            logger.warning(f"임시 파일 삭제 실패: {e}")
+        _remove_temp_file(temp_file_path)
         
         # 성공 메시지 생성
         format_status = "줄바꿈 보존" if preserve_formatting else "기본 정리"
@@ -252,12 +344,60 @@ async def upload_file(
         logger.error(f"파일 업로드 실패: {e}")
         raise HTTPException(status_code=500, detail=f"파일 업로드 중 오류가 발생했습니다: {str(e)}")
 
+async def _save_upload_with_hash(file: UploadFile, dest_path: Path) -> Tuple[str, int]:
+    """업로드를 청크 단위로 저장하며 SHA-256 계산 (크기 제한 초과 시 파일 삭제 후 400)"""
+    hasher = hashlib.sha256()
+    size = 0
+    with open(dest_path, "wb") as temp_file:
+        while True:
+            block = await file.read(UPLOAD_READ_BLOCK_SIZE)
+            if not block:
+                break
+            size += len(block)
+            if size > MAX_UPLOAD_SIZE:
+                break
+            hasher.update(block)
+            temp_file.write(block)
+    
+    if size > MAX_UPLOAD_SIZE:
+        _remove_temp_file(dest_path)
+        raise HTTPException(status_code=400, detail="파일 크기는 10MB를 초과할 수 없습니다.")
+    return hasher.hexdigest(), size
+
+def _remove_temp_file(file_path: Path):
+    """임시 업로드 파일 삭제"""
+    try:
+        file_path.unlink(missing_ok=True)
+    except Exception as e:
+        logger.warning(f"임시 파일 삭제 실패: {e}")
+
 @router.get("/status/{file_id}", response_model=FileStatus)
 async def get_file_status(file_id: str):
     """파일 처리 상태 조회"""
     try:
         db = await get_database()
         
+        # 0. 백그라운드 적재 작업이 끝나지 않았으면 작업 진행 상황 반환
+        job = await get_latest_job_for_file(db, file_id)
+        if job and job["status"] != JOB_COMPLETED:
+            file_metadata = job.get("file_metadata", {})
+            progress = job.get("progress", {})
+            
+            return FileStatus(
+                file_id=file_id,
+                original_filename=file_metadata.get("original_filename", ""),
+                file_type=file_metadata.get("file_type", ""),
+                file_size=file_metadata.get("file_size", 0),
+                status=job["status"],
+                processed_chunks=progress.get("stored", 0),
+                upload_time=file_metadata.get("upload_time", job["created_at"]),
+                folder_id=job.get("folder_id"),
+                job_id=job["_id"],
+                progress=progress,
+                attempts=job.get("attempts"),
+                error=job.get("error")
+            )
+        
         # 1. file_info 컬렉션에서 파일 정보 조회 (처리 상태 포함)
         file_info = await db.file_info.find_one({"file_id": file_id})
         
@@ -331,120 +471,160 @@ async def search_files(request: FileSearchRequest):
         db = await get_database()
         
         # 1. 기본 필터 조건 설정 (folder_id가 실제 값일 때만 적용)
-        base_filter = {}
+        folder_id = None
         if request.folder_id and request.folder_id.strip() and request.folder_id != "string":
-            base_filter["folder_id"] = request.folder_id
+            folder_id = request.folder_id
         
-        found_files = []
-        
-        # 2. 파일명 검색 (filename 또는 both)
+        fields = []
         if request.search_type in ["filename", "both"]:
-            filename_filter = base_filter.copy()
-            # 새로운 구조: file_metadata.original_filename에서 검색
-            filename_filter["file_metadata.original_filename"] = {"$regex": request.query, "$options": "i"}
-            
-            filename_docs = await db.documents.find(filename_filter).to_list(None)
-            
-            for doc in filename_docs:
-                file_metadata = doc.get("file_metadata", {})
-                file_id = file_metadata.get("file_id")
-                
-                if not file_id:
-                    continue
-                    
-                chunks_count = doc.get("chunks_count", 0)  # 저장된 통계 사용
-                
-                found_files.append({
-                    "file_id": file_id,
-                    "original_filename": file_metadata.get("original_filename", "알 수 없는 파일"),
-                    "file_type": file_metadata.get("file_type", "unknown"),
-                    "file_size": file_metadata.get("file_size", 0),
-                    "processed_chunks": chunks_count,
-                    "upload_time": doc.get("created_at", datetime.utcnow()),
-                    "folder_id": doc.get("folder_id"),
-                    "description": file_metadata.get("description"),
-                    "match_type": "filename",
-                    "relevance_score": 1.0,  # 파일명 매치는 높은 점수
-                    "matched_content": f"파일명 매치: {file_metadata.get('original_filename')}"
-                })
-        
-        # 3. 내용 검색 (content 또는 both) - 새로운 구조에 맞게 수정
+            fields.append(FIELD_FILENAME)
         if request.search_type in ["content", "both"]:
-            content_filter = base_filter.copy()
-            content_filter["raw_text"] = {"$regex": request.query, "$options": "i"}
-            
-            content_docs = await db.documents.find(content_filter).to_list(None)
-            
-            for doc in content_docs:
-                file_metadata = doc.get("file_metadata", {})
-                file_id = file_metadata.get("file_id")
-                
-                if not file_id:
-                    continue
-                
-                # 이미 파일명으로 찾은 경우 스킵 (중복 방지)
-                if any(f["file_id"] == file_id for f in found_files):
-                    continue
-                
-                chunks_count = doc.get("chunks_count", 0)
-                raw_text = doc.get("raw_text", "")
-                
-                # 매칭된 텍스트 추출 (간단한 하이라이트)
-                query_lower = request.query.lower()
-                text_lower = raw_text.lower()
-                
-                # 검색어 주변 텍스트 추출
-                match_index = text_lower.find(query_lower)
-                if match_index != -1:
-                    start = max(0, match_index - 50)
-                    end = min(len(raw_text), match_index + len(request.query) + 50)
-                    matched_content = "..." + raw_text[start:end] + "..."
-                else:
-                    matched_content = raw_text[:100] + "..."
-                
-                found_files.append({
-                    "file_id": file_id,
-                    "original_filename": file_metadata.get("original_filename", "알 수 없는 파일"),
-                    "file_type": file_metadata.get("file_type", "unknown"),
-                    "file_size": file_metadata.get("file_size", 0),
-                    "processed_chunks": chunks_count,
-                    "upload_time": doc.get("created_at", datetime.utcnow()),
-                    "folder_id": doc.get("folder_id"),
-                    "description": file_metadata.get("description"),
-                    "match_type": "content",
-                    "relevance_score": 0.8,  # 내용 매치는 중간 점수
-                    "matched_content": matched_content
-                })
-        
-        # 4. 관련성 점수 순으로 정렬
-        sorted_files = sorted(found_files, key=lambda x: x["relevance_score"], reverse=True)
-        total_found = len(sorted_files)
-        
-        # 페이지네이션 적용
-        paginated_files = sorted_files[request.skip:request.skip + request.limit]
-        
-        # 5. 응답 모델에 맞게 변환
-        search_results = []
-        for file_data in paginated_files:
-            search_results.append(FileSearchResult(**file_data))
+            fields.append(FIELD_CONTENT)
+        
+        # 2. n-gram 인덱스 검색 (2-gram을 만들 수 없는 한 글자 검색어 등은 정규식 검색)
+        result = None
+        if settings.FILE_SEARCH_INDEX_ENABLED and fields:
+            try:
+                result = await FileSearchIndex(db).search(
+                    request.query,
+                    fields=fields,
+                    folder_id=folder_id,
+                    limit=request.limit,
+                    cursor=request.cursor,
+                    skip=request.skip
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+        
+        if result is not None:
+            search_results = [_indexed_search_result(item) for item in result["items"]]
+            total_found = result["total_found"]
+            next_cursor = result["next_cursor"]
+        else:
+            found_files = await _search_files_by_regex(db, request, folder_id)
+            total_found = len(found_files)
+            search_results = [
+                FileSearchResult(**file_data)
+                for file_data in found_files[request.skip:request.skip + request.limit]
+            ]
+            next_cursor = None
         
         execution_time = time.time() - start_time
         
         # 디버그 정보 로깅
-        logger.info(f"검색 완료 - 쿼리: '{request.query}', 타입: {request.search_type}, 폴더: {request.folder_id}, 결과: {total_found}개")
+        logger.info(
+            f"검색 완료 - 쿼리: '{request.query}', 타입: {request.search_type}, 폴더: {request.folder_id}, "
+            f"결과: {total_found}개 ({'인덱스' if result is not None else '정규식'})"
+        )
         
         return FileSearchResponse(
             files=search_results,
             total_found=total_found,
             query=request.query,
             search_type=request.search_type,
-            execution_time=round(execution_time, 3)
+            execution_time=round(execution_time, 3),
+            next_cursor=next_cursor
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"파일 검색 실패: {e}")
         raise HTTPException(status_code=500, detail=f"파일 검색 중 오류가 발생했습니다: {str(e)}")
 
+def _indexed_search_result(item: dict) -> FileSearchResult:
+    """인덱스 검색 항목을 응답 모델로 변환"""
+    doc = item["document"]
+    file_metadata = doc.get("file_metadata", {})
+    if item["snippet"]:
+        matched_content = "..." + item["snippet"] + "..."
+    else:
+        matched_content = f"파일명 매치: {file_metadata.get('original_filename')}"
+    
+    return FileSearchResult(
+        file_id=item["file_id"],
+        original_filename=file_metadata.get("original_filename", "알 수 없는 파일"),
+        file_type=file_metadata.get("file_type", "unknown"),
+        file_size=file_metadata.get("file_size", 0),
+        processed_chunks=doc.get("chunks_count", 0),
+        upload_time=doc.get("created_at", datetime.utcnow()),
+        folder_id=doc.get("folder_id"),
+        description=file_metadata.get("description"),
+        match_type=item["match_type"],
+        relevance_score=item["relevance_score"],
+        matched_content=matched_content
+    )
+
+async def _search_files_by_regex(db, request: FileSearchRequest, folder_id: Optional[str]) -> List[dict]:
+    """정규식 스캔 검색 (인덱스 비활성화 또는 2-gram이 없는 검색어)"""
+    base_filter = {"folder_id": folder_id} if folder_id else {}
+    pattern = {"$regex": re.escape(request.query), "$options": "i"}
+    projection = {"raw_text": 0, "processed_text": 0}
+    found_files = []
+    
+    # 파일명 검색 (filename 또는 both)
+    if request.search_type in ["filename", "both"]:
+        filename_filter = {**base_filter, "file_metadata.original_filename": pattern}
+        async for doc in db.documents.find(filename_filter, projection):
+            file_metadata = doc.get("file_metadata", {})
+            if not file_metadata.get("file_id"):
+                continue
+            found_files.append(_regex_search_result(
+                doc, "filename", 1.0, f"파일명 매치: {file_metadata.get('original_filename')}"
+            ))
+    
+    # 내용 검색 (content 또는 both) - 매치 주변 텍스트만 서버에서 잘라 조회
+    if request.search_type in ["content", "both"]:
+        found_ids = {f["file_id"] for f in found_files}
+        pipeline = [
+            {"$match": {**base_filter, "raw_text": pattern}},
+            {"$project": {
+                "file_metadata": 1,
+                "chunks_count": 1,
+                "created_at": 1,
+                "folder_id": 1,
+                "match_index": {"$indexOfCP": [{"$toLower": "$raw_text"}, request.query.lower()]},
+                "raw_text": 1
+            }},
+            {"$project": {
+                "file_metadata": 1,
+                "chunks_count": 1,
+                "created_at": 1,
+                "folder_id": 1,
+                "snippet": {"$substrCP": [
+                    "$raw_text",
+                    {"$max": [0, {"$subtract": ["$match_index", 50]}]},
+                    len(request.query) + 100
+                ]}
+            }}
+        ]
+        async for doc in db.documents.aggregate(pipeline):
+            file_id = doc.get("file_metadata", {}).get("file_id")
+            # 이미 파일명으로 찾은 경우 스킵 (중복 방지)
+            if not file_id or file_id in found_ids:
+                continue
+            found_files.append(_regex_search_result(doc, "content", 0.8, "..." + doc.get("snippet", "") + "..."))
+    
+    # 관련성 점수 순으로 정렬
+    return sorted(found_files, key=lambda x: x["relevance_score"], reverse=True)
+
+def _regex_search_result(doc: dict, match_type: str, relevance_score: float, matched_content: str) -> dict:
+    """정규식 검색 결과 항목 생성"""
+    file_metadata = doc.get("file_metadata", {})
+    return {
+        "file_id": file_metadata.get("file_id"),
+        "original_filename": file_metadata.get("original_filename", "알 수 없는 파일"),
+        "file_type": file_metadata.get("file_type", "unknown"),
+        "file_size": file_metadata.get("file_size", 0),
+        "processed_chunks": doc.get("chunks_count", 0),  # 저장된 통계 사용
+        "upload_time": doc.get("created_at", datetime.utcnow()),
+        "folder_id": doc.get("folder_id"),
+        "description": file_metadata.get("description"),
+        "match_type": match_type,
+        "relevance_score": relevance_score,
+        "matched_content": matched_content
+    }
+
 @router.delete("/{file_id}")
 async def delete_file(file_id: str):
     """파일 완전 삭제 - 모든 구조를 지원하는 통합 삭제"""
@@ -462,8 +642,9 @@ async def delete_file(file_id: str):
         
         # 1. documents 컬렉션에서 삭제 (새 구조 + 기존 구조 모두 지원)
         # 새로운 구조 (file_metadata.file_id)
-        doc_result_new = await db.documents.delete_many({"file_metadata.file_id": file_id})
-        deleted_items["documents"] += doc_result_new.deleted_count
+        deleted_items["documents"] += await DatabaseOperations(db).delete_documents_with_stats(
+            {"file_metadata.file_id": file_id}
+        )
         
         # 기존 구조 (file_id 직접)
         doc_result_old = await db.documents.delete_many({"file_id": file_id})
@@ -472,6 +653,8 @@ async def delete_file(file_id: str):
         # 2. chunks 컬렉션에서 삭제
         chunks_result = await db.chunks.delete_many({"file_id": file_id})
         deleted_items["chunks"] = chunks_result.deleted_count
+        on_file_chunks_deleted(file_id)
+        await remove_file_search_index(db, [file_id])
         
         # 3. file_info 컬렉션에서 삭제
         file_info_result = await db.file_info.delete_many({"file_id": file_id})
@@ -492,6 +675,8 @@ async def delete_file(file_id: str):
                 ]
             })
             await db.recommendations.delete_many({"file_id": file_id})
+            # 적재 작업 기록 제거 (동일 내용 재업로드 허용)
+            await db.ingestion_jobs.delete_many({"file_id": file_id})
         except Exception as e:
             logger.warning(f"기타 컬렉션 정리 중 오류 (무시): {e}")
         
@@ -692,6 +877,37 @@ async def get_file_content(file_id: str):
         logger.error(f"파일 내용 조회 실패: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.put("/content/{file_id}")
+async def update_file_content(file_id: str, request: FileContentUpdateRequest):
+    """파일 텍스트 수정 (변경된 청크만 재임베딩하여 검색에 반영)"""
+    try:
+        if not request.raw_text.strip():
+            raise HTTPException(status_code=400, detail="수정할 텍스트가 비어 있습니다.")
+        
+        db = await get_database()
+        processor = DocumentProcessor(db)
+        
+        try:
+            result = await processor.update_raw_text(
+                file_id=file_id,
+                raw_text=request.raw_text,
+                preserve_formatting=request.preserve_formatting
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        
+        return {
+            "success": True,
+            "message": "파일 텍스트가 수정되었습니다.",
+            **result
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"파일 텍스트 수정 실패: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.put("/{file_id}")
 async def update_file_info(file_id: str, request: FileUpdateRequest):
     """파일 정보 업데이트 (파일명, 설명, 폴더 등)"""
@@ -778,6 +994,11 @@ async def update_file_info(file_id: str, request: FileUpdateRequest):
         
         if result.modified_count == 0:
             logger.warning(f"파일 정보 업데이트 결과 없음: {file_id}")
+        on_document_updated(file_id)
+        if "folder_id" in update_fields:
+            await DatabaseOperations(db).move_document_stats(file_id, update_fields["folder_id"])
+        # 파일명/폴더 변경 반영 (본문 게시 목록은 폴더만 갱신)
+        await sync_file_search_index(db, file_id, fields=(FIELD_FILENAME,))
         
         # 폴더 변경시 chunks의 metadata도 업데이트
         if "folder_id" in update_fields:
@@ -0,0 +1,50 @@
+"""
+임베딩 배치 벤치마크
+기존 직렬 20개 배치 방식과 토큰 크기 기반 동시 스케줄러 비교
+실행:
+  python -m benchmarks.fake_embedding_server --latency 0.3 &
+  OPENAI_BASE_URL=http://127.0.0.1:8900/v1 python -m benchmarks.embedding_batch_benchmark [--chunks 1000]
+"""
+import argparse
+import asyncio
+import time
+
+from openai import AsyncOpenAI
+
+from config.settings import settings
+from data_processing.embedding_scheduler import EmbeddingBatchScheduler
+
+async def legacy_embed(client: AsyncOpenAI, texts, batch_size: int = 20):
+    """기존 방식: 20개씩 순차 요청"""
+    embeddings = []
+    for i in range(0, len(texts), batch_size):
+        response = await client.embeddings.create(model=settings.OPENAI_EMBEDDING_MODEL, input=texts[i:i+batch_size])
+        embeddings.extend(data.embedding for data in response.data)
+    return embeddings
+
+async def main():
+    parser = argparse.ArgumentParser(description="임베딩 배치 벤치마크")
+    parser.add_argument("--chunks", type=int, default=1000)
+    parser.add_argument("--chars", type=int, default=500, help="청크당 글자 수")
+    parser.add_argument("--concurrency", type=int, default=settings.EMBEDDING_CONCURRENCY)
+    args = parser.parse_args()
+
+    client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY, base_url=settings.OPENAI_BASE_URL)
+    texts = [f"{i}번 청크 " + "가나다라마바사 " * (args.chars // 8) for i in range(args.chunks)]
+
+    start = time.perf_counter()
+    legacy = await legacy_embed(client, texts)
+    legacy_seconds = time.perf_counter() - start
+
+    scheduler = EmbeddingBatchScheduler(client, settings.OPENAI_EMBEDDING_MODEL, concurrency=args.concurrency)
+    start = time.perf_counter()
+    scheduled = await scheduler.run(texts)
+    scheduled_seconds = time.perf_counter() - start
+
+    assert legacy == scheduled, "결과 순서 불일치"
+    print(f"chunks={args.chunks}, batches={len(scheduler.plan_batches(texts))}, concurrency={args.concurrency}")
+    print(f"legacy   : {legacy_seconds:.2f}s")
+    print(f"scheduler: {scheduled_seconds:.2f}s ({legacy_seconds / scheduled_seconds:.1f}x)")
+
+if __name__ == "__main__":
+    asyncio.run(main())
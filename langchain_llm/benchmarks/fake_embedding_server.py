@@ -0,0 +1,70 @@
+"""
+가짜 OpenAI 임베딩 서버 (벤치마크용)
+요청당 고정 지연과 분당 토큰 한도(초과 시 429 + Retry-After)를 흉내냄
+실행: python -m benchmarks.fake_embedding_server [--port 8900] [--latency 0.3] [--tpm 1000000]
+"""
+import argparse
+import asyncio
+import hashlib
+import time
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from data_processing.embedding_scheduler import estimate_tokens
+
+def create_app(latency: float, tokens_per_minute: int, dimension: int) -> FastAPI:
+    """가짜 /v1/embeddings 앱 생성"""
+    app = FastAPI()
+    window = {"started_at": time.monotonic(), "tokens": 0}
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        tokens = sum(estimate_tokens(text) for text in inputs)
+
+        # 1분 고정 윈도우 토큰 한도
+        now = time.monotonic()
+        if now - window["started_at"] >= 60:
+            window.update(started_at=now, tokens=0)
+        if tokens_per_minute and window["tokens"] + tokens > tokens_per_minute:
+            retry_after = 60 - (now - window["started_at"])
+            return JSONResponse(
+                status_code=429,
+                headers={"retry-after": f"{retry_after:.2f}"},
+                content={"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}}
+            )
+        window["tokens"] += tokens
+
+        await asyncio.sleep(latency)
+
+        data = []
+        for i, text in enumerate(inputs):
+            seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:4], "little")
+            vector = np.random.default_rng(seed).standard_normal(dimension).astype(np.float32)
+            data.append({"object": "embedding", "index": i, "embedding": vector.tolist()})
+
+        return {
+            "object": "list",
+            "data": data,
+            "model": body.get("model"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens}
+        }
+
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="가짜 OpenAI 임베딩 서버")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.3, help="요청당 지연(초)")
+    parser.add_argument("--tpm", type=int, default=1000000, help="분당 토큰 한도 (0이면 무제한)")
+    parser.add_argument("--dim", type=int, default=3072)
+    args = parser.parse_args()
+
+    uvicorn.run(create_app(args.latency, args.tpm, args.dim), host="127.0.0.1", port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
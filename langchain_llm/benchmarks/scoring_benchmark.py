@@ -0,0 +1,59 @@
+"""
+유사도 계산 벤치마크
+기존 청크별 코사인 루프와 배치 행렬 점수화 경로 비교
+실행: python -m benchmarks.scoring_benchmark [--dim 3072] [--k 5]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from retrieval.scoring import score_candidates
+
+def legacy_top_k(query, embeddings, k):
+    """기존 방식: 청크마다 배열 생성 및 노름 재계산 후 전체 정렬"""
+    similarities = []
+    for i, embedding in enumerate(embeddings):
+        vec1 = np.array(query)
+        vec2 = np.array(embedding)
+        score = float(np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2)))
+        similarities.append((i, score))
+    similarities.sort(key=lambda x: x[1], reverse=True)
+    return similarities[:k]
+
+def measure(func, repeat: int) -> float:
+    """최소 실행 시간(ms) 측정"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="코사인 유사도 점수화 벤치마크")
+    parser.add_argument("--dim", type=int, default=3072, help="임베딩 차원 (text-embedding-3-large = 3072)")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"dim={args.dim}, k={args.k}")
+    print(f"{'chunks':>8} {'legacy(ms)':>12} {'batch(ms)':>12} {'speedup':>8}")
+
+    for size in args.sizes:
+        # MongoDB에서 읽은 형태와 동일하게 파이썬 리스트로 준비
+        embeddings = rng.standard_normal((size, args.dim), dtype=np.float32).tolist()
+        query = rng.standard_normal(args.dim, dtype=np.float32).tolist()
+
+        legacy = legacy_top_k(query, embeddings, args.k)
+        batch = score_candidates(query, embeddings, args.k)
+        assert [i for i, _ in legacy] == [i for i, _ in batch], "상위 k 결과 불일치"
+
+        legacy_ms = measure(lambda: legacy_top_k(query, embeddings, args.k), args.repeat)
+        batch_ms = measure(lambda: score_candidates(query, embeddings, args.k), args.repeat)
+        print(f"{size:>8} {legacy_ms:>12.1f} {batch_ms:>12.1f} {legacy_ms / batch_ms:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,7 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: str
     OPENAI_MODEL: str = "gpt-4o-mini"
     OPENAI_EMBEDDING_MODEL: str = "text-embedding-3-large"
+    OPENAI_BASE_URL: Optional[str] = None  # 호환 서버/로컬 가짜 서버 사용 시 지정
     
     # MongoDB 설정
     MONGODB_URI: str
@@ -31,10 +32,113 @@ class Settings(BaseSettings):
     # 청킹 설정
     CHUNK_SIZE: int = 500
     CHUNK_OVERLAP: int = 50
+    CHUNK_STRATEGY: str = "content_defined"  # recursive (겹침 분할), content_defined (내용 기반 경계, 증분 재처리 지원), token (토큰 기준 문장 묶음)
+    CHUNK_MAX_TOKENS: int = 512  # token 전략: 청크당 최대 토큰 수 (임베딩 모델 토크나이저 기준)
+    CHUNK_OVERLAP_TOKENS: int = 64  # token 전략: 다음 청크로 이어지는 끝 문장 토큰 상한
     
+    # 스트리밍 적재 설정
+    INGEST_STREAMING_ENABLED: bool = True
+    INGEST_BATCH_CHUNKS: int = 64  # 임베딩/저장 배치당 청크 수
+    INGEST_PIPELINE_DEPTH: int = 2  # 저장 대기 배치 수 상한 (메모리 상한)
+    
+    # 적재 작업 큐 설정 (ingestion_jobs 컬렉션 + 앱 내부 워커 풀)
+    INGEST_JOBS_ENABLED: bool = True  # False면 업로드 요청 안에서 동기 처리
+    INGEST_WORKER_CONCURRENCY: int = 2
+    INGEST_JOB_MAX_ATTEMPTS: int = 3
+    INGEST_JOB_BACKOFF_SECONDS: int = 10  # 재시도 대기 기본값 (시도마다 2배)
+    INGEST_JOB_POLL_SECONDS: int = 5
+    INGEST_JOB_LOCK_SECONDS: int = 900  # 진행 보고가 없으면 다른 워커가 재점유
+
+    # 문서 파싱 프로세스 풀 설정 (pypdf/python-docx/BeautifulSoup을 이벤트 루프 밖에서 실행)
+    PARSE_POOL_ENABLED: bool = True  # False면 스레드에서 파싱
+    PARSE_POOL_WORKERS: int = 0  # 0이면 min(4, CPU 수)
+    PARSE_PDF_PAGES_PER_TASK: int = 16  # PDF 병렬 추출 단위 (페이지 구간 크기)
+
     # 검색 설정
     DEFAULT_TOP_K: int = 5
-    
+    CONTEXT_MAX_TOKENS: int = 2000  # 답변 프롬프트에 넣을 검색 컨텍스트 토큰 예산
+
+    # ANN 인덱스 설정 (폴더별 인메모리 근사 최근접 이웃 인덱스)
+    ANN_INDEX_ENABLED: bool = True
+    ANN_INDEX_BACKEND: str = "ivf"  # ivf (NumPy), hnsw (hnswlib 설치 시)
+    ANN_INDEX_MIN_TRAIN_SIZE: int = 1000  # 이보다 작은 파티션은 전체 비교
+    ANN_IVF_NPROBE: int = 8
+    ANN_INDEX_REFRESH_SECONDS: int = 600  # 다른 워커의 변경 반영 주기
+
+    # 어휘 인덱스 설정 (폴더별 인메모리 BM25 역색인, 벡터 결과와 RRF 결합)
+    LEXICAL_INDEX_ENABLED: bool = True
+    LEXICAL_INDEX_REFRESH_SECONDS: int = 600  # 다른 워커의 변경 반영 주기
+    LEXICAL_BM25_K1: float = 1.2
+    LEXICAL_BM25_B: float = 0.75
+    HYBRID_RRF_K: int = 60  # Reciprocal Rank Fusion 순위 완화 상수
+
+    # 파일 검색 인덱스 설정 (/upload/search용 파일명/본문 2-gram 역색인, file_search_grams 컬렉션)
+    FILE_SEARCH_INDEX_ENABLED: bool = True  # False면 정규식 스캔
+    FILE_SEARCH_MAX_OFFSETS: int = 32  # gram별 저장할 출현 위치 수 상한 (구문 확인/스니펫용)
+    FILE_SEARCH_SNIPPET_CHARS: int = 50  # 스니펫에 포함할 매치 앞뒤 문자 수
+
+    # 의미 기반 답변 캐시 설정 (폴더별 질의 임베딩 유사도 매칭, 폴더 content_version 변경 시 무효화)
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_SIMILARITY_THRESHOLD: float = 0.95  # 이 이상 유사한 질의에 저장된 답변 재사용
+    ANSWER_CACHE_MAX_ENTRIES: int = 1000  # 3072차원 float32 기준 약 12MB
+    ANSWER_CACHE_TTL_SECONDS: int = 3600  # 폴더 버전으로 감지되지 않는 변경(일반 지식 답변 등)의 상한
+    ANSWER_CACHE_MIN_STANDALONE_CHARS: int = 8  # 대화 기록이 있을 때 이보다 짧은 질문은 후속 질문으로 보고 캐시 생략
+
+    # OpenAI 클라이언트 설정 (프로세스 전역 공유 연결 풀, 용도별 요청 타임아웃)
+    OPENAI_MAX_CONNECTIONS: int = 100
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    OPENAI_KEEPALIVE_EXPIRY_SECONDS: float = 60.0  # 유휴 연결 유지 시간
+    OPENAI_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    OPENAI_CHAT_TIMEOUT_SECONDS: float = 60.0  # 스트리밍은 조각 사이 대기 시간 기준
+    OPENAI_EMBEDDING_TIMEOUT_SECONDS: float = 30.0
+    OPENAI_REPORT_TIMEOUT_SECONDS: float = 180.0  # 보고서 생성 (긴 출력)
+
+    # 임베딩 저장 형식: array (BSON 배열, Atlas Vector Search 호환), float32, float16, int8
+    EMBEDDING_STORAGE_FORMAT: str = "array"
+
+    # 임베딩 배치 스케줄러 설정
+    EMBEDDING_MAX_BATCH_TOKENS: int = 20000  # 배치당 추정 토큰 상한
+    EMBEDDING_MAX_BATCH_ITEMS: int = 256
+    EMBEDDING_CONCURRENCY: int = 4
+    EMBEDDING_TPM_LIMIT: int = 1000000  # 분당 토큰 한도 (0이면 제한 없음)
+    EMBEDDING_MAX_RETRIES: int = 5
+
+    # 임베딩 캐시 설정 ((모델, sha256) 키, 메모리 LRU + MongoDB embedding_cache)
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_MEMORY_SIZE: int = 2048  # 3072차원 float32 기준 약 25MB
+    EMBEDDING_CACHE_PERSISTENT: bool = True
+    QUERY_EMBEDDING_CACHE_SIZE: int = 1024
+    QUERY_EMBEDDING_CACHE_TTL: int = 3600  # 초
+
+    # 2단계 조회: 1단계에서 _id/임베딩만 스캔, 2단계에서 상위 k개 본문만 조회
+    VECTOR_SEARCH_TWO_PHASE: bool = True
+
+    # 검색 결과 문서 메타데이터 캐시 설정
+    DOCUMENT_METADATA_CACHE_SIZE: int = 2048
+    DOCUMENT_METADATA_CACHE_TTL: int = 300  # 초
+
+    # 대화 세션 캐시 설정 (chat_sessions 첫 접근 시 로드, LRU + 유휴 만료, 비동기 저장)
+    MEMORY_SESSION_CACHE_SIZE: int = 1000  # 메모리에 유지할 세션 수 상한
+    MEMORY_SESSION_CACHE_MAX_CHARS: int = 20000000  # 캐시된 메시지 본문 총 문자 수 상한
+    MEMORY_SESSION_IDLE_SECONDS: int = 1800  # 이 시간 동안 접근 없으면 캐시에서 제거
+    MEMORY_SESSION_HISTORY_MESSAGES: int = 20  # 세션당 메모리에 유지/로드할 최근 메시지 수
+    MEMORY_FLUSH_RETRY_BASE_SECONDS: float = 1.0  # 세션 저장 실패 시 재시도 대기 (지수 백오프 시작값)
+    MEMORY_FLUSH_RETRY_MAX_SECONDS: float = 60.0  # 재시도 대기 상한
+    MEMORY_SESSION_MAX_PIN_SECONDS: int = 600  # 저장 실패가 이 시간 넘게 이어진 세션은 상한 초과 시 미저장 메시지와 함께 제거
+
+    # 대화 메시지 버킷 설정 (chat_message_buckets 컬렉션, 세션당 고정 크기 버킷)
+    MEMORY_MESSAGE_BUCKET_SIZE: int = 50  # 버킷당 메시지 수
+    MEMORY_BUCKET_COMPACT_ENABLED: bool = True  # 내장 메시지 이전 + 오래된 버킷 압축 백그라운드 작업
+    MEMORY_BUCKET_COMPACT_AFTER_SECONDS: int = 86400  # 마지막 기록 후 이 시간이 지난 가득 찬 버킷을 압축
+    MEMORY_BUCKET_COMPACT_INTERVAL_SECONDS: int = 3600
+
+    # 대화 요약 메모리 설정 (오래된 대화를 백그라운드에서 누적 요약, 프롬프트 대화 기록 토큰 상한)
+    MEMORY_SUMMARY_ENABLED: bool = True
+    MEMORY_SUMMARY_TRIGGER_MESSAGES: int = 12  # 요약되지 않은 메시지가 이 수를 넘으면 요약 갱신
+    MEMORY_SUMMARY_KEEP_MESSAGES: int = 6  # 요약 갱신 후에도 원문으로 남길 최근 메시지 수
+    MEMORY_SUMMARY_MAX_TOKENS: int = 300  # 누적 요약 길이 상한
+    MEMORY_HISTORY_MAX_TOKENS: int = 1000  # 프롬프트에 넣을 대화 기록(요약 + 최근 메시지) 토큰 예산
+
     # 로깅 설정
     LOG_LEVEL: str = "INFO"
     
@@ -1,31 +1,100 @@
 """
 청킹 모듈
 문서를 적절한 크기로 분할
+ENHANCED: 내용 기반 경계 청킹 (국소 수정 시 나머지 청크 경계 유지 → 증분 재처리)
+ENHANCED: 토큰 기준 청킹 (한국어 문장 종결/문단 경계 인식, 단일 선형 패스)
 """
-from typing import List, Dict
+import re
+import zlib
+from bisect import bisect_right
+from collections import deque
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from config.settings import settings
 from utils.logger import get_logger
+from utils.tokenizer import count_tokens
 
 logger = get_logger(__name__)
 
+CHUNK_STRATEGY_RECURSIVE = "recursive"
+CHUNK_STRATEGY_CONTENT_DEFINED = "content_defined"
+CHUNK_STRATEGY_TOKEN = "token"
+
+# 내용 기반 청킹: 줄바꿈/문장 끝을 경계 후보로 사용
+_BOUNDARY_RE = re.compile(r"\n+|(?<=[.!?。？！])\s+")
+_BOUNDARY_HASH_WINDOW = 32  # 경계 판정에 쓰는 직전 문자 수 (청크 시작 위치와 무관해야 재동기화됨)
+_BOUNDARY_DIVISOR_STRICT = 8  # 목표 길이 전: 후보 8개 중 1개꼴로 경계
+_BOUNDARY_DIVISOR_LOOSE = 2  # 목표 길이 후: 후보 2개 중 1개꼴로 경계
+
+# 문장 경계: 문단 구분(빈 줄), 문장부호 + 공백, 공백 없이 이어지는 한국어 문장 (예: "했다.그리고")
+_SENTENCE_END_RE = re.compile(
+    r"\n[ \t]*\n\s*"
+    r"|[.!?。？！…]+[\"'”’)\]]*\s+"
+    r"|(?<=[가-힣])[.!?]+(?=[가-힣])"
+)
+_PARAGRAPH_FILL_RATIO = 0.75  # 문단 끝에서 이 비율 이상 찼으면 청크 종료
+
+class PageLocator:
+    """청크 텍스트의 페이지 번호 계산 (청크를 순서대로 조회한다고 가정)"""
+    
+    def __init__(self, text: str, page_spans: List[Dict]):
+        self.text = text
+        self.page_spans = page_spans
+        self._starts = [span["start"] for span in page_spans]
+        self._cursor = 0
+    
+    def _page_at(self, offset: int) -> int:
+        index = max(0, bisect_right(self._starts, offset) - 1)
+        return self.page_spans[index]["page"]
+    
+    def locate(self, chunk_text: str) -> Optional[Tuple[int, int]]:
+        """(시작 페이지, 끝 페이지) 반환 (원문에서 찾지 못하면 None)"""
+        if not self.page_spans or not chunk_text:
+            return None
+        position = self.text.find(chunk_text, self._cursor)
+        if position < 0:
+            # 순서가 어긋난 경우 전체에서 재탐색
+            position = self.text.find(chunk_text)
+            if position < 0:
+                return None
+        # 청크는 겹칠 수 있으므로 다음 탐색은 시작 위치 바로 뒤부터
+        self._cursor = position + 1
+        return self._page_at(position), self._page_at(position + len(chunk_text) - 1)
+
 class TextChunker:
     """텍스트 청킹 클래스"""
     
-    def __init__(self, chunk_size: int = None, chunk_overlap: int = None):
+    def __init__(
+        self,
+        chunk_size: int = None,
+        chunk_overlap: int = None,
+        strategy: str = None,
+        max_tokens: int = None,
+        overlap_tokens: int = None
+    ):
         self.chunk_size = chunk_size or settings.CHUNK_SIZE
         self.chunk_overlap = chunk_overlap or settings.CHUNK_OVERLAP
+        self.strategy = strategy or settings.CHUNK_STRATEGY
+        self.max_tokens = max_tokens or settings.CHUNK_MAX_TOKENS
+        self.overlap_tokens = settings.CHUNK_OVERLAP_TOKENS if overlap_tokens is None else overlap_tokens
         
         # LangChain 텍스트 분할기 초기화
         self.splitter = RecursiveCharacterTextSplitter(
             chunk_size=self.chunk_size,
             chunk_overlap=self.chunk_overlap,
-            separators=["\\n\\n", "\\n", ".", "!", "?", " ", ""],
+            separators=["\n\n", "\n", ".", "!", "?", " ", ""],
             length_function=len
         )
     
     def chunk_text(self, text: str, metadata: Dict = None) -> List[Dict]:
         """텍스트를 청크로 분할"""
+        if self.strategy in (CHUNK_STRATEGY_CONTENT_DEFINED, CHUNK_STRATEGY_TOKEN):
+            chunk_docs = list(self.iter_chunks(text, metadata))
+            for chunk_doc in chunk_docs:
+                chunk_doc["metadata"]["total_chunks"] = len(chunk_docs)
+            logger.info(f"청킹 완료: {len(chunk_docs)}개 청크 생성 ({self.strategy})")
+            return chunk_docs
+        
         # 텍스트 분할
         chunks = self.splitter.split_text(text)
         
@@ -52,20 +121,226 @@ class TextChunker:
         logger.info(f"청킹 완료: {len(chunks)}개 청크 생성")
         return chunk_docs
     
+    def iter_chunks(self, text: str, metadata: Dict = None, window_size: int = None) -> Iterator[Dict]:
+        """텍스트를 구간 단위로 나누어 청크를 점진적으로 생성 (스트리밍 적재용)"""
+        if self.strategy == CHUNK_STRATEGY_CONTENT_DEFINED:
+            yield from self.iter_content_defined_chunks(text, metadata)
+            return
+        if self.strategy == CHUNK_STRATEGY_TOKEN:
+            yield from self.iter_token_chunks(text, metadata)
+            return
+        
+        window_size = max(window_size or self.chunk_size * 20, self.chunk_size * 2)
+        sequence = 0
+        start = 0
+        
+        while start < len(text):
+            end = min(len(text), start + window_size)
+            if end < len(text):
+                # 구간 경계는 가능한 한 문단/줄 경계에 맞춤
+                boundary = max(text.rfind("\n\n", start, end), text.rfind("\n", start, end))
+                if boundary > start + window_size // 2:
+                    end = boundary + 1
+            
+            for chunk in self.splitter.split_text(text[start:end]):
+                chunk_doc = {
+                    "text": chunk,
+                    "sequence": sequence,
+                    "metadata": {
+                        "chunk_method": "recursive",
+                        "chunk_size": self.chunk_size,
+                        "chunk_overlap": self.chunk_overlap
+                    }
+                }
+                if metadata:
+                    chunk_doc["metadata"].update(metadata)
+                sequence += 1
+                yield chunk_doc
+            
+            if end >= len(text):
+                break
+            # 다음 구간은 겹침 길이만큼 앞에서 시작
+            start = max(end - self.chunk_overlap, start + 1)
+    
+    def iter_content_defined_chunks(self, text: str, metadata: Dict = None) -> Iterator[Dict]:
+        """내용 기반 경계로 청크 생성 (겹침 없음, 청크 문자열은 원문의 부분 문자열)"""
+        sequence = 0
+        for start, end in self._content_defined_spans(text):
+            chunk_doc = {
+                "text": text[start:end],
+                "sequence": sequence,
+                "metadata": {
+                    "chunk_method": CHUNK_STRATEGY_CONTENT_DEFINED,
+                    "chunk_size": self.chunk_size,
+                    "chunk_overlap": 0
+                }
+            }
+            if metadata:
+                chunk_doc["metadata"].update(metadata)
+            sequence += 1
+            yield chunk_doc
+    
+    def _content_defined_spans(self, text: str) -> Iterator[Tuple[int, int]]:
+        """청크 (시작, 끝) 오프셋 생성
+        
+        경계 후보(줄바꿈/문장 끝) 직전 문자열의 해시로 경계를 정하므로,
+        수정 지점 이후 첫 공통 경계부터는 기존과 동일한 청크가 다시 만들어짐
+        """
+        min_size = max(1, self.chunk_size // 4)
+        max_size = self.chunk_size * 2
+        start = 0
+        fallback = None  # 최소 길이를 넘긴 마지막 후보 (최대 길이 초과 시 사용)
+        
+        for match in _BOUNDARY_RE.finditer(text):
+            while match.start() - start > max_size:
+                cut, next_start = fallback or self._forced_cut(text, start, start + max_size)
+                yield from self._trimmed_span(text, start, cut)
+                start, fallback = next_start, None
+            
+            length = match.start() - start
+            if length < min_size:
+                continue
+            divisor = _BOUNDARY_DIVISOR_STRICT if length < self.chunk_size else _BOUNDARY_DIVISOR_LOOSE
+            window = text[max(0, match.start() - _BOUNDARY_HASH_WINDOW):match.start()]
+            if zlib.crc32(window.encode("utf-8")) % divisor == 0:
+                yield from self._trimmed_span(text, start, match.start())
+                start, fallback = match.end(), None
+            else:
+                fallback = (match.start(), match.end())
+        
+        while len(text) - start > max_size:
+            cut, next_start = fallback or self._forced_cut(text, start, start + max_size)
+            yield from self._trimmed_span(text, start, cut)
+            start, fallback = next_start, None
+        yield from self._trimmed_span(text, start, len(text))
+    
+    def _forced_cut(self, text: str, start: int, limit: int) -> Tuple[int, int]:
+        """경계 후보 없이 최대 길이를 넘는 구간은 마지막 공백(없으면 최대 길이)에서 분할"""
+        position = text.rfind(" ", start + self.chunk_size // 4, limit)
+        if position <= start:
+            return limit, limit
+        return position, position + 1
+    
+    @staticmethod
+    def _trimmed_span(text: str, start: int, end: int) -> Iterator[Tuple[int, int]]:
+        """앞뒤 공백을 제외한 구간 (빈 구간 제외)"""
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if start < end:
+            yield start, end
+    
+    def iter_token_chunks(self, text: str, metadata: Dict = None) -> Iterator[Dict]:
+        """문장 단위를 토큰 한도까지 채워 청크 생성 (문단 경계 우선, 문장 단위 겹침)"""
+        units: Deque[Tuple[int, int, int]] = deque()  # (시작, 끝, 토큰 수)
+        unit_tokens = 0
+        fresh_units = 0  # 겹침으로 이어받지 않은 새 문장 수
+        sequence = 0
+        
+        def emit() -> Iterator[Dict]:
+            nonlocal sequence
+            for start, end in self._trimmed_span(text, units[0][0], units[-1][1]):
+                yield self._token_chunk_doc(text[start:end], unit_tokens, sequence, metadata)
+                sequence += 1
+        
+        def carry_overlap():
+            """직전 청크 끝 문장을 겹침 토큰 한도 내에서 유지"""
+            nonlocal unit_tokens, fresh_units
+            while units and unit_tokens > self.overlap_tokens:
+                unit_tokens -= units.popleft()[2]
+            fresh_units = 0
+        
+        for start, end, paragraph_end in self._sentence_units(text):
+            tokens = count_tokens(text[start:end])
+            
+            if tokens > self.max_tokens:
+                # 한 문장이 한도를 넘으면 이전 청크를 닫고 문장을 잘라서 청크화
+                if fresh_units:
+                    yield from emit()
+                for piece_start, piece_end in self._split_long_unit(text, start, end, tokens):
+                    for s_start, s_end in self._trimmed_span(text, piece_start, piece_end):
+                        piece = text[s_start:s_end]
+                        yield self._token_chunk_doc(piece, count_tokens(piece), sequence, metadata)
+                        sequence += 1
+                units.clear()
+                unit_tokens = fresh_units = 0
+                continue
+            
+            if fresh_units and unit_tokens + tokens > self.max_tokens:
+                yield from emit()
+                carry_overlap()
+                while units and unit_tokens + tokens > self.max_tokens:
+                    unit_tokens -= units.popleft()[2]
+            
+            units.append((start, end, tokens))
+            unit_tokens += tokens
+            fresh_units += 1
+            
+            if paragraph_end and unit_tokens >= self.max_tokens * _PARAGRAPH_FILL_RATIO:
+                # 문단이 끝났고 충분히 찼으면 문단 경계에서 종료 (문단을 넘는 겹침은 두지 않음)
+                yield from emit()
+                units.clear()
+                unit_tokens = fresh_units = 0
+        
+        if fresh_units:
+            yield from emit()
+    
+    def _token_chunk_doc(self, chunk_text: str, token_count: int, sequence: int, metadata: Optional[Dict]) -> Dict:
+        chunk_doc = {
+            "text": chunk_text,
+            "sequence": sequence,
+            "metadata": {
+                "chunk_method": CHUNK_STRATEGY_TOKEN,
+                "chunk_size": self.max_tokens,
+                "chunk_overlap": self.overlap_tokens,
+                "token_count": token_count
+            }
+        }
+        if metadata:
+            chunk_doc["metadata"].update(metadata)
+        return chunk_doc
+    
+    @staticmethod
+    def _sentence_units(text: str) -> Iterator[Tuple[int, int, bool]]:
+        """문장 단위 (시작, 끝, 문단 끝 여부) 생성 (끝은 뒤따르는 공백 포함)"""
+        start = 0
+        for match in _SENTENCE_END_RE.finditer(text):
+            if match.end() <= start:
+                continue
+            yield start, match.end(), match.group().count("\n") >= 2
+            start = match.end()
+        if start < len(text):
+            yield start, len(text), True
+    
+    def _split_long_unit(self, text: str, start: int, end: int, tokens: int) -> Iterator[Tuple[int, int]]:
+        """토큰 한도를 넘는 문장을 공백 기준으로 분할 (문자당 토큰 비율로 길이 추정)"""
+        piece_chars = max(1, int((end - start) * self.max_tokens / tokens * 0.9))
+        position = start
+        while position < end:
+            limit = min(end, position + piece_chars)
+            cut = limit
+            if limit < end:
+                space = max(text.rfind(" ", position + piece_chars // 2, limit), text.rfind("\n", position + piece_chars // 2, limit))
+                if space > position:
+                    cut = space + 1
+            yield position, cut
+            position = cut
+    
     def chunk_by_sentences(self, text: str, sentences_per_chunk: int = 5) -> List[Dict]:
-        """문장 단위로 청킹"""
-        # 간단한 문장 분리 (실제로는 더 정교한 방법 필요)
-        sentences = text.split('. ')
+        """문장 단위로 청킹 (한국어 문장 종결 인식)"""
+        sentences = [
+            text[start:end].strip()
+            for start, end, _ in self._sentence_units(text)
+            if text[start:end].strip()
+        ]
         
         chunks = []
         for i in range(0, len(sentences), sentences_per_chunk):
             chunk_sentences = sentences[i:i+sentences_per_chunk]
-            chunk_text = '. '.join(chunk_sentences)
-            if not chunk_text.endswith('.'):
-                chunk_text += '.'
             
             chunks.append({
-                "text": chunk_text,
+                "text": " ".join(chunk_sentences),
                 "sequence": i // sentences_per_chunk,
                 "metadata": {
                     "chunk_method": "sentences",
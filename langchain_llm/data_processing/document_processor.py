@@ -3,19 +3,31 @@
 텍스트 추출 → 청킹 → 벡터화 → DB 저장
 MODIFIED 2024-12-19: 새로운 통합 문서 처리 파이프라인 구현
 ENHANCED 2024-12-20: 새로운 데이터베이스 구조 및 자동 라벨링 통합
+ENHANCED: 스트리밍 적재 파이프라인 (청킹/임베딩/저장 배치 중첩, 자동 라벨링 병행)
+ENHANCED: 프로세스 풀 파싱 및 청크별 페이지 번호 기록
+ENHANCED: 콘텐츠 해시 기반 재사용 (동일 내용 문서의 청크/임베딩/라벨 복제)
+ENHANCED: 텍스트 수정 시 청크 해시 비교로 변경된 청크만 재임베딩 (증분 재처리)
 """
-from typing import Dict, List
+import asyncio
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from datetime import datetime
 from bson import ObjectId
+from pymongo import DeleteOne, InsertOne, UpdateOne
 
 from .loader import DocumentLoader
-from .chunker import TextChunker
+from .chunker import PageLocator, TextChunker
 from .embedder import TextEmbedder
+from .embedding_cache import content_hash
+from .embedding_codec import encode_embedding
+from .ingestion_pipeline import IngestionPipeline, ProgressCallback
 from .preprocessor import TextPreprocessor
+from config.settings import settings
 from database.operations import DatabaseOperations
 from ai_processing.auto_labeler import AutoLabeler
+from retrieval.file_search_index import FIELD_CONTENT, remove_file_search_index, sync_file_search_index
+from retrieval.index_sync import on_chunks_inserted, on_file_chunks_deleted, on_file_chunks_replaced
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -28,11 +40,18 @@ class DocumentProcessor:
         self.db_ops = DatabaseOperations(db)
         self.loader = DocumentLoader()
         self.chunker = TextChunker()
-        self.embedder = TextEmbedder()
+        self.embedder = TextEmbedder(feature="ingestion")
         self.preprocessor = TextPreprocessor()
         self.auto_labeler = AutoLabeler()
+        self.pipeline = IngestionPipeline(db, self.chunker, self.embedder)
     
-    async def process_and_store(self, file_path: Path, file_metadata: Dict, preserve_formatting: bool = True) -> Dict:
+    async def process_and_store(
+        self,
+        file_path: Path,
+        file_metadata: Dict,
+        preserve_formatting: bool = True,
+        progress_callback: Optional[ProgressCallback] = None
+    ) -> Dict:
         """전체 문서 처리 및 저장 파이프라인"""
         try:
             logger.info(f"문서 처리 시작: {file_path} (포맷팅 보존: {preserve_formatting})")
@@ -40,11 +59,17 @@ class DocumentProcessor:
             # 1. 문서 로드 및 텍스트 추출
             document_data = await self.loader.load_document(file_path)
             raw_text = document_data["text"]
+            pages = document_data.get("pages")
+            page_spans = None
             
             logger.info(f"텍스트 추출 완료: {len(raw_text)} 문자")
             
-            # 2. 텍스트 전처리 (줄바꿈 보존 옵션)
-            if preserve_formatting:
+            # 2. 텍스트 전처리 (줄바꿈 보존 옵션, 페이지가 있으면 페이지별 처리 후 구간 기록)
+            if pages:
+                processed_text, page_spans = await self.preprocessor.preprocess_pages(
+                    pages, minimal=preserve_formatting
+                )
+            elif preserve_formatting:
                 processed_text = await self.preprocessor.preprocess_minimal(raw_text)  # 줄바꿈 최대 보존
             else:
                 processed_text = await self.preprocessor.preprocess(raw_text)  # 기본 전처리
@@ -53,87 +78,19 @@ class DocumentProcessor:
             folder_id = file_metadata.get("folder_id")
             validated_folder_id = await self._validate_and_get_folder_id(folder_id)
             
-            # 4. 자동 라벨링 실행
-            labels = await self.auto_labeler.analyze_document(
-                processed_text, 
-                file_metadata.get("original_filename", "")
-            )
-            
             # 메타데이터에 검증된 folder_id 업데이트
             file_metadata["folder_id"] = validated_folder_id
             
-            # 5. 텍스트 청킹
-            chunk_metadata = {
-                "file_id": file_metadata["file_id"],
-                "source": str(file_path),
-                "file_type": file_metadata["file_type"],
-                "folder_id": validated_folder_id  # 검증된 ObjectId 사용
-            }
-            
-            chunks = self.chunker.chunk_text(processed_text, chunk_metadata)
-            logger.info(f"청킹 완료: {len(chunks)}개 청크")
-            
-            # 6. 청크 임베딩 생성
-            embedded_chunks = await self.embedder.embed_documents(chunks)
-            
-            # 7. documents 컬렉션에 저장 (파일당 하나의 레코드)
-            document_record = {
-                "folder_id": validated_folder_id,  # ObjectId 문자열
-                "raw_text": processed_text,  # 전체 처리된 텍스트
-                "created_at": datetime.utcnow(),
-                # 메타데이터 추가
-                "file_metadata": {
-                    "file_id": file_metadata["file_id"],
-                    "original_filename": file_metadata["original_filename"],
-                    "file_type": file_metadata["file_type"],
-                    "file_size": file_metadata["file_size"],
-                    "description": file_metadata.get("description")
-                },
-                # 청크 통계 정보
-                "chunks_count": len(embedded_chunks),
-                "text_length": len(processed_text)
-            }
-            
-            # documents 컬렉션에 단일 문서 저장
-            document_id = await self.db_ops.insert_one("documents", document_record)
-            logger.info(f"documents 컬렉션에 파일 단위 문서 저장 완료: {document_id}")
-            
-            # 8. chunks 컬렉션에 청크별 저장 (기존 호환성 유지)
-            chunk_records = []
-            for i, chunk in enumerate(embedded_chunks):
-                chunk_record = {
-                    "file_id": file_metadata["file_id"],
-                    "chunk_id": f"{file_metadata['file_id']}_chunk_{i}",
-                    "sequence": i,
-                    "text": chunk["text"],
-                    "text_embedding": chunk["text_embedding"],
-                    "folder_id": validated_folder_id,  # 추가: 폴더 필터링용
-                    "metadata": {
-                        "source": file_metadata["original_filename"],
-                        "file_type": file_metadata["file_type"],
-                        "folder_id": validated_folder_id,  # ObjectId 문자열
-                        "chunk_method": "sliding_window",
-                        "chunk_size": chunk.get("metadata", {}).get("chunk_size", self.chunker.chunk_size),
-                        "chunk_overlap": chunk.get("metadata", {}).get("chunk_overlap", self.chunker.chunk_overlap)
-                    }
-                }
-                chunk_records.append(chunk_record)
-            
-            # chunks 컬렉션에 배치 저장
-            chunk_ids = await self.db_ops.insert_many("chunks", chunk_records)
-            logger.info(f"chunks 컬렉션에 {len(chunk_ids)}개 청크 저장 완료")
-            
-            # 9. 자동 라벨링 결과 저장
-            if labels:
-                try:
-                    label_id = await self.db_ops.save_document_labels(
-                        document_id=file_metadata["file_id"],
-                        folder_id=validated_folder_id,
-                        labels=labels
-                    )
-                    logger.info(f"자동 라벨링 저장 완료: {label_id}")
-                except Exception as e:
-                    logger.warning(f"자동 라벨링 저장 실패: {e}")
+            # 4~9. 자동 라벨링 + 청킹/임베딩/저장
+            stored = await self._ingest(
+                processed_text,
+                file_metadata,
+                validated_folder_id,
+                source=str(file_path),
+                progress_callback=progress_callback,
+                page_spans=page_spans
+            )
+            labels = stored["labels"]
             
             # 10. 폴더 접근 시간 업데이트
             if validated_folder_id:
@@ -146,9 +103,9 @@ class DocumentProcessor:
                 "original_filename": file_metadata["original_filename"],
                 "text_length": len(raw_text),
                 "processed_text_length": len(processed_text),
-                "chunks_count": len(embedded_chunks),
-                "document_id": document_id,
-                "chunk_ids": chunk_ids,
+                "chunks_count": stored["chunks_count"],
+                "document_id": stored["document_id"],
+                "chunk_ids": stored["chunk_ids"],
                 "labels": labels,
                 "processing_time": datetime.utcnow()
             }
@@ -179,8 +136,10 @@ class DocumentProcessor:
                 raise ValueError(f"파일 정보를 찾을 수 없습니다: {file_id}")
             
             # 기존 데이터 삭제
-            await self.db.documents.delete_many({"file_metadata.file_id": file_id})
+            await self.db_ops.delete_documents_with_stats({"file_metadata.file_id": file_id})
             await self.db.chunks.delete_many({"file_id": file_id})
+            on_file_chunks_deleted(file_id)
+            await remove_file_search_index(self.db, [file_id])
             await self.db.labels.delete_many({"document_id": str(file_info["_id"])})
             
             # 재처리를 위한 메타데이터 준비
@@ -225,98 +184,312 @@ class DocumentProcessor:
     async def _reprocess_with_new_structure(self, file_metadata: Dict, processed_text: str) -> Dict:
         """새로운 구조로 재처리"""
         try:
-            # 자동 라벨링
-            labels = await self.auto_labeler.analyze_document(
-                processed_text, 
-                file_metadata.get("original_filename", "")
-            )
-            
             # 폴더 ID 검증
             folder_id = file_metadata.get("folder_id")
             validated_folder_id = await self._validate_and_get_folder_id(folder_id)
             file_metadata["folder_id"] = validated_folder_id
             
-            # 청킹
-            chunk_metadata = {
-                "file_id": file_metadata["file_id"],
-                "source": "reprocessed",
-                "file_type": file_metadata["file_type"],
+            # 자동 라벨링 + 청킹/임베딩/저장
+            stored = await self._ingest(
+                processed_text,
+                file_metadata,
+                validated_folder_id,
+                source="reprocessed"
+            )
+            
+            return {
+                "chunks_count": stored["chunks_count"],
+                "labels": stored["labels"],
+                "document_id": stored["document_id"],
+                "text_length": len(processed_text),
                 "folder_id": validated_folder_id
             }
             
-            chunks = self.chunker.chunk_text(processed_text, chunk_metadata)
-            embedded_chunks = await self.embedder.embed_documents(chunks)
-            
-            # 7. documents 컬렉션에 저장 (파일당 하나의 레코드)
+        except Exception as e:
+            logger.error(f"새로운 구조 재처리 실패: {e}")
+            raise
+    
+    async def _ingest(
+        self,
+        processed_text: str,
+        file_metadata: Dict,
+        validated_folder_id: str,
+        source: str,
+        progress_callback: Optional[ProgressCallback] = None,
+        page_spans: Optional[List[Dict]] = None
+    ) -> Dict:
+        """documents 저장 후 청크 적재 (자동 라벨링은 적재와 병행)"""
+        file_id = file_metadata["file_id"]
+        
+        # 자동 라벨링 (LLM 호출)을 청킹/임베딩과 동시에 실행
+        labels_task = asyncio.create_task(self.auto_labeler.analyze_document(
+            processed_text,
+            file_metadata.get("original_filename", "")
+        ))
+        
+        try:
+            # documents 컬렉션에 저장 (파일당 하나의 레코드, 청크 수는 적재 후 갱신)
             document_record = {
                 "folder_id": validated_folder_id,  # ObjectId 문자열
                 "raw_text": processed_text,  # 전체 처리된 텍스트
                 "created_at": datetime.utcnow(),
                 # 메타데이터 추가
                 "file_metadata": {
-                    "file_id": file_metadata["file_id"],
+                    "file_id": file_id,
                     "original_filename": file_metadata["original_filename"],
                     "file_type": file_metadata["file_type"],
                     "file_size": file_metadata["file_size"],
                     "description": file_metadata.get("description")
                 },
                 # 청크 통계 정보
-                "chunks_count": len(embedded_chunks),
+                "chunks_count": 0,
                 "text_length": len(processed_text)
             }
-            
-            # documents 컬렉션에 단일 문서 저장
             document_id = await self.db_ops.insert_one("documents", document_record)
             logger.info(f"documents 컬렉션에 파일 단위 문서 저장 완료: {document_id}")
             
-            # 8. chunks 컬렉션에 청크별 저장 (기존 호환성 유지)
-            chunk_records = []
-            for i, chunk in enumerate(embedded_chunks):
-                chunk_record = {
-                    "file_id": file_metadata["file_id"],
-                    "chunk_id": f"{file_metadata['file_id']}_chunk_{i}",
-                    "sequence": i,
-                    "text": chunk["text"],
-                    "text_embedding": chunk["text_embedding"],
-                    "folder_id": validated_folder_id,  # 추가: 폴더 필터링용
-                    "metadata": {
-                        "source": file_metadata["original_filename"],
-                        "file_type": file_metadata["file_type"],
-                        "folder_id": validated_folder_id,  # ObjectId 문자열
-                        "chunk_method": "sliding_window",
-                        "chunk_size": chunk.get("metadata", {}).get("chunk_size", self.chunker.chunk_size),
-                        "chunk_overlap": chunk.get("metadata", {}).get("chunk_overlap", self.chunker.chunk_overlap)
-                    }
-                }
-                chunk_records.append(chunk_record)
+            # chunks 컬렉션에 청크별 저장 (기존 호환성 유지)
+            chunk_metadata = {
+                "file_id": file_id,
+                "source": source,
+                "file_type": file_metadata["file_type"],
+                "folder_id": validated_folder_id  # 검증된 ObjectId 사용
+            }
             
-            # chunks 컬렉션에 배치 저장
-            chunk_ids = await self.db_ops.insert_many("chunks", chunk_records)
-            logger.info(f"chunks 컬렉션에 {len(chunk_ids)}개 청크 저장 완료")
+            # 청크는 순서대로 레코드화되므로 원문 위치를 이어서 탐색하며 페이지 계산
+            page_locator = PageLocator(processed_text, page_spans) if page_spans else None
             
-            # 9. 자동 라벨링 결과 저장
-            if labels:
-                try:
-                    label_id = await self.db_ops.save_document_labels(
-                        document_id=file_metadata["file_id"],
-                        folder_id=validated_folder_id,
-                        labels=labels
-                    )
-                    logger.info(f"자동 라벨링 저장 완료: {label_id}")
-                except Exception as e:
-                    logger.warning(f"자동 라벨링 저장 실패: {e}")
+            def build_record(chunk: Dict, sequence: int) -> Dict:
+                pages = page_locator.locate(chunk["text"]) if page_locator else None
+                return self._build_chunk_record(file_metadata, validated_folder_id, chunk, sequence, pages)
             
-            return {
-                "chunks_count": len(chunks),
-                "labels": labels,
-                "document_id": document_id,
-                "text_length": len(processed_text),
-                "folder_id": validated_folder_id
+            if settings.INGEST_STREAMING_ENABLED:
+                stored = await self.pipeline.run(processed_text, chunk_metadata, build_record, progress_callback)
+            else:
+                stored = await self._store_all_chunks(processed_text, chunk_metadata, build_record)
+            logger.info(f"chunks 컬렉션에 {stored['chunks_count']}개 청크 저장 완료")
+            
+            # 적재 완료 표시 (content_hash는 완료된 문서에만 기록되어 재사용 대상이 됨)
+            completion = {"chunks_count": stored["chunks_count"]}
+            if file_metadata.get("content_hash"):
+                completion["content_hash"] = file_metadata["content_hash"]
+                completion["preserve_formatting"] = file_metadata.get("preserve_formatting", True)
+            await self.db.documents.update_one(
+                {"file_metadata.file_id": file_id},
+                {"$set": completion}
+            )
+            await self.db_ops.mark_document_counted(
+                file_id, validated_folder_id, stored["chunks_count"], file_metadata["file_size"]
+            )
+            await sync_file_search_index(self.db, file_id)
+            
+            labels = await labels_task
+        except (Exception, asyncio.CancelledError):
+            # 워커 종료로 취소된 경우에도 정리 (재시도 시 중복 문서/청크 방지)
+            labels_task.cancel()
+            await self.discard_partial_ingest(file_id)
+            raise
+        
+        # 자동 라벨링 결과 저장
+        if labels:
+            try:
+                label_id = await self.db_ops.save_document_labels(
+                    document_id=file_id,
+                    folder_id=validated_folder_id,
+                    labels=labels
+                )
+                logger.info(f"자동 라벨링 저장 완료: {label_id}")
+            except Exception as e:
+                logger.warning(f"자동 라벨링 저장 실패: {e}")
+        
+        return {
+            "document_id": document_id,
+            "chunks_count": stored["chunks_count"],
+            "chunk_ids": stored["chunk_ids"],
+            "labels": labels
+        }
+    
+    async def find_reusable_document(
+        self,
+        content_hash: str,
+        preserve_formatting: bool,
+        folder_id: Optional[str] = None
+    ) -> Optional[Dict]:
+        """동일 내용으로 적재 완료된 문서 조회 (대상 폴더의 문서 우선)"""
+        query = {"content_hash": content_hash, "preserve_formatting": preserve_formatting}
+        projection = {"raw_text": 0}
+        if folder_id:
+            document = await self.db.documents.find_one({**query, "folder_id": folder_id}, projection)
+            if document:
+                return document
+        return await self.db.documents.find_one(query, projection)
+    
+    async def clone_document(self, source_document: Dict, file_metadata: Dict) -> Optional[Dict]:
+        """기존 문서의 청크/임베딩/라벨을 새 파일로 복제 (LLM/임베딩 호출 없음, 원본이 사라졌으면 None)"""
+        source_file_id = source_document["file_metadata"]["file_id"]
+        file_id = file_metadata["file_id"]
+        
+        try:
+            validated_folder_id = await self._validate_and_get_folder_id(file_metadata.get("folder_id"))
+            file_metadata["folder_id"] = validated_folder_id
+            
+            source = await self.db.documents.find_one({"_id": source_document["_id"]})
+            if source is None or not await self.db.chunks.count_documents({"file_id": source_file_id}, limit=1):
+                logger.warning(f"복제 원본 문서가 없거나 청크가 없음 - 일반 적재로 전환: {source_file_id}")
+                return None
+            
+            document_record = {
+                "folder_id": validated_folder_id,
+                "raw_text": source.get("raw_text", ""),
+                "created_at": datetime.utcnow(),
+                "file_metadata": {
+                    "file_id": file_id,
+                    "original_filename": file_metadata["original_filename"],
+                    "file_type": file_metadata["file_type"],
+                    "file_size": file_metadata["file_size"],
+                    "description": file_metadata.get("description")
+                },
+                "chunks_count": 0,
+                "text_length": source.get("text_length", 0),
+                "cloned_from": source_file_id
             }
+            document_id = await self.db_ops.insert_one("documents", document_record)
             
-        except Exception as e:
-            logger.error(f"새로운 구조 재처리 실패: {e}")
+            chunks_count = 0
+            chunk_ids: List[str] = []
+            batch: List[Dict] = []
+            cursor = self.db.chunks.find({"file_id": source_file_id}, {"_id": 0}).sort("sequence", 1)
+            async for chunk in cursor:
+                batch.append(self._clone_chunk_record(chunk, file_metadata, validated_folder_id))
+                if len(batch) >= settings.INGEST_BATCH_CHUNKS:
+                    chunk_ids.extend(await self.db_ops.insert_many("chunks", batch))
+                    on_chunks_inserted(batch)
+                    chunks_count += len(batch)
+                    batch = []
+            if batch:
+                chunk_ids.extend(await self.db_ops.insert_many("chunks", batch))
+                on_chunks_inserted(batch)
+                chunks_count += len(batch)
+            
+            if chunks_count == 0:
+                # 복제 도중 원본이 삭제됨 - 빈 사본을 남기지 않음
+                logger.warning(f"복제 중 원본 청크가 사라짐 - 일반 적재로 전환: {source_file_id}")
+                await self.discard_partial_ingest(file_id)
+                return None
+            
+            await self.db.documents.update_one(
+                {"file_metadata.file_id": file_id},
+                {"$set": {
+                    "chunks_count": chunks_count,
+                    "content_hash": source_document["content_hash"],
+                    "preserve_formatting": source_document.get("preserve_formatting", True)
+                }}
+            )
+            await self.db_ops.mark_document_counted(
+                file_id, validated_folder_id, chunks_count, file_metadata["file_size"]
+            )
+            await sync_file_search_index(self.db, file_id)
+        except (Exception, asyncio.CancelledError) as e:
+            logger.error(f"문서 복제 실패 {source_file_id} -> {file_id}: {e!r}")
+            await self.discard_partial_ingest(file_id)
             raise
+        
+        # 자동 라벨링 결과 복제
+        labels = await self.db.labels.find_one({"document_id": source_file_id}, {"_id": 0})
+        if labels:
+            for field in ("document_id", "folder_id", "created_at"):
+                labels.pop(field, None)
+            try:
+                await self.db_ops.save_document_labels(
+                    document_id=file_id,
+                    folder_id=validated_folder_id,
+                    labels=labels
+                )
+            except Exception as e:
+                logger.warning(f"라벨 복제 실패: {e}")
+        
+        if validated_folder_id:
+            await self.db_ops.update_folder_access(validated_folder_id)
+        
+        logger.info(f"동일 내용 문서 재사용: {source_file_id} -> {file_id} ({chunks_count}개 청크 복제)")
+        return {
+            "success": True,
+            "file_id": file_id,
+            "folder_id": validated_folder_id,
+            "original_filename": file_metadata["original_filename"],
+            "chunks_count": chunks_count,
+            "document_id": document_id,
+            "chunk_ids": chunk_ids,
+            "labels": labels,
+            "cloned_from": source_file_id,
+            "processing_time": datetime.utcnow()
+        }
+    
+    @staticmethod
+    def _clone_chunk_record(chunk: Dict, file_metadata: Dict, folder_id: str) -> Dict:
+        """원본 청크 레코드를 새 파일/폴더 기준으로 변환 (임베딩은 그대로 복사)"""
+        file_id = file_metadata["file_id"]
+        metadata = dict(chunk.get("metadata", {}))
+        metadata.update({"source": file_metadata["original_filename"], "folder_id": folder_id})
+        return {
+            **chunk,
+            "file_id": file_id,
+            "chunk_id": f"{file_id}_chunk_{chunk['sequence']}",
+            "folder_id": folder_id,
+            "metadata": metadata,
+            "created_at": datetime.utcnow()
+        }
+    
+    async def _store_all_chunks(self, processed_text: str, chunk_metadata: Dict, build_record) -> Dict:
+        """일괄 적재 (스트리밍 비활성화 시: 전체 청킹 → 전체 임베딩 → 한 번에 저장)"""
+        chunks = self.chunker.chunk_text(processed_text, chunk_metadata)
+        embedded_chunks = await self.embedder.embed_documents(chunks)
+        
+        chunk_records = [build_record(chunk, i) for i, chunk in enumerate(embedded_chunks)]
+        chunk_ids = await self.db_ops.insert_many("chunks", chunk_records) if chunk_records else []
+        on_chunks_inserted(chunk_records)
+        return {"chunks_count": len(chunk_records), "chunk_ids": chunk_ids}
+    
+    def _build_chunk_record(
+        self,
+        file_metadata: Dict,
+        folder_id: str,
+        chunk: Dict,
+        sequence: int,
+        pages: Optional[Tuple[int, int]] = None
+    ) -> Dict:
+        """chunks 컬렉션 레코드 생성 (pages: 시작/끝 페이지 번호)"""
+        record = {
+            "file_id": file_metadata["file_id"],
+            "chunk_id": f"{file_metadata['file_id']}_chunk_{sequence}",
+            "sequence": sequence,
+            "text": chunk["text"],
+            "text_hash": content_hash(chunk["text"]),  # 증분 재처리 시 청크 비교용
+            "text_embedding": encode_embedding(chunk["text_embedding"]),
+            "folder_id": folder_id,  # 추가: 폴더 필터링용
+            "metadata": {
+                "source": file_metadata["original_filename"],
+                "file_type": file_metadata["file_type"],
+                "folder_id": folder_id,  # ObjectId 문자열
+                "chunk_method": chunk.get("metadata", {}).get("chunk_method", self.chunker.strategy),
+                "chunk_size": chunk.get("metadata", {}).get("chunk_size", self.chunker.chunk_size),
+                "chunk_overlap": chunk.get("metadata", {}).get("chunk_overlap", self.chunker.chunk_overlap)
+            },
+            "created_at": datetime.utcnow()
+        }
+        if pages:
+            record["metadata"]["page_start"], record["metadata"]["page_end"] = pages
+        return record
+    
+    async def discard_partial_ingest(self, file_id: str):
+        """적재 도중 실패 시 일부 저장된 문서/청크 정리 (재시도 전 이전 시도의 잔여 데이터 정리에도 사용)"""
+        try:
+            await self.db_ops.delete_documents_with_stats({"file_metadata.file_id": file_id})
+            await self.db.chunks.delete_many({"file_id": file_id})
+            on_file_chunks_deleted(file_id)
+            await remove_file_search_index(self.db, [file_id])
+        except Exception as e:
+            logger.error(f"부분 적재 데이터 정리 실패 {file_id}: {e}")
     
     async def get_document_stats(self, file_id: str) -> Dict:
         """문서 통계 조회"""
@@ -434,8 +607,10 @@ class DocumentProcessor:
             logger.info(f"문서 재처리 시작 (포맷팅 보존: {preserve_formatting}): {file_id}")
             
             # 기존 데이터 삭제
-            await self.db.documents.delete_many({"file_metadata.file_id": file_id})
+            await self.db_ops.delete_documents_with_stats({"file_metadata.file_id": file_id})
             await self.db.chunks.delete_many({"file_id": file_id})
+            on_file_chunks_deleted(file_id)
+            await remove_file_search_index(self.db, [file_id])
             await self.db.labels.delete_many({"document_id": file_id})
             
             # 재처리를 위한 메타데이터 준비
@@ -538,6 +713,7 @@ class DocumentProcessor:
         """
         저장된 raw_text에서 재처리 (원본 파일 없어도 됨)
         하지만 이미 전처리된 텍스트이므로 줄바꿈 복원에는 한계가 있음
+        변경된 청크만 재임베딩하며 기존 라벨은 유지
         """
         try:
             logger.info(f"raw_text 기반 재처리 시작: {file_id}")
@@ -551,27 +727,124 @@ class DocumentProcessor:
             if not raw_text:
                 raise ValueError(f"저장된 텍스트가 없습니다: {file_id}")
             
-            # 기존 데이터 삭제
-            await self.db.documents.delete_many({"file_metadata.file_id": file_id})
-            await self.db.chunks.delete_many({"file_id": file_id})
-            await self.db.labels.delete_many({"document_id": file_id})
-            
-            # 파일 메타데이터 가져오기
-            file_metadata = doc.get("file_metadata", {})
-            
-            # 텍스트 재전처리
-            if preserve_formatting:
-                # 최소 전처리로 줄바꿈 최대 보존 시도
-                processed_text = await self.preprocessor.preprocess_minimal(raw_text)
-            else:
-                processed_text = await self.preprocessor.preprocess(raw_text)
-            
-            # 재처리 및 저장
-            result = await self._reprocess_with_new_structure(file_metadata, processed_text)
+            result = await self._update_text_incrementally(doc, raw_text, preserve_formatting)
             
             logger.info(f"raw_text 기반 재처리 완료: {file_id}")
             return result
             
         except Exception as e:
             logger.error(f"raw_text 기반 재처리 실패: {e}")
-            raise 
\ No newline at end of file
+            raise
+    
+    async def update_raw_text(self, file_id: str, raw_text: str, preserve_formatting: bool = True) -> Dict:
+        """사용자가 수정한 텍스트 반영 (변경된 청크만 재임베딩)"""
+        try:
+            doc = await self.db_ops.find_one("documents", {"file_metadata.file_id": file_id})
+            if not doc:
+                raise ValueError(f"저장된 문서를 찾을 수 없습니다: {file_id}")
+            
+            return await self._update_text_incrementally(doc, raw_text, preserve_formatting)
+            
+        except Exception as e:
+            logger.error(f"텍스트 수정 반영 실패: {e}")
+            raise
+    
+    async def _update_text_incrementally(self, doc: Dict, raw_text: str, preserve_formatting: bool) -> Dict:
+        """새 텍스트를 청킹한 뒤 기존 청크와 해시로 비교하여 chunks 컬렉션을 한 번의 bulk_write로 갱신"""
+        file_metadata = doc.get("file_metadata", {})
+        file_id = file_metadata["file_id"]
+        folder_id = doc.get("folder_id")
+        
+        if preserve_formatting:
+            processed_text = await self.preprocessor.preprocess_minimal(raw_text)
+        else:
+            processed_text = await self.preprocessor.preprocess(raw_text)
+        
+        chunk_metadata = {
+            "file_id": file_id,
+            "source": "edited",
+            "file_type": file_metadata.get("file_type"),
+            "folder_id": folder_id
+        }
+        new_chunks = self.chunker.chunk_text(processed_text, chunk_metadata)
+        
+        # 기존 청크를 해시별로 분류 (해시가 없는 이전 청크는 본문으로 계산)
+        reusable: Dict[str, List[Dict]] = {}
+        cursor = self.db.chunks.find({"file_id": file_id}, {"_id": 1, "text": 1, "text_hash": 1, "sequence": 1})
+        async for old in cursor:
+            text_hash = old.get("text_hash") or content_hash(old.get("text", ""))
+            reusable.setdefault(text_hash, []).append({**old, "text_hash": text_hash})
+        for candidates in reusable.values():
+            candidates.sort(key=lambda old: old.get("sequence", 0))
+        
+        operations = []
+        changed: List[Tuple[int, Dict]] = []
+        reused_count = 0
+        for sequence, chunk in enumerate(new_chunks):
+            text_hash = content_hash(chunk["text"])
+            candidates = reusable.get(text_hash)
+            if not candidates:
+                changed.append((sequence, chunk))
+                continue
+            old = candidates.pop(0)
+            reused_count += 1
+            if old.get("sequence") != sequence or "text_hash" not in old:
+                operations.append(UpdateOne(
+                    {"_id": old["_id"]},
+                    {"$set": {
+                        "sequence": sequence,
+                        "chunk_id": f"{file_id}_chunk_{sequence}",
+                        "text_hash": text_hash
+                    }}
+                ))
+        
+        stale_ids = [old["_id"] for candidates in reusable.values() for old in candidates]
+        operations.extend(DeleteOne({"_id": chunk_id}) for chunk_id in stale_ids)
+        
+        # 새로 생기거나 바뀐 청크만 임베딩
+        inserted: List[Dict] = []
+        if changed:
+            await self.embedder.embed_documents([chunk for _, chunk in changed])
+            inserted = [
+                self._build_chunk_record(file_metadata, folder_id, chunk, sequence)
+                for sequence, chunk in changed
+            ]
+            operations.extend(InsertOne(record) for record in inserted)
+        
+        if operations:
+            # InsertOne은 레코드에 _id를 채우므로 인덱스 반영에 그대로 사용
+            await self.db.chunks.bulk_write(operations, ordered=False)
+        
+        if changed or stale_ids:
+            on_file_chunks_replaced(file_id, folder_id, stale_ids, inserted)
+        
+        document_update = {"$set": {
+            "raw_text": processed_text,
+            "text_length": len(processed_text),
+            "chunks_count": len(new_chunks),
+            "updated_at": datetime.utcnow()
+        }}
+        if processed_text != doc.get("raw_text"):
+            # 원본 업로드와 내용이 달라졌으므로 동일 내용 재사용 대상에서 제외
+            document_update["$unset"] = {"content_hash": ""}
+        await self.db.documents.update_one({"file_metadata.file_id": file_id}, document_update)
+        if processed_text != doc.get("raw_text"):
+            await sync_file_search_index(self.db, file_id, fields=(FIELD_CONTENT,))
+        if "counted_folder_id" in doc and (changed or stale_ids):
+            await self.db_ops.increment_folder_stats(
+                doc["counted_folder_id"], chunks=len(new_chunks) - doc.get("chunks_count", 0)
+            )
+        
+        logger.info(
+            f"증분 재처리 완료 {file_id}: 청크 {len(new_chunks)}개 "
+            f"(재사용 {reused_count}, 재임베딩 {len(changed)}, 삭제 {len(stale_ids)})"
+        )
+        return {
+            "file_id": file_id,
+            "folder_id": folder_id,
+            "chunks_count": len(new_chunks),
+            "reused_chunks": reused_count,
+            "embedded_chunks": len(changed),
+            "deleted_chunks": len(stale_ids),
+            "text_length": len(processed_text)
+        } 
\ No newline at end of file
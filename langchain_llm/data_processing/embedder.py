@@ -1,11 +1,20 @@
 """
 임베딩 모듈
 OpenAI 임베딩 API를 사용한 텍스트 벡터화
+ENHANCED: (모델, sha256) 키 임베딩 캐시 - 캐시 미스만 API 호출
+ENHANCED: 토큰 크기 기반 동시 배치 스케줄러 (레이트 리밋 대응)
+ENHANCED: 검색 질의 임베딩 캐시 (정규화 질의 키, 인스턴스 간 공유)
+ENHANCED: 프로세스 전역 공유 OpenAI 클라이언트 사용 (요청마다 생성해도 연결 재사용)
 """
 from typing import List, Dict
 import asyncio
-from openai import AsyncOpenAI
+import numpy as np
+from ai_processing.openai_clients import openai_clients
 from config.settings import settings
+from data_processing.embedding_cache import (
+    content_hash, embedding_cache, normalize_query, query_cache_key, query_embedding_cache
+)
+from data_processing.embedding_scheduler import EmbeddingBatchScheduler
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -13,42 +22,92 @@ logger = get_logger(__name__)
 class TextEmbedder:
     """텍스트 임베딩 클래스"""
     
-    def __init__(self):
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+    def __init__(self, use_cache: bool = None, feature: str = "embedding"):
+        # feature: 호출 메트릭 레이블 (검색 질의/문서 적재 등 구분)
+        self.client = openai_clients.get("embedding", feature)
         self.model = settings.OPENAI_EMBEDDING_MODEL
+        # 배치 재시도는 스케줄러가 토큰 버킷과 함께 전담하므로 SDK 내부 재시도 비활성화
+        self.scheduler = EmbeddingBatchScheduler(
+            openai_clients.get("embedding", feature, max_retries=0), self.model, feature=feature
+        )
+        self.use_cache = settings.EMBEDDING_CACHE_ENABLED if use_cache is None else use_cache
     
     async def embed_text(self, text: str) -> List[float]:
         """단일 텍스트 임베딩"""
         try:
+            text_hash = content_hash(text)
+            if self.use_cache:
+                cached = await embedding_cache.get_many(self.model, [text_hash])
+                if text_hash in cached:
+                    return cached[text_hash]
+            
             response = await self.client.embeddings.create(
                 model=self.model,
                 input=text
             )
-            return response.data[0].embedding
+            embedding = response.data[0].embedding
+            
+            if self.use_cache:
+                await embedding_cache.set_many(self.model, {text_hash: embedding})
+            return embedding
         except Exception as e:
             logger.error(f"임베딩 생성 실패: {e}")
             raise
     
-    async def embed_batch(self, texts: List[str], batch_size: int = 20) -> List[List[float]]:
-        """배치 텍스트 임베딩"""
-        embeddings = []
+    async def embed_query(self, query: str) -> List[float]:
+        """검색 질의 임베딩 (정규화 질의 기준 캐시 적중 시 API 호출 생략)"""
+        # 캐시 사용 여부와 관계없이 캐시 키와 같은 정규화 질의를 임베딩
+        normalized = normalize_query(query)
+        if not self.use_cache:
+            return await self.embed_text(normalized)
         
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i+batch_size]
+        key = query_cache_key(self.model, query)
+        cached = query_embedding_cache.get(key)
+        if cached is not None:
+            return cached.tolist()
+        
+        embedding = await self.embed_text(normalized)
+        # float32 배열로 보관하여 메모리 절감
+        query_embedding_cache.set(key, np.asarray(embedding, dtype=np.float32))
+        return embedding
+    
+    async def embed_batch(self, texts: List[str], batch_size: int = None) -> List[List[float]]:
+        """배치 텍스트 임베딩 (캐시 일괄 조회 후 미스만 동시 배치로 API 호출)"""
+        hashes = [content_hash(text) for text in texts]
+        resolved = await embedding_cache.get_many(self.model, hashes) if self.use_cache else {}
+        
+        # 캐시 미스 텍스트만 중복 제거하여 요청
+        pending = {}
+        for text_hash, text in zip(hashes, texts):
+            if text_hash not in resolved and text_hash not in pending:
+                pending[text_hash] = text
+        
+        if len(pending) < len(texts):
+            logger.info(f"임베딩 재사용 (캐시 적중 및 중복): {len(texts) - len(pending)}/{len(texts)}")
+        
+        if pending:
+            pending_hashes = list(pending)
+            
+            async def store_batch(indices: List[int], embeddings: List[List[float]]):
+                # 배치 완료 즉시 캐시에 기록 (중간 실패 시에도 진행분 보존)
+                if self.use_cache:
+                    await embedding_cache.set_many(
+                        self.model,
+                        {pending_hashes[i]: embedding for i, embedding in zip(indices, embeddings)}
+                    )
+            
+            scheduler = self.scheduler
+            if batch_size:
+                scheduler = EmbeddingBatchScheduler(self.client, self.model, max_batch_items=batch_size)
+            
             try:
-                response = await self.client.embeddings.create(
-                    model=self.model,
-                    input=batch
-                )
-                batch_embeddings = [data.embedding for data in response.data]
-                embeddings.extend(batch_embeddings)
-                
-                logger.info(f"임베딩 생성 진행: {len(embeddings)}/{len(texts)}")
+                embeddings = await scheduler.run([pending[h] for h in pending_hashes], on_batch=store_batch)
             except Exception as e:
                 logger.error(f"배치 임베딩 실패: {e}")
                 raise
+            resolved.update(zip(pending_hashes, embeddings))
         
-        return embeddings
+        return [resolved[text_hash] for text_hash in hashes]
     
     async def embed_documents(self, documents: List[Dict]) -> List[Dict]:
         """문서 리스트에 임베딩 추가"""
@@ -0,0 +1,127 @@
+"""
+임베딩 캐시 모듈
+(모델, sha256(텍스트)) 키의 콘텐츠 주소 기반 캐시
+- 1계층: 프로세스 내 LRU (float32 배열로 보관)
+- 2계층: MongoDB embedding_cache 컬렉션 (float32 Binary로 영구 저장)
+검색 질의용 정규화 키 LRU/TTL 캐시 (query_embedding_cache)
+"""
+import hashlib
+import re
+import unicodedata
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+
+from config.settings import settings
+from data_processing.embedding_codec import decode_embedding, encode_embedding
+from database.connection import db_connection
+from utils.cache import TTLCache
+from utils.logger import get_logger
+from utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+def content_hash(text: str) -> str:
+    """텍스트 sha256 해시"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_TRAILING_PUNCT_RE = re.compile(r"[\s?!.。？！~]+$")
+
+def normalize_query(query: str) -> str:
+    """질의 정규화 (유니코드 NFKC, 공백 축약, 끝 문장부호 제거)"""
+    query = unicodedata.normalize("NFKC", query)
+    query = _WHITESPACE_RE.sub(" ", query).strip()
+    return _TRAILING_PUNCT_RE.sub("", query) or query
+
+def query_cache_key(model: str, query: str) -> str:
+    """질의 캐시 키 (임베딩하는 정규화 질의 그대로 사용 - 대소문자는 임베딩에 영향을 주므로 구분)"""
+    return f"{model}:{normalize_query(query)}"
+
+class EmbeddingCache:
+    """2계층 임베딩 캐시"""
+
+    def __init__(self, memory_size: int = None, persistent: bool = None):
+        self.memory = TTLCache(
+            maxsize=memory_size or settings.EMBEDDING_CACHE_MEMORY_SIZE,
+            ttl=float("inf")
+        )
+        self.persistent = settings.EMBEDDING_CACHE_PERSISTENT if persistent is None else persistent
+        self.persistent_hits = 0
+
+    @staticmethod
+    def _key(model: str, text_hash: str) -> str:
+        return f"{model}:{text_hash}"
+
+    def _collection(self):
+        """영구 저장 컬렉션 (DB 미연결 시 None)"""
+        if not self.persistent:
+            return None
+        db: Optional[AsyncIOMotorDatabase] = db_connection.db
+        return db.embedding_cache if db is not None else None
+
+    async def get_many(self, model: str, text_hashes: Iterable[str]) -> Dict[str, List[float]]:
+        """해시 목록 조회 (메모리 -> DB 순, 적중한 항목만 반환)"""
+        keys = {self._key(model, h): h for h in dict.fromkeys(text_hashes)}
+        found = {keys[key]: vector.tolist() for key, vector in self.memory.get_many(keys).items()}
+
+        missing = [key for key in keys if keys[key] not in found]
+        collection = self._collection()
+        if missing and collection is not None:
+            try:
+                cursor = collection.find({"_id": {"$in": missing}}, {"embedding": 1})
+                async for doc in cursor:
+                    vector = np.array(decode_embedding(doc["embedding"]), dtype=np.float32)
+                    self.memory.set(doc["_id"], vector)
+                    found[keys[doc["_id"]]] = vector.tolist()
+                    self.persistent_hits += 1
+            except Exception as e:
+                logger.warning(f"임베딩 캐시 조회 실패 (API 호출로 대체): {e}")
+
+        return found
+
+    async def set_many(self, model: str, embeddings: Dict[str, List[float]]):
+        """해시 -> 임베딩 저장 (메모리 + DB)"""
+        if not embeddings:
+            return
+
+        operations = []
+        now = datetime.utcnow()
+        for text_hash, embedding in embeddings.items():
+            key = self._key(model, text_hash)
+            self.memory.set(key, np.asarray(embedding, dtype=np.float32))
+            operations.append(UpdateOne(
+                {"_id": key},
+                {"$setOnInsert": {
+                    "model": model,
+                    "embedding": encode_embedding(embedding, "float32"),
+                    "created_at": now
+                }},
+                upsert=True
+            ))
+
+        collection = self._collection()
+        if collection is not None:
+            try:
+                await collection.bulk_write(operations, ordered=False)
+            except Exception as e:
+                logger.warning(f"임베딩 캐시 저장 실패: {e}")
+
+    def stats(self) -> Dict:
+        """캐시 통계"""
+        return {**self.memory.stats(), "persistent_hits": self.persistent_hits}
+
+# 싱글톤 인스턴스
+embedding_cache = EmbeddingCache()
+
+# 질의 임베딩 캐시 (모든 TextEmbedder 인스턴스 공유, 정규화 질의 -> 임베딩 리스트)
+query_embedding_cache = TTLCache(
+    maxsize=settings.QUERY_EMBEDDING_CACHE_SIZE,
+    ttl=settings.QUERY_EMBEDDING_CACHE_TTL
+)
+
+metrics.register_cache("embedding", embedding_cache.stats)
+metrics.register_cache("query_embedding", query_embedding_cache.stats)
@@ -0,0 +1,93 @@
+"""
+임베딩 저장 형식 모듈
+chunks.text_embedding을 BSON 배열 대신 압축 바이너리(Binary)로 저장/복원
+- array: 기존 BSON double 배열 (Atlas Vector Search 호환)
+- float32 / float16: 리틀 엔디언 패킹, np.frombuffer로 복사 없이 복원
+- int8: 벡터별 스케일 1개를 사용하는 스칼라 양자화
+"""
+from typing import Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+from bson.binary import Binary
+
+from config.settings import settings
+
+# 사용자 정의 Binary subtype
+EMBEDDING_BINARY_SUBTYPE = 0x80
+
+# 헤더: [형식 코드 1바이트][예약 3바이트] (+ int8은 float32 스케일 4바이트)
+HEADER_SIZE = 4
+FORMAT_CODES = {"float32": 1, "float16": 2, "int8": 3}
+FORMAT_NAMES = {code: name for name, code in FORMAT_CODES.items()}
+FORMAT_DTYPES = {"float32": np.dtype("<f4"), "float16": np.dtype("<f2"), "int8": np.dtype("i1")}
+
+SUPPORTED_FORMATS = ("array",) + tuple(FORMAT_CODES)
+
+EmbeddingValue = Union[List[float], bytes, Binary]
+
+def encode_embedding(vector: Sequence[float], storage_format: Optional[str] = None) -> EmbeddingValue:
+    """임베딩을 저장 형식으로 변환 (기본값: EMBEDDING_STORAGE_FORMAT)"""
+    storage_format = storage_format or settings.EMBEDDING_STORAGE_FORMAT
+    if storage_format == "array":
+        return [float(x) for x in vector] if isinstance(vector, np.ndarray) else list(vector)
+    if storage_format not in FORMAT_CODES:
+        raise ValueError(f"지원하지 않는 임베딩 저장 형식: {storage_format}")
+
+    values = np.asarray(vector, dtype=np.float32)
+    header = bytes([FORMAT_CODES[storage_format], 0, 0, 0])
+
+    if storage_format == "int8":
+        max_abs = float(np.max(np.abs(values))) if values.size else 0.0
+        scale = max_abs / 127.0 if max_abs > 0 else 1.0
+        quantized = np.clip(np.rint(values / scale), -127, 127).astype(np.int8)
+        payload = np.float32(scale).astype("<f4").tobytes() + quantized.tobytes()
+    else:
+        payload = values.astype(FORMAT_DTYPES[storage_format]).tobytes()
+
+    return Binary(header + payload, EMBEDDING_BINARY_SUBTYPE)
+
+def embedding_format(value: EmbeddingValue) -> str:
+    """저장된 임베딩의 형식 이름 반환"""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return FORMAT_NAMES.get(bytes(value[:1])[0] if len(value) else 0, "unknown")
+    return "array"
+
+def decode_embedding(value: EmbeddingValue) -> np.ndarray:
+    """저장된 임베딩을 1차원 배열로 복원 (float32/float16은 복사 없는 읽기 전용 뷰)"""
+    if not isinstance(value, (bytes, bytearray, memoryview)):
+        return np.asarray(value, dtype=np.float32)
+
+    storage_format = embedding_format(value)
+    if storage_format == "int8":
+        scale = np.frombuffer(value, dtype="<f4", count=1, offset=HEADER_SIZE)[0]
+        quantized = np.frombuffer(value, dtype=np.int8, offset=HEADER_SIZE + 4)
+        return quantized.astype(np.float32) * scale
+    if storage_format in FORMAT_DTYPES:
+        return np.frombuffer(value, dtype=FORMAT_DTYPES[storage_format], offset=HEADER_SIZE)
+    raise ValueError("알 수 없는 임베딩 바이너리 형식")
+
+def decode_embeddings(values: Iterable[EmbeddingValue]) -> np.ndarray:
+    """여러 임베딩을 (n, dim) float32 행렬로 복원 (형식 혼재 허용)"""
+    values = list(values)
+    if not values:
+        return np.zeros((0, 0), dtype=np.float32)
+    if all(isinstance(value, list) for value in values):
+        return np.asarray(values, dtype=np.float32)
+
+    matrix = np.empty((len(values), embedding_dimension(values[0])), dtype=np.float32)
+    for i, value in enumerate(values):
+        matrix[i] = decode_embedding(value)
+    return matrix
+
+def embedding_dimension(value: Optional[EmbeddingValue]) -> int:
+    """저장된 임베딩의 차원 수 (복원 없이 계산)"""
+    if not value:
+        return 0
+    storage_format = embedding_format(value)
+    if storage_format == "array":
+        return len(value)
+    if storage_format == "int8":
+        return len(value) - HEADER_SIZE - 4
+    if storage_format in FORMAT_DTYPES:
+        return (len(value) - HEADER_SIZE) // FORMAT_DTYPES[storage_format].itemsize
+    return 0
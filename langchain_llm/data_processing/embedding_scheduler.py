@@ -0,0 +1,177 @@
+"""
+임베딩 배치 스케줄러
+토큰 수 기준으로 배치를 나누고 세마포어로 동시 실행
+- 토큰 버킷으로 분당 토큰(TPM) 제한 준수
+- 429/일시 오류 시 지터가 있는 지수 백오프 재시도
+- 입력 순서 그대로 결과 반환
+"""
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from openai import APIConnectionError, APITimeoutError, AsyncOpenAI, InternalServerError, RateLimitError
+
+from config.settings import settings
+from utils.logger import get_logger
+from utils.metrics import record_retry
+from utils.tokenizer import count_tokens
+
+logger = get_logger(__name__)
+
+RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError)
+
+def estimate_tokens(text: str) -> int:
+    """요청 토큰 수 추정 (모델 토크나이저 기준, 사용 불가 시 근사치)"""
+    return count_tokens(text) + 1
+
+class TokenBucket:
+    """분당 토큰 한도 토큰 버킷 (429 응답 시 일시 정지 지원)"""
+
+    def __init__(self, tokens_per_minute: int):
+        self.capacity = float(tokens_per_minute)
+        self.rate = tokens_per_minute / 60.0
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self, tokens: int):
+        """토큰 확보까지 대기 (용량보다 큰 요청은 용량만큼만 차감)"""
+        if self.capacity <= 0:
+            return
+        tokens = min(tokens, self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        """레이트 리밋 응답 후 모든 요청 일시 정지"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+
+# 프로세스 공용 토큰 버킷
+shared_token_bucket = TokenBucket(settings.EMBEDDING_TPM_LIMIT)
+
+class EmbeddingBatchScheduler:
+    """토큰 크기 기반 동시 임베딩 배치 실행기"""
+
+    def __init__(
+        self,
+        client: AsyncOpenAI,
+        model: str,
+        max_batch_tokens: int = None,
+        max_batch_items: int = None,
+        concurrency: int = None,
+        tokens_per_minute: int = None,
+        max_retries: int = None,
+        feature: str = "embedding"
+    ):
+        self.client = client
+        self.model = model
+        self.feature = feature
+        self.max_batch_tokens = max_batch_tokens or settings.EMBEDDING_MAX_BATCH_TOKENS
+        self.max_batch_items = max_batch_items or settings.EMBEDDING_MAX_BATCH_ITEMS
+        self.concurrency = concurrency or settings.EMBEDDING_CONCURRENCY
+        self.max_retries = settings.EMBEDDING_MAX_RETRIES if max_retries is None else max_retries
+        # 한도를 지정하지 않으면 프로세스 공용 버킷 사용 (TextEmbedder 인스턴스 간 공유)
+        self.bucket = shared_token_bucket if tokens_per_minute is None else TokenBucket(tokens_per_minute)
+
+    def plan_batches(self, texts: List[str]) -> List[List[int]]:
+        """입력 순서를 유지하며 토큰/개수 한도 내로 인덱스 배치 구성"""
+        batches, current, current_tokens = [], [], 0
+        for i, text in enumerate(texts):
+            tokens = estimate_tokens(text)
+            if current and (
+                current_tokens + tokens > self.max_batch_tokens
+                or len(current) >= self.max_batch_items
+            ):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(i)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    async def run(
+        self,
+        texts: List[str],
+        on_batch: Optional[Callable[[List[int], List[List[float]]], Awaitable[None]]] = None
+    ) -> List[List[float]]:
+        """전체 텍스트 임베딩 (결과는 입력 순서와 동일)"""
+        if not texts:
+            return []
+
+        batches = self.plan_batches(texts)
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        progress: Dict[str, int] = {"done": 0}
+
+        async def worker(indices: List[int]):
+            async with semaphore:
+                batch_texts = [texts[i] for i in indices]
+                embeddings = await self._embed_with_retry(batch_texts)
+            for i, embedding in zip(indices, embeddings):
+                results[i] = embedding
+            if on_batch is not None:
+                await on_batch(indices, embeddings)
+            progress["done"] += len(indices)
+            logger.info(f"임베딩 생성 진행: {progress['done']}/{len(texts)}")
+
+        tasks = [asyncio.create_task(worker(indices)) for indices in batches]
+        try:
+            await asyncio.gather(*tasks)
+        except Exception:
+            for task in tasks:
+                task.cancel()
+            raise
+
+        return results
+
+    async def _embed_with_retry(self, batch_texts: List[str]) -> List[List[float]]:
+        """단일 배치 요청 (재시도 가능한 오류는 백오프 후 재시도)"""
+        tokens = sum(estimate_tokens(text) for text in batch_texts)
+        attempt = 0
+        while True:
+            await self.bucket.acquire(tokens)
+            try:
+                response = await self.client.embeddings.create(model=self.model, input=batch_texts)
+                data = sorted(response.data, key=lambda item: item.index)
+                return [item.embedding for item in data]
+            except RETRYABLE_ERRORS as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    logger.error(f"임베딩 배치 재시도 한도 초과 ({self.max_retries}회): {e}")
+                    raise
+                delay = self._retry_delay(e, attempt)
+                if isinstance(e, RateLimitError):
+                    self.bucket.pause(delay)
+                record_retry("embedding", self.feature, type(e).__name__)
+                logger.warning(f"임베딩 배치 일시 실패, {delay:.2f}초 후 재시도 ({attempt}/{self.max_retries}): {e}")
+                await asyncio.sleep(delay)
+
+    @staticmethod
+    def _retry_delay(error: Exception, attempt: int) -> float:
+        """Retry-After 헤더 우선, 없으면 지터 포함 지수 백오프"""
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return float(retry_after) + random.uniform(0, 0.5)
+            except ValueError:
+                pass
+        return min(30.0, 0.5 * (2 ** (attempt - 1))) * random.uniform(0.5, 1.5)
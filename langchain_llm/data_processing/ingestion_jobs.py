@@ -0,0 +1,328 @@
+"""
+적재 작업 큐 모듈
+MongoDB ingestion_jobs 컬렉션 기반 백그라운드 문서 처리
+- 업로드 요청은 작업만 등록하고 즉시 반환
+- 앱 내부의 제한된 워커 풀이 작업을 원자적으로 점유하여 처리
+- 실패 시 지수 백오프 재시도, 워커 중단 시 점유 만료 후 재처리
+- (content_hash, folder_id) 기준 중복 업로드 방지
+"""
+import asyncio
+import random
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+
+from config.settings import settings
+from data_processing.document_processor import DocumentProcessor
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 작업 상태 (FileStatus.status 값 'uploading', 'processing', 'completed', 'failed' 확장)
+JOB_QUEUED = "queued"
+JOB_PROCESSING = "processing"
+JOB_RETRYING = "retrying"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+RUNNABLE_STATUSES = [JOB_QUEUED, JOB_RETRYING]
+ACTIVE_STATUSES = [JOB_QUEUED, JOB_PROCESSING, JOB_RETRYING]
+
+async def enqueue_ingestion_job(
+    db: AsyncIOMotorDatabase,
+    file_path: Path,
+    file_metadata: Dict,
+    content_hash: str,
+    preserve_formatting: bool = True
+) -> Dict:
+    """적재 작업 등록 (같은 폴더에 같은 내용이 진행 중/완료 상태면 기존 작업 반환)"""
+    existing = await find_duplicate_job(db, content_hash, file_metadata.get("folder_id"))
+    if existing:
+        logger.info(f"중복 업로드 감지, 기존 작업 반환: {existing['_id']} (file_id: {existing['file_id']})")
+        return {**existing, "duplicate": True}
+
+    now = datetime.utcnow()
+    job = {
+        "_id": str(uuid.uuid4()),
+        "file_id": file_metadata["file_id"],
+        "folder_id": file_metadata.get("folder_id"),
+        "content_hash": content_hash,
+        "file_path": str(file_path),
+        "file_metadata": file_metadata,
+        "preserve_formatting": preserve_formatting,
+        "status": JOB_QUEUED,
+        "attempts": 0,
+        "max_attempts": settings.INGEST_JOB_MAX_ATTEMPTS,
+        "progress": {"stage": JOB_QUEUED, "chunked": 0, "embedded": 0, "stored": 0},
+        "error": None,
+        "next_run_at": now,
+        "created_at": now,
+        "updated_at": now
+    }
+    await db.ingestion_jobs.insert_one(job)
+    ingestion_worker_pool.notify()
+    logger.info(f"적재 작업 등록: {job['_id']} (file_id: {job['file_id']})")
+    return {**job, "duplicate": False}
+
+async def find_duplicate_job(db: AsyncIOMotorDatabase, content_hash: str, folder_id: Optional[str]) -> Optional[Dict]:
+    """진행 중이거나 완료되어 문서가 남아 있는 동일 내용 작업 조회"""
+    cursor = db.ingestion_jobs.find(
+        {
+            "content_hash": content_hash,
+            "folder_id": folder_id,
+            "status": {"$in": ACTIVE_STATUSES + [JOB_COMPLETED]}
+        },
+        {"file_metadata": 0}
+    ).sort("created_at", -1).limit(5)
+
+    async for job in cursor:
+        if job["status"] != JOB_COMPLETED:
+            return job
+        # 완료 작업은 문서가 삭제되지 않았을 때만 중복으로 간주
+        if await db.documents.find_one({"file_metadata.file_id": job["file_id"]}, {"_id": 1}):
+            return job
+    return None
+
+async def get_latest_job_for_file(db: AsyncIOMotorDatabase, file_id: str) -> Optional[Dict]:
+    """파일의 최근 적재 작업 조회"""
+    cursor = db.ingestion_jobs.find({"file_id": file_id}).sort("created_at", -1).limit(1)
+    jobs = await cursor.to_list(1)
+    return jobs[0] if jobs else None
+
+class IngestionWorkerPool:
+    """앱 내부 적재 워커 풀"""
+
+    def __init__(self, concurrency: int = None):
+        self.concurrency = concurrency or settings.INGEST_WORKER_CONCURRENCY
+        self.worker_id = f"worker-{uuid.uuid4().hex[:8]}"
+        self._db: Optional[AsyncIOMotorDatabase] = None
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+
+    def start(self, db: AsyncIOMotorDatabase):
+        """워커 시작"""
+        if self._tasks:
+            return
+        self._db = db
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._worker_loop(i), name=f"ingestion-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+        logger.info(f"적재 워커 {self.concurrency}개 시작 ({self.worker_id})")
+
+    async def stop(self):
+        """워커 중지 (처리 중인 작업은 점유 만료 후 다른 워커가 재처리)"""
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("적재 워커 중지")
+
+    def notify(self):
+        """새 작업 등록 알림"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _worker_loop(self, index: int):
+        while not self._stopping:
+            try:
+                job = await self._claim_next_job()
+                if job is None:
+                    await self._wait_for_work()
+                    continue
+                await self._run_job(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"적재 워커 {index} 오류: {e}")
+                await asyncio.sleep(settings.INGEST_JOB_POLL_SECONDS)
+
+    async def _wait_for_work(self):
+        """새 작업 알림 또는 폴링 주기까지 대기"""
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=settings.INGEST_JOB_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def _claim_next_job(self) -> Optional[Dict]:
+        """실행 가능한 작업 하나를 원자적으로 점유 (점유 만료된 처리 중 작업은 재시도 횟수가 남은 경우만)"""
+        now = datetime.utcnow()
+        lock_expired_at = now - timedelta(seconds=settings.INGEST_JOB_LOCK_SECONDS)
+        await self._fail_abandoned_jobs(lock_expired_at)
+        return await self._db.ingestion_jobs.find_one_and_update(
+            {
+                "$or": [
+                    {"status": {"$in": RUNNABLE_STATUSES}, "next_run_at": {"$lte": now}},
+                    {
+                        "status": JOB_PROCESSING,
+                        "locked_at": {"$lt": lock_expired_at},
+                        "$expr": {"$lt": ["$attempts", "$max_attempts"]}
+                    }
+                ]
+            },
+            {
+                "$set": {
+                    "status": JOB_PROCESSING,
+                    "locked_by": self.worker_id,
+                    "locked_at": now,
+                    "started_at": now,
+                    "updated_at": now
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("next_run_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _fail_abandoned_jobs(self, lock_expired_at: datetime):
+        """재시도 횟수를 모두 쓴 채 점유가 만료된 작업을 실패 처리 (워커를 중단시키는 작업의 무한 재처리 방지)"""
+        abandoned_filter = {
+            "status": JOB_PROCESSING,
+            "locked_at": {"$lt": lock_expired_at},
+            "$expr": {"$gte": ["$attempts", "$max_attempts"]}
+        }
+        cursor = self._db.ingestion_jobs.find(abandoned_filter, {"file_id": 1, "file_path": 1, "locked_at": 1})
+        async for job in cursor:
+            now = datetime.utcnow()
+            result = await self._db.ingestion_jobs.update_one(
+                {**abandoned_filter, "_id": job["_id"], "locked_at": job["locked_at"]},
+                {
+                    "$set": {
+                        "status": JOB_FAILED,
+                        "progress.stage": JOB_FAILED,
+                        "error": "처리 중 워커가 중단되어 최대 재시도 횟수를 초과했습니다",
+                        "finished_at": now,
+                        "updated_at": now
+                    },
+                    "$unset": {"locked_by": "", "locked_at": ""}
+                }
+            )
+            if result.matched_count == 0:
+                continue  # 다른 워커가 먼저 처리
+            await DocumentProcessor(self._db).discard_partial_ingest(job["file_id"])
+            self._remove_file(job["file_path"])
+            logger.error(f"적재 작업 최종 실패 (점유 만료, 재시도 횟수 초과): {job['_id']}")
+
+    def _owner_filter(self, job: Dict) -> Dict:
+        """이 워커의 현재 점유에만 일치하는 조건 (attempts는 점유마다 증가하므로 같은 프로세스의 재점유도 구분)"""
+        return {"_id": job["_id"], "locked_by": self.worker_id, "attempts": job["attempts"]}
+
+    async def _run_job(self, job: Dict):
+        """작업 실행 및 결과 기록"""
+        job_id = job["_id"]
+        jobs = self._db.ingestion_jobs
+        logger.info(f"적재 작업 시작: {job_id} (시도 {job['attempts']}/{job['max_attempts']})")
+
+        async def report_progress(progress: Dict):
+            now = datetime.utcnow()
+            await jobs.update_one(
+                self._owner_filter(job),
+                {"$set": {"progress": progress, "locked_at": now, "updated_at": now}}
+            )
+
+        try:
+            processor = DocumentProcessor(self._db)
+            if job["attempts"] > 1:
+                # 이전 시도가 프로세스 종료 등으로 정리 없이 중단되었을 수 있으므로 잔여 문서/청크 제거 후 재적재
+                await processor.discard_partial_ingest(job["file_id"])
+            result = await processor.process_and_store(
+                file_path=Path(job["file_path"]),
+                file_metadata=dict(job["file_metadata"]),
+                preserve_formatting=job.get("preserve_formatting", True),
+                progress_callback=report_progress
+            )
+        except Exception as e:
+            await self._record_failure(job, e)
+            return
+
+        now = datetime.utcnow()
+        completed = await jobs.update_one(
+            self._owner_filter(job),
+            {
+                "$set": {
+                    "status": JOB_COMPLETED,
+                    "progress.stage": JOB_COMPLETED,
+                    "result": {
+                        "chunks_count": result["chunks_count"],
+                        "document_id": result["document_id"],
+                        "folder_id": result["folder_id"]
+                    },
+                    "error": None,
+                    "finished_at": now,
+                    "updated_at": now
+                },
+                "$unset": {"locked_by": "", "locked_at": ""}
+            }
+        )
+        if completed.matched_count == 0:
+            # 점유가 만료되어 다른 워커가 재점유함 - 결과 기록과 파일 정리는 새 점유자에게 맡김
+            logger.warning(f"적재 작업 점유 상실, 완료 기록 생략: {job_id}")
+            return
+        # 이전 시도에서 남은 실패 기록 정리
+        await self._db.file_info.delete_many({"file_id": job["file_id"], "processing_status": JOB_FAILED})
+        self._remove_file(job["file_path"])
+        logger.info(f"적재 작업 완료: {job_id} ({result['chunks_count']}개 청크)")
+
+    async def _record_failure(self, job: Dict, error: Exception):
+        """실패 기록 (재시도 가능하면 백오프 후 재등록)"""
+        now = datetime.utcnow()
+        attempts = job["attempts"]
+        if attempts < job["max_attempts"]:
+            delay = settings.INGEST_JOB_BACKOFF_SECONDS * (2 ** (attempts - 1)) * random.uniform(0.8, 1.2)
+            update = {
+                "status": JOB_RETRYING,
+                "next_run_at": now + timedelta(seconds=delay),
+                "error": str(error),
+                "updated_at": now
+            }
+        else:
+            update = {
+                "status": JOB_FAILED,
+                "progress.stage": JOB_FAILED,
+                "error": str(error),
+                "finished_at": now,
+                "updated_at": now
+            }
+
+        result = await self._db.ingestion_jobs.update_one(
+            self._owner_filter(job),
+            {"$set": update, "$unset": {"locked_by": "", "locked_at": ""}}
+        )
+        if result.matched_count == 0:
+            # 점유가 만료되어 다른 워커가 재점유함 - 상태와 파일은 새 점유자가 관리
+            logger.warning(f"적재 작업 점유 상실, 실패 기록 생략: {job['_id']} - {error}")
+            return
+        if update["status"] == JOB_RETRYING:
+            logger.warning(f"적재 작업 실패, {delay:.0f}초 후 재시도: {job['_id']} - {error}")
+        else:
+            self._remove_file(job["file_path"])
+            logger.error(f"적재 작업 최종 실패: {job['_id']} - {error}")
+
+    @staticmethod
+    def _remove_file(file_path: str):
+        """임시 업로드 파일 삭제"""
+        try:
+            Path(file_path).unlink(missing_ok=True)
+        except Exception as e:
+            logger.warning(f"임시 파일 삭제 실패: {e}")
+
+# 싱글톤 인스턴스
+ingestion_worker_pool = IngestionWorkerPool()
+
+async def start_ingestion_workers(db: AsyncIOMotorDatabase):
+    """적재 워커 시작 (애플리케이션 시작 시)"""
+    if settings.INGEST_JOBS_ENABLED:
+        ingestion_worker_pool.start(db)
+
+async def stop_ingestion_workers():
+    """적재 워커 중지 (애플리케이션 종료 시)"""
+    await ingestion_worker_pool.stop()
@@ -0,0 +1,117 @@
+"""
+스트리밍 적재 파이프라인
+청킹 → 임베딩 → 저장을 배치 단위 비동기 제너레이터로 연결
+- 배치 N의 insert_many와 배치 N+1의 임베딩을 겹쳐 실행
+- 제한된 큐 깊이로 메모리 사용량 상한 유지
+- 단계별 진행 상황 보고
+"""
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from config.settings import settings
+from data_processing.chunker import TextChunker
+from data_processing.embedder import TextEmbedder
+from retrieval.index_sync import on_chunks_inserted
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+ProgressCallback = Callable[[Dict], Awaitable[None]]
+RecordBuilder = Callable[[Dict, int], Dict]
+
+# 큐 종료 표시
+_END = object()
+
+class IngestionPipeline:
+    """청크 스트리밍 적재 파이프라인"""
+
+    def __init__(
+        self,
+        db: AsyncIOMotorDatabase,
+        chunker: TextChunker,
+        embedder: TextEmbedder,
+        batch_size: int = None,
+        queue_depth: int = None
+    ):
+        self.db = db
+        self.chunker = chunker
+        self.embedder = embedder
+        self.batch_size = batch_size or settings.INGEST_BATCH_CHUNKS
+        self.queue_depth = queue_depth or settings.INGEST_PIPELINE_DEPTH
+
+    async def _chunk_batches(self, text: str, metadata: Dict) -> AsyncIterator[List[Dict]]:
+        """청크를 배치 단위로 점진 생성"""
+        batch = []
+        for chunk in self.chunker.iter_chunks(text, metadata):
+            batch.append(chunk)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+                # 청킹이 이벤트 루프를 독점하지 않도록 양보
+                await asyncio.sleep(0)
+        if batch:
+            yield batch
+
+    async def _embedded_batches(self, text: str, metadata: Dict, progress: Dict) -> AsyncIterator[List[Dict]]:
+        """청크 배치에 임베딩 추가"""
+        async for batch in self._chunk_batches(text, metadata):
+            progress["chunked"] += len(batch)
+            await self.embedder.embed_documents(batch)
+            progress["embedded"] += len(batch)
+            yield batch
+
+    async def run(
+        self,
+        text: str,
+        chunk_metadata: Dict,
+        build_record: RecordBuilder,
+        progress_callback: Optional[ProgressCallback] = None
+    ) -> Dict:
+        """전체 텍스트 스트리밍 적재 후 {"chunks_count", "chunk_ids"} 반환"""
+        progress = {"stage": "chunking", "chunked": 0, "embedded": 0, "stored": 0}
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_depth)
+        chunk_ids: List = []
+
+        async def report(stage: str):
+            progress["stage"] = stage
+            if progress_callback is not None:
+                try:
+                    await progress_callback(dict(progress))
+                except Exception as e:
+                    logger.warning(f"적재 진행 상황 보고 실패: {e}")
+
+        async def produce():
+            async for batch in self._embedded_batches(text, chunk_metadata, progress):
+                records = [build_record(chunk, chunk["sequence"]) for chunk in batch]
+                await queue.put(records)
+                await report("embedding")
+            await queue.put(_END)
+
+        async def consume():
+            while True:
+                records = await queue.get()
+                if records is _END:
+                    return
+                result = await self.db.chunks.insert_many(records)
+                chunk_ids.extend(str(inserted_id) for inserted_id in result.inserted_ids)
+                on_chunks_inserted(records)
+                progress["stored"] += len(records)
+                logger.info(
+                    f"스트리밍 적재 진행: 청킹 {progress['chunked']}, "
+                    f"임베딩 {progress['embedded']}, 저장 {progress['stored']}"
+                )
+                await report("storing")
+
+        producer = asyncio.create_task(produce())
+        consumer = asyncio.create_task(consume())
+        try:
+            await asyncio.gather(producer, consumer)
+        except Exception:
+            producer.cancel()
+            consumer.cancel()
+            raise
+
+        await report("completed")
+        return {"chunks_count": progress["stored"], "chunk_ids": chunk_ids}
@@ -1,73 +1,157 @@
 """
 문서 로더 모듈
 다양한 포맷의 문서를 로드하는 기능
+ENHANCED: 파싱을 프로세스 풀에서 실행 (이벤트 루프 비차단)
+- PDF는 페이지 구간 단위로 나누어 병렬 추출
+- 페이지별 텍스트를 함께 반환하여 청크에 페이지 번호 기록
 """
-from typing import List, Dict
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Optional
 from pathlib import Path
 import pypdf
 from docx import Document as DocxDocument
 from bs4 import BeautifulSoup
+from config.settings import settings
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# ---------------------------------------------------------------------------
+# 프로세스 풀에서 실행되는 파싱 함수 (pickle 가능하도록 모듈 최상위에 정의)
+# ---------------------------------------------------------------------------
+
+def _pdf_page_count(file_path: str) -> int:
+    """PDF 페이지 수"""
+    with open(file_path, 'rb') as file:
+        return len(pypdf.PdfReader(file).pages)
+
+def _extract_pdf_pages(file_path: str, start: int, end: int) -> List[str]:
+    """PDF [start, end) 페이지 텍스트 추출"""
+    with open(file_path, 'rb') as file:
+        pdf_reader = pypdf.PdfReader(file)
+        return [pdf_reader.pages[i].extract_text() or "" for i in range(start, end)]
+
+def _extract_docx(file_path: str) -> str:
+    """DOCX 문단 텍스트 추출"""
+    doc = DocxDocument(file_path)
+    return "".join(f"{paragraph.text}\n" for paragraph in doc.paragraphs)
+
+def _extract_txt(file_path: str) -> str:
+    """텍스트 파일 읽기"""
+    with open(file_path, 'r', encoding='utf-8') as file:
+        return file.read()
+
+def _extract_html(file_path: str) -> str:
+    """HTML 본문 텍스트 추출"""
+    with open(file_path, 'r', encoding='utf-8') as file:
+        return BeautifulSoup(file.read(), 'html.parser').get_text()
+
+# ---------------------------------------------------------------------------
+# 공용 파싱 프로세스 풀
+# ---------------------------------------------------------------------------
+
+_parse_pool: Optional[ProcessPoolExecutor] = None
+
+def get_parse_pool() -> Optional[Executor]:
+    """파싱 프로세스 풀 (비활성화 시 None → 기본 스레드 풀 사용)"""
+    global _parse_pool
+    if not settings.PARSE_POOL_ENABLED:
+        return None
+    if _parse_pool is None:
+        workers = settings.PARSE_POOL_WORKERS or min(4, os.cpu_count() or 1)
+        # 실행 중인 이벤트 루프/드라이버 스레드를 복제하지 않도록 spawn 사용
+        _parse_pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        logger.info(f"문서 파싱 프로세스 풀 시작: {workers}개 프로세스")
+    return _parse_pool
+
+def shutdown_parse_pool():
+    """파싱 프로세스 풀 종료 (애플리케이션 종료 시)"""
+    global _parse_pool
+    if _parse_pool is not None:
+        _parse_pool.shutdown(wait=False, cancel_futures=True)
+        _parse_pool = None
+        logger.info("문서 파싱 프로세스 풀 종료")
+
+async def _run_in_pool(func: Callable, *args):
+    """파싱 함수를 프로세스 풀에서 실행 (풀 손상 시 재생성 후 예외 전달)"""
+    global _parse_pool
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(get_parse_pool(), func, *args)
+    except BrokenProcessPool:
+        logger.error("문서 파싱 프로세스 풀 손상, 다음 요청에서 재생성")
+        _parse_pool = None
+        raise
+
 class DocumentLoader:
     """문서 로더 클래스"""
-    
+
     @staticmethod
-    async def load_pdf(file_path: Path) -> str:
-        """PDF 파일 로드"""
-        text = ""
+    async def load_pdf_pages(file_path: Path) -> List[str]:
+        """PDF 페이지별 텍스트 로드 (페이지 구간 병렬 추출)"""
         try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = pypdf.PdfReader(file)
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
+            path = str(file_path)
+            page_count = await _run_in_pool(_pdf_page_count, path)
+            step = max(1, settings.PARSE_PDF_PAGES_PER_TASK)
+            ranges = [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+            parts = await asyncio.gather(*(
+                _run_in_pool(_extract_pdf_pages, path, start, end) for start, end in ranges
+            ))
+            pages = [page for part in parts for page in part]
+            logger.info(f"PDF 추출 완료: {page_count}페이지 ({len(ranges)}개 구간 병렬 처리)")
+            return pages
         except Exception as e:
             logger.error(f"PDF 로드 실패: {e}")
             raise
-        return text
-    
+
+    @staticmethod
+    async def load_pdf(file_path: Path) -> str:
+        """PDF 파일 로드"""
+        pages = await DocumentLoader.load_pdf_pages(file_path)
+        return "".join(f"{page}\n" for page in pages)
+
     @staticmethod
     async def load_docx(file_path: Path) -> str:
         """DOCX 파일 로드"""
-        text = ""
         try:
-            doc = DocxDocument(file_path)
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
+            return await _run_in_pool(_extract_docx, str(file_path))
         except Exception as e:
             logger.error(f"DOCX 로드 실패: {e}")
             raise
-        return text
-    
+
     @staticmethod
     async def load_txt(file_path: Path) -> str:
         """텍스트 파일 로드"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                return file.read()
+            return await asyncio.to_thread(_extract_txt, str(file_path))
         except Exception as e:
             logger.error(f"TXT 로드 실패: {e}")
             raise
-    
+
     @staticmethod
     async def load_html(file_path: Path) -> str:
         """HTML 파일 로드"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                soup = BeautifulSoup(file.read(), 'html.parser')
-                return soup.get_text()
+            return await _run_in_pool(_extract_html, str(file_path))
         except Exception as e:
             logger.error(f"HTML 로드 실패: {e}")
             raise
-    
-    async def load_document(self, file_path: Path) -> Dict[str, str]:
-        """파일 확장자에 따라 적절한 로더 선택"""
+
+    async def load_document(self, file_path: Path) -> Dict:
+        """파일 확장자에 따라 적절한 로더 선택 (PDF는 페이지별 텍스트 "pages" 포함)"""
         ext = file_path.suffix.lower()
-        
+        pages = None
+
         if ext == '.pdf':
-            text = await self.load_pdf(file_path)
+            pages = await self.load_pdf_pages(file_path)
+            text = "".join(f"{page}\n" for page in pages)
         elif ext == '.docx':
             text = await self.load_docx(file_path)
         elif ext == '.txt':
@@ -76,9 +160,10 @@ class DocumentLoader:
             text = await self.load_html(file_path)
         else:
             raise ValueError(f"지원하지 않는 파일 형식: {ext}")
-        
+
         return {
             "text": text,
+            "pages": pages,
             "source": str(file_path),
             "file_type": ext[1:]
         }
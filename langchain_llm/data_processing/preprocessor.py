@@ -2,13 +2,17 @@
 전처리 모듈
 텍스트 클린징 및 정규화
 MODIFIED 2025-01-27: 줄바꿈 문자 보존을 위한 전처리 로직 개선
+ENHANCED: 페이지별 전처리 및 페이지 구간(문자 오프셋) 계산
 """
 import re
-from typing import List
+from typing import Dict, List, Tuple
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# 페이지 결합 구분자 (문단 경계로 취급되도록 빈 줄 사용)
+PAGE_SEPARATOR = "\n\n"
+
 class TextPreprocessor:
     """텍스트 전처리 클래스"""
     
@@ -74,10 +78,8 @@ class TextPreprocessor:
         # 문단 사이에 빈 줄 하나씩 유지
         return '\n\n'.join(cleaned_paragraphs)
     
-    async def preprocess(self, text: str) -> str:
-        """전체 전처리 파이프라인 (줄바꿈 보존)"""
-        logger.info(f"전처리 시작: {len(text)} 문자")
-        
+    def clean_text(self, text: str) -> str:
+        """기본 전처리 단계 실행 (로그 없음)"""
         # 1. 줄바꿈 문자 정규화
         text = self.normalize_line_endings(text)
         
@@ -97,7 +99,26 @@ class TextPreprocessor:
         text = self.normalize_whitespace(text)
         
         # 7. 문서 구조 보존
-        text = self.preserve_document_structure(text)
+        return self.preserve_document_structure(text)
+    
+    def clean_minimal(self, text: str) -> str:
+        """최소 전처리 단계 실행 (로그 없음)"""
+        # 1. 줄바꿈 정규화만
+        text = self.normalize_line_endings(text)
+        
+        # 2. 과도한 공백만 정리
+        text = self.patterns['multiple_spaces'].sub(' ', text)
+        
+        # 3. 과도한 줄바꿈만 정리 (5개 이상 → 2개)
+        text = re.sub(r'\n{5,}', '\n\n', text)
+        
+        return text.strip()
+    
+    async def preprocess(self, text: str) -> str:
+        """전체 전처리 파이프라인 (줄바꿈 보존)"""
+        logger.info(f"전처리 시작: {len(text)} 문자")
+        
+        text = self.clean_text(text)
         
         logger.info(f"전처리 완료: {len(text)} 문자 (줄바꿈 보존)")
         
@@ -111,14 +132,28 @@ class TextPreprocessor:
         """최소한의 전처리 (줄바꿈 최대 보존)"""
         logger.info(f"최소 전처리 시작: {len(text)} 문자")
         
-        # 1. 줄바꿈 정규화만
-        text = self.normalize_line_endings(text)
-        
-        # 2. 과도한 공백만 정리
-        text = self.patterns['multiple_spaces'].sub(' ', text)
-        
-        # 3. 과도한 줄바꿈만 정리 (5개 이상 → 2개)
-        text = re.sub(r'\n{5,}', '\n\n', text)
+        text = self.clean_minimal(text)
         
         logger.info(f"최소 전처리 완료: {len(text)} 문자")
-        return text.strip()
+        return text
+    
+    async def preprocess_pages(self, pages: List[str], minimal: bool = True) -> Tuple[str, List[Dict]]:
+        """페이지별 전처리 후 결합 (결합 텍스트 기준 {"page", "start", "end"} 구간 반환)"""
+        clean = self.clean_minimal if minimal else self.clean_text
+        parts: List[str] = []
+        page_spans: List[Dict] = []
+        offset = 0
+        
+        for page_number, page in enumerate(pages, start=1):
+            cleaned = clean(page)
+            if not cleaned:  # 빈 페이지(스캔 이미지 등) 제외
+                continue
+            if parts:
+                offset += len(PAGE_SEPARATOR)
+            page_spans.append({"page": page_number, "start": offset, "end": offset + len(cleaned)})
+            parts.append(cleaned)
+            offset += len(cleaned)
+        
+        text = PAGE_SEPARATOR.join(parts)
+        logger.info(f"페이지별 전처리 완료: {len(pages)}페이지 → {len(text)} 문자")
+        return text, page_spans
@@ -0,0 +1,237 @@
+"""
+대화 메시지 버킷 저장소 모듈
+chat_sessions에는 세션 메타데이터만 두고 메시지는 chat_message_buckets에 고정 크기 버킷으로 저장
+- 추가: 세션 문서에서 메시지 위치(seq)를 원자적으로 예약한 뒤 해당 버킷에 $push (기록 길이와 무관)
+- 최근 메시지 조회: bucket_no 내림차순으로 마지막 버킷(들)만 조회
+- 압축: 가득 찬 오래된 버킷은 백그라운드에서 zlib 압축 BSON으로 교체
+- 누적 대화 요약(summary, summary_upto)은 세션 문서에 보관
+"""
+import asyncio
+import math
+import zlib
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import bson
+from bson import Binary
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from config.settings import settings
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 세션 목록 요약용으로 세션 문서에 보관할 첫 질문 수
+FIRST_QUESTIONS_LIMIT = 3
+
+class ChatMessageStore:
+    """세션별 메시지 버킷 저장소"""
+
+    def __init__(self, db: AsyncIOMotorDatabase, bucket_size: Optional[int] = None):
+        self.sessions = db.chat_sessions
+        self.buckets = db.chat_message_buckets
+        self.bucket_size = bucket_size or settings.MEMORY_MESSAGE_BUCKET_SIZE
+
+    async def append(self, session_id: str, messages: List[Dict], created_at: Optional[datetime] = None):
+        """메시지 추가 (role/content/timestamp, 세션 메타데이터도 함께 갱신)"""
+        if not messages:
+            return
+
+        questions = [msg["content"] for msg in messages if msg.get("role") == "human"]
+        session_doc = await self.sessions.find_one_and_update(
+            {"session_id": session_id},
+            {
+                "$set": {
+                    "session_id": session_id,
+                    "last_activity": messages[-1].get("timestamp") or datetime.now()
+                },
+                "$inc": {
+                    "message_count": len(questions),
+                    "message_total": len(messages)
+                },
+                "$setOnInsert": {
+                    "created_at": created_at or datetime.now()
+                },
+                "$push": {
+                    "first_questions": {"$each": questions, "$slice": FIRST_QUESTIONS_LIMIT}
+                }
+            },
+            projection={"message_total": 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+
+        # 예약된 위치: [message_total - len(messages), message_total)
+        first_seq = session_doc["message_total"] - len(messages)
+        await self._push(session_id, [
+            {**msg, "seq": first_seq + offset} for offset, msg in enumerate(messages)
+        ])
+
+    async def _push(self, session_id: str, messages: List[Dict]):
+        """seq가 지정된 메시지를 버킷별로 추가 (버킷 내 seq 순서 유지)"""
+        now = datetime.now()
+        for bucket_no, items in self._group_by_bucket(messages).items():
+            update = {
+                "$push": {"messages": {"$each": items, "$sort": {"seq": 1}}},
+                "$inc": {"count": len(items)},
+                "$set": {"updated_at": now},
+                "$setOnInsert": {"created_at": now, "compacted": False}
+            }
+            try:
+                await self.buckets.update_one({"session_id": session_id, "bucket_no": bucket_no}, update, upsert=True)
+            except DuplicateKeyError:
+                # 다른 워커가 같은 버킷을 동시에 생성 - 생성된 버킷에 다시 추가
+                await self.buckets.update_one({"session_id": session_id, "bucket_no": bucket_no}, update)
+
+    def _group_by_bucket(self, messages: List[Dict]) -> Dict[int, List[Dict]]:
+        grouped: Dict[int, List[Dict]] = {}
+        for msg in messages:
+            grouped.setdefault(msg["seq"] // self.bucket_size, []).append(msg)
+        return grouped
+
+    async def recent(self, session_id: str, limit: int) -> List[Dict]:
+        """최근 메시지 limit개 (오래된 순)"""
+        if limit <= 0:
+            return []
+
+        # 마지막 버킷이 덜 찼을 수 있으므로 필요한 버킷 수 + 1개까지 조회
+        bucket_count = math.ceil(limit / self.bucket_size) + 1
+        cursor = self.buckets.find(
+            {"session_id": session_id},
+            {"_id": 0, "bucket_no": 1, "messages": {"$slice": -limit}, "packed": 1}
+        ).sort("bucket_no", -1).limit(bucket_count)
+
+        messages: List[Dict] = []
+        async for bucket in cursor:
+            messages = self._unpack(bucket)[-limit:] + messages
+            if len(messages) >= limit:
+                break
+        return messages[-limit:]
+
+    @staticmethod
+    def _unpack(bucket: Dict) -> List[Dict]:
+        """버킷 메시지 반환 (압축된 버킷은 해제)"""
+        if bucket.get("packed") is not None:
+            return bson.decode(zlib.decompress(bytes(bucket["packed"])))["messages"]
+        return bucket.get("messages", [])
+
+    async def save_summary(self, session_id: str, summary: str, summary_upto: int) -> bool:
+        """누적 요약 저장 (summary_upto = 요약에 포함된 메시지 수, 더 최신 요약은 덮어쓰지 않음)"""
+        result = await self.sessions.update_one(
+            {
+                "session_id": session_id,
+                "$or": [{"summary_upto": {"$exists": False}}, {"summary_upto": {"$lt": summary_upto}}]
+            },
+            {"$set": {"summary": summary, "summary_upto": summary_upto}}
+        )
+        return result.modified_count > 0
+
+    async def delete_session(self, session_id: str) -> bool:
+        """세션 문서와 메시지 버킷 삭제, 세션 문서가 있었는지 반환"""
+        await self.buckets.delete_many({"session_id": session_id})
+        result = await self.sessions.delete_one({"session_id": session_id})
+        return result.deleted_count > 0
+
+    async def migrate_legacy(self, session_id: str) -> int:
+        """세션 문서에 내장된 messages 배열을 버킷으로 이전, 이전한 메시지 수 반환"""
+        session_doc = await self.sessions.find_one(
+            {"session_id": session_id, "message_total": {"$exists": False}},
+            {"messages": 1}
+        )
+        if session_doc is None:
+            return 0
+
+        messages = [
+            {**msg, "seq": seq} for seq, msg in enumerate(session_doc.get("messages") or [])
+        ]
+
+        # 버킷 생성은 $setOnInsert만 사용하여 중단 후 재실행/동시 이전에도 중복되지 않음
+        now = datetime.now()
+        for bucket_no, items in self._group_by_bucket(messages).items():
+            await self.buckets.update_one(
+                {"session_id": session_id, "bucket_no": bucket_no},
+                {"$setOnInsert": {
+                    "messages": items,
+                    "count": len(items),
+                    "created_at": now,
+                    "updated_at": items[-1].get("timestamp") or now,
+                    "compacted": False
+                }},
+                upsert=True
+            )
+
+        questions = [msg["content"] for msg in messages if msg.get("role") == "human"]
+        await self.sessions.update_one(
+            {"session_id": session_id, "message_total": {"$exists": False}},
+            {
+                "$set": {
+                    "message_total": len(messages),
+                    "first_questions": questions[:FIRST_QUESTIONS_LIMIT]
+                },
+                "$unset": {"messages": ""}
+            }
+        )
+        return len(messages)
+
+    async def compact(self, batch_size: int = 100) -> Dict[str, int]:
+        """내장 메시지 이전 및 가득 찬 오래된 버킷 압축 (한 배치)"""
+        migrated = 0
+        legacy = await self.sessions.find(
+            {"message_total": {"$exists": False}}, {"session_id": 1}
+        ).limit(batch_size).to_list(batch_size)
+        for session_doc in legacy:
+            try:
+                await self.migrate_legacy(session_doc["session_id"])
+                migrated += 1
+            except Exception as e:
+                logger.warning(f"대화 기록 버킷 이전 실패 ({session_doc.get('session_id')}): {e}")
+
+        cutoff = datetime.now() - timedelta(seconds=settings.MEMORY_BUCKET_COMPACT_AFTER_SECONDS)
+        buckets = await self.buckets.find(
+            {"compacted": False, "count": {"$gte": self.bucket_size}, "updated_at": {"$lt": cutoff}},
+            {"messages": 1}
+        ).limit(batch_size).to_list(batch_size)
+        compacted = 0
+        for bucket in buckets:
+            packed = Binary(zlib.compress(bson.encode({"messages": bucket.get("messages", [])})))
+            result = await self.buckets.update_one(
+                {"_id": bucket["_id"], "compacted": False},
+                {"$set": {"packed": packed, "compacted": True}, "$unset": {"messages": ""}}
+            )
+            compacted += result.modified_count
+
+        return {"migrated": migrated, "compacted": compacted, "more": migrated >= batch_size or compacted >= batch_size}
+
+    async def run_compaction(self):
+        """주기적 압축 루프 (밀린 작업이 있으면 쉬지 않고 다음 배치 처리)"""
+        while True:
+            try:
+                result = await self.compact()
+                if result["migrated"] or result["compacted"]:
+                    logger.info(f"대화 기록 버킷 정리: 이전 {result['migrated']}개 세션, 압축 {result['compacted']}개 버킷")
+                if result["more"]:
+                    await asyncio.sleep(0)
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"대화 기록 버킷 정리 실패: {e}")
+            await asyncio.sleep(settings.MEMORY_BUCKET_COMPACT_INTERVAL_SECONDS)
+
+_compaction_task: Optional[asyncio.Task] = None
+
+async def start_chat_bucket_compaction(db: AsyncIOMotorDatabase):
+    """백그라운드 버킷 정리 시작 (앱 시작 시)"""
+    global _compaction_task
+    if settings.MEMORY_BUCKET_COMPACT_ENABLED and _compaction_task is None:
+        _compaction_task = asyncio.create_task(ChatMessageStore(db).run_compaction(), name="chat-bucket-compaction")
+
+async def stop_chat_bucket_compaction():
+    """백그라운드 버킷 정리 중지 (앱 종료 시)"""
+    global _compaction_task
+    if _compaction_task is not None:
+        _compaction_task.cancel()
+        await asyncio.gather(_compaction_task, return_exceptions=True)
+        _compaction_task = None
@@ -5,6 +5,7 @@ MODIFIED 2024-12-20: 새로운 컬렉션 구조에 맞게 인덱스 재설계
 """
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 from config.settings import settings
+from database.operations import DatabaseOperations
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -29,6 +30,9 @@ class DatabaseConnection:
             # 인덱스 생성
             await self.create_indexes()
             
+            # 카운터가 없는 기존 폴더 초기화
+            await self.initialize_folder_stats()
+            
         except Exception as e:
             logger.error(f"MongoDB 연결 실패: {e}")
             raise
@@ -39,6 +43,18 @@ class DatabaseConnection:
             self.client.close()
             logger.info("MongoDB 연결 해제")
     
+    async def initialize_folder_stats(self):
+        """폴더 카운터를 한 번도 계산하지 않은 폴더만 재계산"""
+        try:
+            folder_ids = [
+                str(folder["_id"])
+                async for folder in self.db.folders.find({"stats_rebuilt_at": {"$exists": False}}, {"_id": 1})
+            ]
+            if folder_ids:
+                await DatabaseOperations(self.db).rebuild_folder_stats(folder_ids)
+        except Exception as e:
+            logger.warning(f"폴더 카운터 초기화 실패: {e}")
+    
     async def create_indexes(self):
         """필요한 인덱스 생성"""
         try:
@@ -47,12 +63,23 @@ class DatabaseConnection:
             await self.db.folders.create_index("title")
             await self.db.folders.create_index("created_at")
             await self.db.folders.create_index("last_accessed_at")
+            await self.db.folders.create_index([("last_accessed_at", -1), ("_id", -1)])  # 최근 접근순 목록
             
             # documents 컬렉션 인덱스 (새로운 구조)
             await self.db.documents.create_index("folder_id")
             await self.db.documents.create_index("chunk_sequence")
             await self._create_text_index("documents", "raw_text")
             await self.db.documents.create_index("created_at")
+            await self.db.documents.create_index("content_hash")  # 동일 내용 업로드 재사용
+            await self.db.documents.create_index("search_indexed_at")  # 파일 검색 인덱스 백필 대상 조회
+            
+            # file_search_grams 컬렉션 인덱스 (파일명/본문 2-gram 게시 목록)
+            await self.db.file_search_grams.create_index([("gram", 1), ("field", 1), ("folder_id", 1), ("file_id", 1)])
+            # 검색 페이지 키셋 조회 (gram별 출현 수 내림차순 → file_id, 폴더 필터 유무별)
+            await self.db.file_search_grams.create_index([("gram", 1), ("field", 1), ("count", -1), ("file_id", 1)])
+            await self.db.file_search_grams.create_index([("gram", 1), ("field", 1), ("folder_id", 1), ("count", -1), ("file_id", 1)])
+            await self.db.file_search_grams.create_index("file_id")
+            await self.db.file_search_grams.create_index("folder_id")
             
             # chunks 컬렉션 인덱스 (기존 유지하되 개선)
             await self.db.chunks.create_index("folder_id")
@@ -91,6 +118,13 @@ class DatabaseConnection:
             await self.db.labels.create_index("confidence_score")
             await self.db.labels.create_index("created_at")
             
+            # chat_sessions 컬렉션 인덱스 (대화 세션 지연 로드/목록 조회)
+            await self.db.chat_sessions.create_index("session_id")
+            await self.db.chat_sessions.create_index([("last_activity", -1)])
+            await self.db.chat_sessions.create_index("message_total")  # 내장 메시지 이전 대상 조회
+            await self.db.chat_message_buckets.create_index([("session_id", 1), ("bucket_no", -1)], unique=True)
+            await self.db.chat_message_buckets.create_index([("compacted", 1), ("updated_at", 1)])
+            
             # quiz_sessions 컬렉션 인덱스 (QA 기능용 - 새로 추가)
             await self.db.quiz_sessions.create_index("session_id", unique=True)
             await self.db.quiz_sessions.create_index("folder_id")
@@ -134,6 +168,15 @@ class DatabaseConnection:
             await self.db.highlights.create_index("created_at")
             await self._create_text_index("highlights", "highlight_text")
             
+            # ingestion_jobs 컬렉션 인덱스 (적재 작업 큐)
+            await self.db.ingestion_jobs.create_index([("status", 1), ("next_run_at", 1)])
+            await self.db.ingestion_jobs.create_index([("file_id", 1), ("created_at", -1)])
+            await self.db.ingestion_jobs.create_index([("content_hash", 1), ("folder_id", 1)])
+            
+            # embedding_cache 컬렉션 인덱스 (_id = "모델:sha256")
+            await self.db.embedding_cache.create_index("model")
+            await self.db.embedding_cache.create_index("created_at")
+            
             logger.info("인덱스 생성 완료")
             
         except Exception as e:
@@ -18,8 +18,12 @@ from config.settings import settings
 # 청킹과 임베딩을 위한 추가 import
 from data_processing.chunker import TextChunker
 from data_processing.embedder import TextEmbedder
+from data_processing.embedding_codec import encode_embedding
 from data_processing.preprocessor import TextPreprocessor
 from ai_processing.auto_labeler import AutoLabeler
+from database.operations import DatabaseOperations
+from retrieval.file_search_index import remove_file_search_index, sync_file_search_index
+from retrieval.index_sync import on_chunks_inserted, on_document_updated
 
 logger = get_logger(__name__)
 
@@ -28,12 +32,13 @@ class OCRBridge:
     
     def __init__(self, rag_db: AsyncIOMotorDatabase):
         self.rag_db = rag_db
+        self.db_ops = DatabaseOperations(rag_db)
         self.ocr_client = None
         self.ocr_db = None
         
         # 문서 처리 컴포넌트 추가
         self.chunker = TextChunker()
-        self.embedder = TextEmbedder()
+        self.embedder = TextEmbedder(feature="ocr_ingestion")
         self.preprocessor = TextPreprocessor()
         self.auto_labeler = AutoLabeler()
         
@@ -405,6 +410,7 @@ class OCRBridge:
             # 1. documents 컬렉션에 저장
             document_result = await self.rag_db.documents.insert_one(rag_doc)
             document_id = document_result.inserted_id
+            await sync_file_search_index(self.rag_db, rag_doc["file_metadata"]["file_id"])
             
             # 2. 청킹 및 임베딩 처리
             file_id = rag_doc["file_metadata"]["file_id"]
@@ -450,13 +456,13 @@ class OCRBridge:
                     "chunk_id": f"{file_id}_chunk_{i}",
                     "sequence": i,
                     "text": chunk["text"],
-                    "text_embedding": chunk["text_embedding"],
+                    "text_embedding": encode_embedding(chunk["text_embedding"]),
                     "folder_id": rag_doc["folder_id"],
                     "metadata": {
                         "source": rag_doc["file_metadata"]["original_filename"],
                         "file_type": rag_doc["file_metadata"]["file_type"],
                         "folder_id": rag_doc["folder_id"],
-                        "chunk_method": "sliding_window",
+                        "chunk_method": chunk.get("metadata", {}).get("chunk_method", self.chunker.strategy),
                         "chunk_size": chunk.get("metadata", {}).get("chunk_size", self.chunker.chunk_size),
                         "chunk_overlap": chunk.get("metadata", {}).get("chunk_overlap", self.chunker.chunk_overlap)
                     },
@@ -466,6 +472,7 @@ class OCRBridge:
             
             # 배치 저장
             await self.rag_db.chunks.insert_many(chunk_records)
+            on_chunks_inserted(chunk_records)
             
             # documents 컬렉션 업데이트 (청킹 완료 표시)
             await self.rag_db.documents.update_one(
@@ -583,9 +590,11 @@ class OCRBridge:
                             processed_count += 1
                         
                         # 폴더 카운트 업데이트
-                        await self.rag_db.folders.update_one(
-                            {"_id": ObjectId(folder_id)},
-                            {"$inc": {"document_count": 1, "file_count": 1}}
+                        await self.db_ops.mark_document_counted(
+                            rag_doc["file_metadata"]["file_id"],
+                            folder_id,
+                            process_result["chunks_count"],
+                            rag_doc["file_metadata"]["file_size"]
                         )
                         
                 except Exception as e:
@@ -682,9 +691,11 @@ class OCRBridge:
                         logger.info(f"완전 동기화 완료: OCR ID {ocr_doc['_id']} -> 폴더: {doc_title} ({process_result['chunks_count']}개 청크)")
                         
                         # 폴더 카운트 업데이트
-                        await self.rag_db.folders.update_one(
-                            {"_id": ObjectId(folder_id)},
-                            {"$inc": {"document_count": 1, "file_count": 1}}
+                        await self.db_ops.mark_document_counted(
+                            rag_doc["file_metadata"]["file_id"],
+                            folder_id,
+                            process_result["chunks_count"],
+                            rag_doc["file_metadata"]["file_size"]
                         )
                     else:
                         logger.debug(f"이미 동기화됨: OCR ID {ocr_doc['_id']}")
@@ -728,16 +739,25 @@ class OCRBridge:
                 await self.connect_ocr_db()
             
             # 기존 OCR 브릿지 데이터 모두 삭제
+            ocr_file_ids = await self.rag_db.documents.distinct(
+                "file_metadata.file_id", {"data_source": "ocr_bridge"}
+            )
             delete_result = await self.rag_db.documents.delete_many({
                 "data_source": "ocr_bridge"
             })
             logger.info(f"기존 OCR 브릿지 데이터 {delete_result.deleted_count}개 삭제")
+            on_document_updated()
+            await remove_file_search_index(self.rag_db, ocr_file_ids)
             
             # 기존 OCR 폴더들의 카운트 초기화
             await self.rag_db.folders.update_many(
                 {"folder_type": "ocr"},
-                {"$set": {"document_count": 0, "file_count": 0}}
+                {
+                    "$set": {"document_count": 0, "file_count": 0, "chunk_count": 0, "total_size": 0},
+                    "$inc": {"content_version": 1}
+                }
             )
+            await self.db_ops.bump_global_content_version()
             
             # 모든 OCR 데이터 조회
             all_ocr_docs = await self.ocr_db.texts.find({}).to_list(None)
@@ -778,6 +798,7 @@ class OCRBridge:
                     # 모든 데이터를 새로 동기화 (중복 체크 없음)
                     rag_doc = self.convert_ocr_to_rag_format(ocr_doc, folder_id)
                     await self.rag_db.documents.insert_one(rag_doc)
+                    await sync_file_search_index(self.rag_db, rag_doc["file_metadata"]["file_id"])
                     synced_count += 1
                     
                     # 폴더별 카운트 추적
@@ -790,18 +811,12 @@ class OCRBridge:
                 except Exception as e:
                     logger.warning(f"문서 재동기화 실패 {ocr_doc['_id']}: {e}")
             
-            # 각 폴더의 카운트 업데이트
-            for folder_id, count in folder_counts.items():
+            # 각 폴더의 카운트 재계산 (청킹 전 문서는 process_ocr_documents_for_search에서 반영)
+            await self.db_ops.rebuild_folder_stats(list(folder_counts))
+            for folder_id in folder_counts:
                 await self.rag_db.folders.update_one(
                     {"_id": ObjectId(folder_id)},
-                    {
-                        "$set": {
-                            "document_count": count,
-                            "file_count": count,
-                            "last_accessed_at": current_time,
-                            "updated_at": current_time
-                        }
-                    }
+                    {"$set": {"last_accessed_at": current_time, "updated_at": current_time}}
                 )
             
             # 동기화 시점 기록
@@ -897,13 +912,13 @@ class OCRBridge:
                             "chunk_id": f"{file_id}_chunk_{i}",
                             "sequence": i,
                             "text": chunk["text"],
-                            "text_embedding": chunk["text_embedding"],
+                            "text_embedding": encode_embedding(chunk["text_embedding"]),
                             "folder_id": doc["folder_id"],
                             "metadata": {
                                 "source": doc["file_metadata"]["original_filename"],
                                 "file_type": doc["file_metadata"]["file_type"],
                                 "folder_id": doc["folder_id"],
-                                "chunk_method": "sliding_window",
+                                "chunk_method": chunk.get("metadata", {}).get("chunk_method", self.chunker.strategy),
                                 "chunk_size": chunk.get("metadata", {}).get("chunk_size", self.chunker.chunk_size),
                                 "chunk_overlap": chunk.get("metadata", {}).get("chunk_overlap", self.chunker.chunk_overlap)
                             },
@@ -913,6 +928,7 @@ class OCRBridge:
                     
                     # 배치 저장
                     await self.rag_db.chunks.insert_many(chunk_records)
+                    on_chunks_inserted(chunk_records)
                     
                     # documents 컬렉션 업데이트 (청킹 완료 표시)
                     await self.rag_db.documents.update_one(
@@ -926,6 +942,12 @@ class OCRBridge:
                             }
                         }
                     )
+                    await self.db_ops.mark_document_counted(
+                        file_id,
+                        doc.get("folder_id"),
+                        len(chunk_records),
+                        doc["file_metadata"].get("file_size", 0)
+                    )
                     
                     # 자동 라벨링 실행
                     try:
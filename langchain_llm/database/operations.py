@@ -2,6 +2,8 @@
 데이터베이스 작업 모듈
 공통 CRUD 작업
 MODIFIED 2024-12-20: 새로운 컬렉션 구조에 맞는 특화 메서드 추가
+ENHANCED: 폴더 카운터(문서/파일/청크/용량, content_version) 원자적 유지 및 재계산
+ENHANCED: 전체 내용 버전 카운터 (content_versions 컬렉션, 폴더 없는 문서 변경 포함)
 """
 from typing import Dict, List, Optional
 from datetime import datetime
@@ -12,6 +14,9 @@ import hashlib
 
 logger = get_logger(__name__)
 
+# content_versions 컬렉션의 전체 내용 버전 문서 _id (어느 폴더든, 폴더 없는 문서든 내용이 바뀌면 증가)
+GLOBAL_CONTENT_VERSION_ID = "global"
+
 class DatabaseOperations:
     """데이터베이스 작업 클래스"""
     
@@ -142,12 +147,20 @@ class DatabaseOperations:
     async def create_folder(self, title: str, folder_type: str = "library", cover_image_url: Optional[str] = None) -> str:
         """폴더 생성"""
         try:
+            now = datetime.utcnow()
             folder_doc = {
                 "title": title,
                 "folder_type": folder_type,
-                "created_at": datetime.utcnow(),
-                "last_accessed_at": datetime.utcnow(),
-                "cover_image_url": cover_image_url
+                "created_at": now,
+                "last_accessed_at": now,
+                "cover_image_url": cover_image_url,
+                # 폴더 카운터 (적재/삭제 경로에서 $inc로 유지)
+                "document_count": 0,
+                "file_count": 0,
+                "chunk_count": 0,
+                "total_size": 0,
+                "content_version": 0,
+                "stats_rebuilt_at": now
             }
             
             folder_id = await self.insert_one("folders", folder_doc)
@@ -182,6 +195,135 @@ class DatabaseOperations:
             logger.error(f"폴더 접근 시간 업데이트 실패: {e}")
             return False
     
+    async def increment_folder_stats(
+        self,
+        folder_id: Optional[str],
+        documents: int = 0,
+        files: int = 0,
+        chunks: int = 0,
+        size: int = 0
+    ) -> bool:
+        """폴더 카운터 원자적 증감 (content_version도 함께 증가시켜 폴더 내용 변경을 표시)"""
+        # 폴더가 없는 문서 변경도 전체 내용 버전에는 반영
+        await self.bump_global_content_version()
+        if not folder_id or not ObjectId.is_valid(folder_id):
+            return False
+        try:
+            result = await self.db.folders.update_one(
+                {"_id": ObjectId(folder_id)},
+                {"$inc": {
+                    "document_count": documents,
+                    "file_count": files,
+                    "chunk_count": chunks,
+                    "total_size": size,
+                    "content_version": 1
+                }}
+            )
+            return result.modified_count > 0
+        except Exception as e:
+            # 카운터 갱신 실패는 치명적이지 않음 - rebuild_folder_stats로 재계산 가능
+            logger.warning(f"폴더 카운터 갱신 실패 {folder_id}: {e}")
+            return False
+    
+    async def bump_global_content_version(self):
+        """전체 내용 버전 증가 (folder_id 없는 질의의 답변 캐시 무효화용)"""
+        try:
+            await self.db.content_versions.update_one(
+                {"_id": GLOBAL_CONTENT_VERSION_ID},
+                {"$inc": {"version": 1}},
+                upsert=True
+            )
+        except Exception as e:
+            # 갱신 실패 시 전체 폴더 답변 캐시는 TTL로 만료
+            logger.warning(f"전체 내용 버전 갱신 실패: {e}")
+    
+    async def mark_document_counted(self, file_id: str, folder_id: Optional[str], chunks_count: int, file_size: int):
+        """적재 완료 문서를 폴더 카운터에 반영 (문서에 counted_folder_id 기록)"""
+        result = await self.db.documents.update_one(
+            {"file_metadata.file_id": file_id, "counted_folder_id": {"$exists": False}},
+            {"$set": {"counted_folder_id": folder_id}}
+        )
+        if result.modified_count:
+            await self.increment_folder_stats(folder_id, documents=1, files=1, chunks=chunks_count, size=file_size)
+    
+    async def delete_documents_with_stats(self, filter_dict: Dict) -> int:
+        """문서 삭제 후 카운터에 반영된 문서만 폴더 카운터 차감 (문서별 원자적 삭제로 중복 차감 방지)"""
+        projection = {"counted_folder_id": 1, "chunks_count": 1, "file_metadata.file_size": 1}
+        deleted = 0
+        while True:
+            document = await self.db.documents.find_one_and_delete(filter_dict, projection=projection)
+            if document is None:
+                return deleted
+            deleted += 1
+            if "counted_folder_id" in document:
+                await self.increment_folder_stats(
+                    document["counted_folder_id"],
+                    documents=-1,
+                    files=-1,
+                    chunks=-document.get("chunks_count", 0),
+                    size=-document.get("file_metadata", {}).get("file_size", 0)
+                )
+    
+    async def move_document_stats(self, file_id: str, folder_id: Optional[str]):
+        """문서 폴더 이동 시 이전 폴더 카운터 차감 후 새 폴더에 반영"""
+        document = await self.db.documents.find_one_and_update(
+            {"file_metadata.file_id": file_id, "counted_folder_id": {"$exists": True, "$ne": folder_id}},
+            {"$set": {"counted_folder_id": folder_id}},
+            projection={"counted_folder_id": 1, "chunks_count": 1, "file_metadata.file_size": 1}
+        )
+        if document is None:
+            return
+        chunks = document.get("chunks_count", 0)
+        size = document.get("file_metadata", {}).get("file_size", 0)
+        await self.increment_folder_stats(document["counted_folder_id"], documents=-1, files=-1, chunks=-chunks, size=-size)
+        await self.increment_folder_stats(folder_id, documents=1, files=1, chunks=chunks, size=size)
+    
+    async def rebuild_folder_stats(self, folder_ids: Optional[List[str]] = None) -> int:
+        """documents 컬렉션 기준으로 폴더 카운터 재계산 (한 번의 집계), 갱신한 폴더 수 반환
+
+        청크가 저장된(적재 완료) 문서만 집계하며, 적재 중인 문서는 완료 시 mark_document_counted로 반영
+        """
+        match = {"folder_id": {"$in": folder_ids}} if folder_ids is not None else {"folder_id": {"$nin": [None, ""]}}
+        match["chunks_count"] = {"$gt": 0}
+        pipeline = [
+            {"$match": match},
+            {"$group": {
+                "_id": "$folder_id",
+                "document_count": {"$sum": 1},
+                "file_ids": {"$addToSet": "$file_metadata.file_id"},
+                "chunk_count": {"$sum": {"$ifNull": ["$chunks_count", 0]}},
+                "total_size": {"$sum": {"$ifNull": ["$file_metadata.file_size", 0]}}
+            }}
+        ]
+        stats = {}
+        async for row in self.db.documents.aggregate(pipeline):
+            stats[row["_id"]] = {
+                "document_count": row["document_count"],
+                "file_count": len(row["file_ids"]),
+                "chunk_count": row["chunk_count"],
+                "total_size": row["total_size"]
+            }
+        
+        folder_filter = {"_id": {"$in": [ObjectId(fid) for fid in folder_ids if ObjectId.is_valid(fid)]}} if folder_ids is not None else {}
+        empty = {"document_count": 0, "file_count": 0, "chunk_count": 0, "total_size": 0}
+        updated = 0
+        async for folder in self.db.folders.find(folder_filter, {"_id": 1}):
+            folder_id = str(folder["_id"])
+            await self.db.folders.update_one(
+                {"_id": folder["_id"]},
+                {"$set": {**stats.get(folder_id, empty), "stats_rebuilt_at": datetime.utcnow()}, "$inc": {"content_version": 1}}
+            )
+            await self.db.documents.update_many(
+                {"folder_id": folder_id, "chunks_count": {"$gt": 0}},
+                {"$set": {"counted_folder_id": folder_id}}
+            )
+            updated += 1
+        
+        if updated:
+            await self.bump_global_content_version()
+        logger.info(f"폴더 카운터 재계산 완료: {updated}개 폴더")
+        return updated
+    
     async def save_summary_cache(
         self,
         summary: str,
@@ -16,16 +16,23 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import uvicorn
 
+from ai_processing.openai_clients import openai_clients
 from config.settings import settings
-from database.connection import init_db, close_db
+from database.connection import init_db, close_db, get_database
+from database.chat_message_store import start_chat_bucket_compaction, stop_chat_bucket_compaction
+from data_processing.ingestion_jobs import start_ingestion_workers, stop_ingestion_workers
+from data_processing.loader import shutdown_parse_pool
+from retrieval.file_search_index import start_file_search_backfill, stop_file_search_backfill
 from api.routers import query, summary, quiz, keywords, mindmap, recommend, upload, folders
 from api.routers import ocr_bridge, quiz_qa, reports
 from api.routers import memos, highlights
 from utils.logger import setup_logger
+from utils.metrics import MetricsRouteMiddleware, metrics
 
 # 로거 설정
 logger = setup_logger()
@@ -38,8 +45,18 @@ async def lifespan(app: FastAPI):
     logger.info(f"YouTube API 키 설정 상태: {'설정됨' if os.getenv('YOUTUBE_API_KEY') else '설정 안됨'}")
     logger.info(f"OCR DB 연결 설정 상태: {'설정됨' if settings.OCR_MONGODB_URI else '기본값 사용'}")
     await init_db()
+    openai_clients.startup()
+    await start_ingestion_workers(await get_database())
+    await start_file_search_backfill(await get_database())
+    await start_chat_bucket_compaction(await get_database())
     yield
     # 종료 시
+    await stop_ingestion_workers()
+    await stop_file_search_backfill()
+    await query.shutdown_agent_hub()
+    await stop_chat_bucket_compaction()
+    shutdown_parse_pool()
+    await openai_clients.aclose()
     await close_db()
     logger.info("RAG 백엔드 서버 종료")
 
@@ -59,6 +76,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# 메트릭 route 레이블용 (요청 scope를 컨텍스트에 보관)
+app.add_middleware(MetricsRouteMiddleware)
 
 # 라우터 등록
 app.include_router(folders.router, prefix="/folders", tags=["Folders"])
@@ -85,6 +104,11 @@ async def root():
         "ocr_integration": "OCR Bridge 사용 (기존 데이터 안전 보존)"
     }
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics():
+    """Prometheus 형식 메트릭 엔드포인트 (OpenAI 호출 지연/토큰/추정 비용/오류, 캐시 적중)"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
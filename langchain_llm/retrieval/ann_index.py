@@ -0,0 +1,503 @@
+"""
+ANN 인덱스 모듈
+chunks.text_embedding 기반 폴더별 인메모리 근사 최근접 이웃(ANN) 인덱스
+- IVFFlatIndex: 순수 NumPy 구현 (구면 k-means 조대 양자화 + 리스트 탐색)
+- HNSWIndex: hnswlib가 설치된 경우 사용 가능한 선택적 백엔드
+- 파티션 구축(행렬 변환, k-means, 리스트 배정)은 스레드에서 실행하고 완료 후 교체
+- 증분 추가/삭제로 압축·재학습이 필요해지면 파티션에 표시만 하고 다음 검색 시 같은 경로로 재구축
+"""
+import asyncio
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from config.settings import settings
+from retrieval.scoring import normalize_rows, normalize_vector, stack_embeddings, top_k_indices
+from utils.logger import get_logger
+
+try:
+    import hnswlib
+except ImportError:  # 선택적 의존성
+    hnswlib = None
+
+logger = get_logger(__name__)
+
+# folder_id가 없는 청크용 파티션 키
+NO_FOLDER_KEY = "__none__"
+
+class BaseANNIndex:
+    """ANN 인덱스 공통 기반 클래스 (벡터/ID 저장 및 파일 단위 관리)"""
+
+    def __init__(self, dimension: Optional[int] = None):
+        self.dimension = dimension
+        self._vectors = np.zeros((0, dimension or 0), dtype=np.float32)
+        self._ids: List = []
+        self._file_ids: List[str] = []
+        self._alive = np.zeros(0, dtype=bool)
+        self._file_positions: Dict[str, List[int]] = {}
+        self._dead_count = 0
+        # 삭제/증가로 재구축(압축, 재학습)이 필요함 - 관리자가 스레드에서 다시 구축
+        self.needs_rebuild = False
+
+    def __len__(self) -> int:
+        return len(self._ids) - self._dead_count
+
+    def _append(self, ids: List, file_ids: List[str], vectors: np.ndarray) -> np.ndarray:
+        """벡터 저장소에 추가하고 새 위치 배열 반환"""
+        vectors = normalize_rows(np.array(vectors, dtype=np.float32, order="C"))
+        if self.dimension is None or len(self._ids) == 0:
+            self.dimension = vectors.shape[1]
+            self._vectors = vectors
+        else:
+            self._vectors = np.vstack([self._vectors, vectors])
+
+        start = len(self._ids)
+        positions = np.arange(start, start + len(ids))
+        self._ids.extend(ids)
+        self._file_ids.extend(file_ids)
+        self._alive = np.concatenate([self._alive, np.ones(len(ids), dtype=bool)])
+        for pos, file_id in zip(positions, file_ids):
+            self._file_positions.setdefault(file_id, []).append(int(pos))
+        return positions
+
+    def build(self, ids: List, file_ids: List[str], vectors: np.ndarray):
+        """인덱스 전체 (재)구축"""
+        raise NotImplementedError
+
+    def add(self, ids: List, file_ids: List[str], vectors: np.ndarray):
+        """벡터 추가"""
+        raise NotImplementedError
+
+    def _search_candidates(self, query: np.ndarray, k: int) -> np.ndarray:
+        """조대 탐색으로 후보 위치 배열 반환"""
+        raise NotImplementedError
+
+    def remove_files(self, file_ids: Iterable[str]) -> int:
+        """파일 단위 벡터 제거 (툼스톤 처리)"""
+        positions = []
+        for file_id in file_ids:
+            positions.extend(self._file_positions.pop(file_id, []))
+        return self._tombstone(positions)
+
+    def remove_chunks(self, file_id: str, chunk_ids: Iterable) -> int:
+        """파일의 일부 청크 벡터 제거 (툼스톤 처리, 해당 파일의 위치만 확인)"""
+        chunk_ids = set(chunk_ids)
+        positions = self._file_positions.get(file_id, [])
+        removed = [pos for pos in positions if self._ids[pos] in chunk_ids]
+        if not removed:
+            return 0
+        remaining = [pos for pos in positions if self._ids[pos] not in chunk_ids]
+        if remaining:
+            self._file_positions[file_id] = remaining
+        else:
+            self._file_positions.pop(file_id, None)
+        return self._tombstone(removed)
+
+    def _tombstone(self, positions: Iterable[int]) -> int:
+        """위치들을 삭제 표시하고 삭제된 수 반환"""
+        removed = 0
+        for pos in positions:
+            if self._alive[pos]:
+                self._alive[pos] = False
+                removed += 1
+        self._dead_count += removed
+
+        # 삭제 비율이 높으면 압축 재구축 표시 (이벤트 루프에서 재구축하지 않음)
+        if self._ids and self._dead_count > len(self._ids) * 0.3:
+            self.needs_rebuild = True
+        return removed
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int,
+        file_id: Optional[str] = None,
+        exclude_ids: Optional[Set] = None
+    ) -> List[Tuple[object, float]]:
+        """유사도 상위 k개 (id, score) 반환"""
+        if len(self) == 0 or k <= 0:
+            return []
+
+        query = normalize_vector(query)
+        if not query.any():
+            return []
+
+        extra = len(exclude_ids) if exclude_ids else 0
+        if file_id is not None:
+            # 파일 필터: 해당 파일의 벡터만 정확히 비교 (폴더 크기와 무관)
+            candidates = np.asarray(self._file_positions.get(file_id, []), dtype=np.int64)
+        else:
+            candidates = self._search_candidates(query, k + extra)
+
+        if candidates.size == 0:
+            return []
+
+        candidates = candidates[self._alive[candidates]]
+        if exclude_ids:
+            candidates = np.asarray(
+                [pos for pos in candidates if self._ids[pos] not in exclude_ids],
+                dtype=np.int64
+            )
+        if candidates.size == 0:
+            return []
+
+        scores = self._vectors[candidates] @ query
+        top = top_k_indices(scores, k)
+        return [(self._ids[candidates[i]], float(scores[i])) for i in top]
+
+class IVFFlatIndex(BaseANNIndex):
+    """역파일(IVF) 인덱스 - 구면 k-means 중심점으로 분할 후 nprobe개 리스트만 탐색"""
+
+    def __init__(
+        self,
+        dimension: Optional[int] = None,
+        nprobe: int = None,
+        min_train_size: int = None,
+        kmeans_iterations: int = 8
+    ):
+        super().__init__(dimension)
+        self.nprobe = nprobe or settings.ANN_IVF_NPROBE
+        self.min_train_size = min_train_size or settings.ANN_INDEX_MIN_TRAIN_SIZE
+        self.kmeans_iterations = kmeans_iterations
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[List[int]] = []
+        self._trained_size = 0
+
+    def build(self, ids: List, file_ids: List[str], vectors: np.ndarray):
+        """저장소 초기화 후 중심점 학습 및 리스트 배정"""
+        self.__init__(
+            dimension=self.dimension,
+            nprobe=self.nprobe,
+            min_train_size=self.min_train_size,
+            kmeans_iterations=self.kmeans_iterations
+        )
+        if len(ids) == 0:
+            return
+        self._append(ids, file_ids, vectors)
+        self._train()
+
+    def _train(self):
+        """구면 k-means로 중심점 학습"""
+        alive_positions = np.nonzero(self._alive)[0]
+        n = alive_positions.size
+        self._trained_size = n
+
+        if n < self.min_train_size:
+            # 작은 파티션은 전체 비교가 더 빠름
+            self._centroids = None
+            self._lists = []
+            return
+
+        nlist = max(1, int(np.sqrt(n)))
+        rng = np.random.default_rng(42)
+        sample_size = min(n, nlist * 40)
+        sample = self._vectors[rng.choice(alive_positions, sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+        for _ in range(self.kmeans_iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = sample[assignment == c]
+                if len(members):
+                    centroids[c] = members.sum(axis=0)
+            centroids = normalize_rows(centroids)
+
+        self._centroids = centroids
+        self._lists = [[] for _ in range(nlist)]
+        self._assign(alive_positions)
+
+    def _assign(self, positions: np.ndarray):
+        """위치들을 가장 가까운 중심점 리스트에 배정"""
+        if self._centroids is None or positions.size == 0:
+            return
+        assignment = np.argmax(self._vectors[positions] @ self._centroids.T, axis=1)
+        for pos, c in zip(positions, assignment):
+            self._lists[c].append(int(pos))
+
+    def add(self, ids: List, file_ids: List[str], vectors: np.ndarray):
+        """벡터 추가 (학습이 필요하거나 학습 시점 대비 2배 이상 커지면 재구축 표시, 그때까지는 기존 리스트에 배정)"""
+        if len(ids) == 0:
+            return
+        positions = self._append(ids, file_ids, vectors)
+        self._assign(positions)
+
+        if self._centroids is None:
+            if len(self) >= self.min_train_size:
+                self.needs_rebuild = True
+        elif len(self) > self._trained_size * 2:
+            self.needs_rebuild = True
+
+    def _search_candidates(self, query: np.ndarray, k: int) -> np.ndarray:
+        if self._centroids is None:
+            return np.nonzero(self._alive)[0]
+
+        nlist = len(self._lists)
+        nprobe = min(self.nprobe, nlist)
+        while True:
+            centroid_scores = self._centroids @ query
+            probe = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+            candidates = np.fromiter(
+                (pos for c in probe for pos in self._lists[c]),
+                dtype=np.int64
+            )
+            # 후보가 k보다 적으면 탐색 범위 확장
+            if np.count_nonzero(self._alive[candidates]) >= k or nprobe >= nlist:
+                return candidates
+            nprobe = min(nlist, nprobe * 2)
+
+class HNSWIndex(BaseANNIndex):
+    """hnswlib 기반 HNSW 그래프 인덱스 (선택적 의존성)"""
+
+    def __init__(self, dimension: Optional[int] = None, ef_search: int = 64, m: int = 16):
+        if hnswlib is None:
+            raise ImportError("HNSW 백엔드를 사용하려면 hnswlib 패키지가 필요합니다")
+        super().__init__(dimension)
+        self.ef_search = ef_search
+        self.m = m
+        self._graph = None
+
+    def build(self, ids: List, file_ids: List[str], vectors: np.ndarray):
+        self.__init__(dimension=self.dimension, ef_search=self.ef_search, m=self.m)
+        self.add(ids, file_ids, vectors)
+
+    def add(self, ids: List, file_ids: List[str], vectors: np.ndarray):
+        if len(ids) == 0:
+            return
+        positions = self._append(ids, file_ids, vectors)
+
+        if self._graph is None:
+            self._graph = hnswlib.Index(space="ip", dim=self.dimension)
+            self._graph.init_index(max_elements=max(1024, len(self._ids) * 2), ef_construction=200, M=self.m)
+            self._graph.set_ef(self.ef_search)
+        elif len(self._ids) > self._graph.get_max_elements():
+            self._graph.resize_index(len(self._ids) * 2)
+
+        self._graph.add_items(self._vectors[positions], positions)
+
+    def _tombstone(self, positions: Iterable[int]) -> int:
+        positions = list(positions)
+        removed = super()._tombstone(positions)
+        if self._graph is not None:
+            for pos in positions:
+                try:
+                    self._graph.mark_deleted(pos)
+                except RuntimeError:
+                    pass
+        return removed
+
+    def _search_candidates(self, query: np.ndarray, k: int) -> np.ndarray:
+        if self._graph is None:
+            return np.zeros(0, dtype=np.int64)
+        n = min(len(self), max(k, self.ef_search))
+        labels, _ = self._graph.knn_query(query, k=n)
+        return labels[0].astype(np.int64)
+
+def create_index(backend: Optional[str] = None) -> BaseANNIndex:
+    """설정된 백엔드로 인덱스 생성"""
+    backend = (backend or settings.ANN_INDEX_BACKEND).lower()
+    if backend == "hnsw":
+        if hnswlib is not None:
+            return HNSWIndex()
+        logger.warning("hnswlib 미설치로 IVF 인덱스를 사용합니다")
+    return IVFFlatIndex()
+
+class _Partition:
+    """폴더 단위 인덱스 파티션"""
+
+    def __init__(self, index: BaseANNIndex):
+        self.index = index
+        self.built_at = time.monotonic()
+
+class ANNIndexManager:
+    """folder_id 단위로 분할된 ANN 인덱스 관리자 (프로세스 전역)"""
+
+    def __init__(self):
+        self._partitions: Dict[str, _Partition] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        # 구축 중인 파티션 키 -> 구축 중 발생한 변경 기록 (완료 후 새 인덱스에 재적용)
+        self._building: Dict[str, Dict] = {}
+
+    @staticmethod
+    def _key(folder_id: Optional[str]) -> str:
+        return folder_id if folder_id else NO_FOLDER_KEY
+
+    def _is_fresh(self, partition: _Partition) -> bool:
+        if partition.index.needs_rebuild:
+            return False
+        return time.monotonic() - partition.built_at < settings.ANN_INDEX_REFRESH_SECONDS
+
+    async def get_partition(self, db: AsyncIOMotorDatabase, folder_id: Optional[str]) -> BaseANNIndex:
+        """폴더 파티션 반환 (없거나 오래되었으면 chunks 컬렉션에서 구축)"""
+        key = self._key(folder_id)
+        partition = self._partitions.get(key)
+        if partition and self._is_fresh(partition):
+            return partition.index
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        if partition and lock.locked():
+            # 재구축 중에는 기존 파티션으로 응답 (구축 완료 시 교체)
+            return partition.index
+
+        async with lock:
+            partition = self._partitions.get(key)
+            if partition and self._is_fresh(partition):
+                return partition.index
+
+            changes = {"events": [], "invalidated": False}
+            self._building[key] = changes
+            try:
+                index = await self._build_partition(db, folder_id, changes)
+            finally:
+                self._building.pop(key, None)
+
+            partition = _Partition(index)
+            if changes["invalidated"]:
+                # 구축 중 무효화되었으면 교체는 하되 다음 접근 시 다시 구축
+                partition.built_at = float("-inf")
+            self._partitions[key] = partition
+            return index
+
+    async def _build_partition(
+        self,
+        db: AsyncIOMotorDatabase,
+        folder_id: Optional[str],
+        changes: Dict
+    ) -> BaseANNIndex:
+        """chunks 컬렉션에서 임베딩만 조회하여 파티션 구축 (조회는 이벤트 루프, 구축은 스레드)"""
+        start_time = time.monotonic()
+        match_filter = {"folder_id": folder_id} if folder_id else {"folder_id": {"$in": [None, ""]}}
+        match_filter["text_embedding"] = {"$exists": True}
+
+        ids, file_ids, vectors = [], [], []
+        cursor = db.chunks.find(match_filter, {"_id": 1, "file_id": 1, "text_embedding": 1})
+        async for chunk in cursor:
+            ids.append(chunk["_id"])
+            file_ids.append(chunk.get("file_id"))
+            vectors.append(chunk["text_embedding"])
+
+        index = await asyncio.to_thread(self._build_index, ids, file_ids, vectors)
+        self._replay_changes(index, ids, file_ids, changes["events"])
+
+        logger.info(
+            f"ANN 파티션 구축 완료: folder={self._key(folder_id)}, "
+            f"{len(ids)}개 벡터, {time.monotonic() - start_time:.2f}초"
+        )
+        return index
+
+    @staticmethod
+    def _build_index(ids: List, file_ids: List[str], vectors: List) -> BaseANNIndex:
+        """임베딩 행렬 변환 및 인덱스 구축 (CPU 작업, 스레드에서 실행)"""
+        index = create_index()
+        if ids:
+            index.build(ids, file_ids, stack_embeddings(vectors))
+        return index
+
+    @staticmethod
+    def _replay_changes(index: BaseANNIndex, ids: List, file_ids: List[str], events: List[Tuple[str, object]]):
+        """구축 중 발생한 청크 추가/파일 삭제를 순서대로 새 인덱스에 적용 (조회 결과에 이미 있는 청크는 제외)"""
+        present: Dict[str, Set] = {}
+        for chunk_id, file_id in zip(ids, file_ids):
+            present.setdefault(file_id, set()).add(chunk_id)
+
+        for kind, payload in events:
+            if kind == "remove":
+                index.remove_files([payload])
+                present.pop(payload, None)
+                continue
+            if kind == "remove_chunks":
+                file_id, chunk_ids = payload
+                index.remove_chunks(file_id, chunk_ids)
+                present.get(file_id, set()).difference_update(chunk_ids)
+                continue
+            records = [r for r in payload if r["_id"] not in present.get(r.get("file_id"), ())]
+            if not records:
+                continue
+            index.add(
+                [r["_id"] for r in records],
+                [r.get("file_id") for r in records],
+                stack_embeddings([r["text_embedding"] for r in records])
+            )
+            for r in records:
+                present.setdefault(r.get("file_id"), set()).add(r["_id"])
+
+    async def _all_folder_ids(self, db: AsyncIOMotorDatabase) -> List[Optional[str]]:
+        """청크가 존재하는 모든 folder_id 조회"""
+        folder_ids = await db.chunks.distinct("folder_id")
+        keys = {self._key(folder_id) for folder_id in folder_ids}
+        return [None if key == NO_FOLDER_KEY else key for key in keys]
+
+    async def search(
+        self,
+        db: AsyncIOMotorDatabase,
+        query_embedding: List[float],
+        k: int,
+        folder_id: Optional[str] = None,
+        all_folders: bool = False,
+        file_id: Optional[str] = None,
+        exclude_ids: Optional[Set] = None
+    ) -> List[Tuple[object, float]]:
+        """ANN 검색 - all_folders=True면 모든 파티션 결과를 병합"""
+        if all_folders:
+            folder_ids = await self._all_folder_ids(db)
+        else:
+            folder_ids = [folder_id]
+
+        merged: List[Tuple[object, float]] = []
+        for fid in folder_ids:
+            index = await self.get_partition(db, fid)
+            merged.extend(index.search(query_embedding, k, file_id=file_id, exclude_ids=exclude_ids))
+
+        merged.sort(key=lambda x: x[1], reverse=True)
+        return merged[:k]
+
+    def add_chunks(self, chunk_records: List[Dict]):
+        """삽입된 청크를 이미 로드된 파티션에 반영"""
+        grouped: Dict[str, List[Dict]] = {}
+        for record in chunk_records:
+            if "_id" not in record or "text_embedding" not in record:
+                continue
+            grouped.setdefault(self._key(record.get("folder_id")), []).append(record)
+
+        for key, records in grouped.items():
+            if key in self._building:
+                self._building[key]["events"].append(("add", records))
+            partition = self._partitions.get(key)
+            if partition is None:
+                continue  # 아직 로드되지 않은 파티션은 첫 검색 시 구축
+            partition.index.add(
+                [r["_id"] for r in records],
+                [r.get("file_id") for r in records],
+                stack_embeddings([r["text_embedding"] for r in records])
+            )
+
+    def remove_file(self, file_id: str):
+        """로드된 모든 파티션에서 파일 벡터 제거"""
+        for changes in self._building.values():
+            changes["events"].append(("remove", file_id))
+        for partition in self._partitions.values():
+            partition.index.remove_files([file_id])
+
+    def remove_chunks(self, file_id: str, chunk_ids: List):
+        """로드된 모든 파티션에서 파일의 일부 청크 벡터 제거"""
+        for changes in self._building.values():
+            changes["events"].append(("remove_chunks", (file_id, chunk_ids)))
+        for partition in self._partitions.values():
+            partition.index.remove_chunks(file_id, chunk_ids)
+
+    def invalidate_folder(self, folder_id: Optional[str]):
+        """폴더 파티션 폐기 (다음 검색 시 재구축)"""
+        key = self._key(folder_id)
+        self._partitions.pop(key, None)
+        if key in self._building:
+            self._building[key]["invalidated"] = True
+
+    def clear(self):
+        """모든 파티션 폐기"""
+        self._partitions.clear()
+        for changes in self._building.values():
+            changes["invalidated"] = True
+
+# 싱글톤 인스턴스
+ann_index_manager = ANNIndexManager()
@@ -0,0 +1,196 @@
+"""
+의미 기반 답변 캐시 모듈
+폴더별로 (질의 임베딩, 답변, 출처)를 보관하고 유사한 질의에 저장된 답변을 재사용
+- 적중 조건: 코사인 유사도 >= ANSWER_CACHE_SIMILARITY_THRESHOLD, 저장 시점의 폴더 content_version과 현재 값이 같음
+- 폴더 내용이 바뀌면 content_version이 증가하므로 다른 워커의 변경도 자동 무효화
+- folder_id 없는 질의는 전체 내용 버전(content_versions 컬렉션, 폴더 없는 문서 포함)으로 판단
+- 같은 프로세스의 청크 변경은 index_sync 훅으로 즉시 무효화
+- 대화 기록에 의존하는 후속 질문(지시어, 짧은 질문)은 호출 측에서 캐시를 생략하고 bypassed로 집계
+"""
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from config.settings import settings
+from database.operations import GLOBAL_CONTENT_VERSION_ID
+from utils.logger import get_logger
+from utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+# folder_id 없이 전체 폴더를 검색한 질의의 파티션 키
+ALL_FOLDERS_KEY = "__all__"
+
+async def folder_content_version(db: AsyncIOMotorDatabase, folder_id: Optional[str]) -> str:
+    """폴더 내용 버전 (folder_id가 없으면 전체 내용 버전, 둘 다 문서 하나 조회)"""
+    if folder_id:
+        if not ObjectId.is_valid(folder_id):
+            return "0"
+        folder = await db.folders.find_one({"_id": ObjectId(folder_id)}, {"content_version": 1})
+        return str((folder or {}).get("content_version", 0))
+
+    counter = await db.content_versions.find_one({"_id": GLOBAL_CONTENT_VERSION_ID}, {"version": 1})
+    return f"global:{(counter or {}).get('version', 0)}"
+
+class _Partition:
+    """폴더 단위 캐시 항목 (임베딩 행렬은 항목 순서와 동일)"""
+
+    def __init__(self, dim: int):
+        self.entries: List[Dict] = []
+        self.matrix = np.empty((0, dim), dtype=np.float32)
+
+    def remove(self, index: int):
+        del self.entries[index]
+        self.matrix = np.delete(self.matrix, index, axis=0)
+
+class AnswerCache:
+    """폴더별 의미 기반 답변 캐시 (프로세스 전역)"""
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl: Optional[float] = None,
+        threshold: Optional[float] = None
+    ):
+        self.max_entries = max_entries or settings.ANSWER_CACHE_MAX_ENTRIES
+        self.ttl = settings.ANSWER_CACHE_TTL_SECONDS if ttl is None else ttl
+        self.threshold = settings.ANSWER_CACHE_SIMILARITY_THRESHOLD if threshold is None else threshold
+        # 파티션 키 -> 파티션 (가장 오래 사용되지 않은 파티션이 앞쪽)
+        self._partitions: "OrderedDict[str, _Partition]" = OrderedDict()
+        self._stats = {
+            "hits": 0, "misses": 0, "stale": 0, "expired": 0, "invalidated": 0, "stores": 0, "bypassed": 0
+        }
+        self._hit_age_total = 0.0
+
+    @staticmethod
+    def key(folder_id: Optional[str]) -> str:
+        return folder_id if folder_id else ALL_FOLDERS_KEY
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm > 0 else vector
+
+    def __len__(self) -> int:
+        return sum(len(partition.entries) for partition in self._partitions.values())
+
+    def _best_match(self, partition: _Partition, vector: np.ndarray):
+        """가장 유사한 항목 (인덱스, 유사도), 없으면 (None, 0.0)"""
+        if not partition.entries or partition.matrix.shape[1] != vector.shape[0]:
+            return None, 0.0
+        similarities = partition.matrix @ vector
+        index = int(np.argmax(similarities))
+        return index, float(similarities[index])
+
+    def lookup(self, folder_id: Optional[str], embedding, version: str) -> Optional[Dict]:
+        """유사 질의의 저장된 응답 반환 (내용 버전이 다르거나 만료된 항목은 제거 후 None)"""
+        partition = self._partitions.get(self.key(folder_id))
+        if partition is None:
+            self._stats["misses"] += 1
+            return None
+
+        vector = self._normalize(embedding)
+        index, similarity = self._best_match(partition, vector)
+        if index is None or similarity < self.threshold:
+            self._stats["misses"] += 1
+            return None
+
+        entry = partition.entries[index]
+        age = time.monotonic() - entry["created_at"]
+        if entry["version"] != version or age > self.ttl:
+            self._stats["stale" if entry["version"] != version else "expired"] += 1
+            self._stats["misses"] += 1
+            partition.remove(index)
+            return None
+
+        entry["hits"] += 1
+        self._partitions.move_to_end(self.key(folder_id))
+        self._stats["hits"] += 1
+        self._hit_age_total += age
+        return {
+            **entry["response"],
+            "cache": {
+                "hit": True,
+                "similarity": round(similarity, 4),
+                "cached_query": entry["query"],
+                "age_seconds": round(age, 1)
+            }
+        }
+
+    def store(self, folder_id: Optional[str], query: str, embedding, version: str, response: Dict):
+        """응답 저장 (거의 같은 질의가 이미 있으면 교체)"""
+        vector = self._normalize(embedding)
+        key = self.key(folder_id)
+        partition = self._partitions.get(key)
+        if partition is None or partition.matrix.shape[1] != vector.shape[0]:
+            partition = _Partition(vector.shape[0])
+            self._partitions[key] = partition
+
+        index, similarity = self._best_match(partition, vector)
+        if index is not None and similarity >= self.threshold:
+            partition.remove(index)
+
+        partition.entries.append({
+            "query": query,
+            "version": version,
+            "response": response,
+            "created_at": time.monotonic(),
+            "hits": 0
+        })
+        partition.matrix = np.vstack([partition.matrix, vector[np.newaxis, :]])
+        self._partitions.move_to_end(key)
+        self._stats["stores"] += 1
+        self._evict()
+
+    def _evict(self):
+        """전체 항목 수 상한 적용 (오래 사용되지 않은 파티션의 오래된 항목부터 제거)"""
+        excess = len(self) - self.max_entries
+        while excess > 0 and self._partitions:
+            key, partition = next(iter(self._partitions.items()))
+            removed = min(excess, len(partition.entries))
+            partition.entries = partition.entries[removed:]
+            partition.matrix = partition.matrix[removed:]
+            excess -= removed
+            if not partition.entries:
+                del self._partitions[key]
+
+    def record_bypass(self):
+        """대화 기록 의존으로 캐시를 사용하지 않은 질의 집계"""
+        self._stats["bypassed"] += 1
+
+    def invalidate_folder(self, folder_id: Optional[str]):
+        """폴더 파티션과 전체 폴더 파티션 폐기"""
+        for key in {self.key(folder_id), ALL_FOLDERS_KEY}:
+            partition = self._partitions.pop(key, None)
+            if partition is not None:
+                self._stats["invalidated"] += len(partition.entries)
+
+    def clear(self):
+        """모든 항목 폐기"""
+        self._stats["invalidated"] += len(self)
+        self._partitions.clear()
+
+    def stats(self) -> Dict:
+        """적중률/무효화 통계 (stale: 폴더 내용 변경으로 버려진 적중 후보, bypassed: 후속 질문이라 조회하지 않은 질의)"""
+        lookups = self._stats["hits"] + self._stats["misses"]
+        queries = lookups + self._stats["bypassed"]
+        return {
+            **self._stats,
+            "entries": len(self),
+            "folders": len(self._partitions),
+            "max_entries": self.max_entries,
+            "threshold": self.threshold,
+            "ttl": self.ttl,
+            "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+            "bypass_rate": round(self._stats["bypassed"] / queries, 4) if queries else 0.0,
+            "avg_hit_age_seconds": round(self._hit_age_total / self._stats["hits"], 1) if self._stats["hits"] else 0.0
+        }
+
+# 싱글톤 인스턴스
+answer_cache = AnswerCache()
+metrics.register_cache("answer", answer_cache.stats)
@@ -2,8 +2,10 @@
 컨텍스트 빌더 모듈
 검색 결과를 LLM용 컨텍스트로 변환
 MODIFIED 2024-12-19: 청크 기반 검색 결과 처리로 업데이트
+ENHANCED: 토큰 예산 패킹 (연속 청크 병합/겹침 제거, 실제 토큰 수, 배낭식 선택)
 """
 from typing import List, Dict
+from retrieval.context_packer import context_packer
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -11,51 +13,35 @@ logger = get_logger(__name__)
 class ContextBuilder:
     """컨텍스트 빌더 클래스"""
     
+    @staticmethod
+    def _chunk_label(segment: Dict) -> str:
+        """구간의 청크 번호 표시 (예: 청크 3, 청크 3-5)"""
+        first, last = segment["sequence_start"] + 1, segment["sequence_end"] + 1
+        return f"청크 {first}" if first == last else f"청크 {first}-{last}"
+    
+    def pack_results(self, search_results: List[Dict], max_tokens: int = 2000) -> List[Dict]:
+        """토큰 예산 내 구간 선택 (본문만 기준, 점수순)"""
+        return context_packer.pack(search_results, max_tokens, lambda segment, i: segment["text"])
+    
     def build_context(
         self,
         search_results: List[Dict],
         max_tokens: int = 2000,
         include_metadata: bool = True
     ) -> str:
-        """검색 결과를 컨텍스트로 변환 (청크 기반)"""
-        context_parts = []
-        current_tokens = 0
-        
-        for i, result in enumerate(search_results):
-            chunk = result.get("chunk", {})
-            document = result.get("document", {})
-            score = result.get("score", 0.0)
-            
-            # 청크 텍스트
-            chunk_text = chunk.get("text", "")
-            if not chunk_text:
-                continue
-            
-            # 문서 정보
-            filename = document.get("original_filename", "알 수 없는 파일")
-            file_type = document.get("file_type", "")
-            sequence = chunk.get("sequence", 0)
-            
-            # 컨텍스트 포맷팅
+        """검색 결과를 컨텍스트로 변환 (청크 기반, 연속 청크 병합 후 토큰 예산 내 최적 선택)"""
+        def render(segment: Dict, i: int) -> str:
             if include_metadata:
-                chunk_context = f"""[문서 {i+1}] {filename} (청크 {sequence + 1}, 유사도: {score:.3f})
-{chunk_text}
+                filename = segment["document"].get("original_filename", "알 수 없는 파일")
+                return f"""[문서 {i+1}] {filename} ({self._chunk_label(segment)}, 관련도: {segment["max_score"]:.3f})
+{segment["text"]}
 """
-            else:
-                chunk_context = f"""[청크 {i+1}]
-{chunk_text}
+            return f"""[청크 {i+1}]
+{segment["text"]}
 """
-            
-            # 토큰 수 추정 (대략 4글자 = 1토큰)
-            estimated_tokens = len(chunk_context) // 4
-            
-            if current_tokens + estimated_tokens > max_tokens:
-                break
-            
-            context_parts.append(chunk_context)
-            current_tokens += estimated_tokens
         
-        return "\n".join(context_parts)
+        selected = context_packer.pack(search_results, max_tokens, render)
+        return "\n".join(render(segment, i) for i, segment in enumerate(selected))
     
     def build_context_with_grouping(
         self,
@@ -67,57 +53,33 @@ class ContextBuilder:
         if not group_by_file:
             return self.build_context(search_results, max_tokens)
         
-        # 파일별로 그룹화
-        file_groups = {}
-        for result in search_results:
-            chunk = result.get("chunk", {})
-            document = result.get("document", {})
-            file_id = chunk.get("file_id", "unknown")
-            
-            if file_id not in file_groups:
-                file_groups[file_id] = {
-                    "document": document,
-                    "chunks": []
-                }
-            
-            file_groups[file_id]["chunks"].append(result)
+        def file_header(segment: Dict) -> str:
+            filename = segment["document"].get("original_filename", "알 수 없는 파일")
+            return f"\n=== {filename} ===\n"
         
-        # 각 파일별로 컨텍스트 생성
-        context_parts = []
-        current_tokens = 0
+        def render(segment: Dict, i: int) -> str:
+            return f"[{self._chunk_label(segment)}] (관련도: {segment['max_score']:.3f})\n{segment['text']}\n"
         
-        for file_id, group in file_groups.items():
-            document = group["document"]
-            chunks = group["chunks"]
-            
-            # 파일 헤더
-            filename = document.get("original_filename", "알 수 없는 파일")
-            file_header = f"\n=== {filename} ===\n"
-            
-            # 청크들을 시퀀스 순으로 정렬
-            chunks.sort(key=lambda x: x.get("chunk", {}).get("sequence", 0))
-            
-            # 파일 내 청크들 결합
-            file_context = file_header
-            for j, result in enumerate(chunks):
-                chunk = result.get("chunk", {})
-                score = result.get("score", 0.0)
-                sequence = chunk.get("sequence", 0)
-                
-                chunk_text = f"[청크 {sequence + 1}] (유사도: {score:.3f})\n{chunk.get('text', '')}\n"
-                
-                # 토큰 수 체크
-                estimated_tokens = len(chunk_text) // 4
-                if current_tokens + estimated_tokens > max_tokens:
-                    break
-                
-                file_context += chunk_text
-                current_tokens += estimated_tokens
-            
+        # 파일 헤더 비용은 구간마다 보수적으로 포함
+        selected = context_packer.pack(
+            search_results,
+            max_tokens,
+            render,
+            overhead_tokens=lambda segment: context_packer.count(file_header(segment))
+        )
+        
+        # 파일별로 그룹화 (가장 관련도 높은 파일 먼저, 파일 내에서는 시퀀스 순)
+        file_groups: Dict[str, List[Dict]] = {}
+        for segment in selected:
+            file_groups.setdefault(segment["file_id"], []).append(segment)
+        
+        context_parts = []
+        for segments in file_groups.values():
+            segments.sort(key=lambda segment: segment["sequence_start"])
+            file_context = file_header(segments[0])
+            for segment in segments:
+                file_context += render(segment, 0)
             context_parts.append(file_context)
-            
-            if current_tokens >= max_tokens:
-                break
         
         return "\n".join(context_parts)
     
@@ -0,0 +1,162 @@
+"""
+컨텍스트 패킹 모듈
+검색 결과를 토큰 예산 안에 최대한 가치 있게 채움
+- 같은 파일의 연속 청크(sequence)를 하나의 구간으로 병합하며 겹침 텍스트 제거
+- 모델 토크나이저 기준 토큰 수 계산
+- 0/1 배낭 문제로 예산 내 점수 합이 최대가 되는 구간 선택
+"""
+from typing import Callable, Dict, List, Optional
+
+from utils.logger import get_logger
+from utils.tokenizer import count_tokens
+
+logger = get_logger(__name__)
+
+# 구간 렌더링 함수: (구간, 출력 순번) -> 컨텍스트 문자열
+SegmentRenderer = Callable[[Dict, int], str]
+
+_MAX_DP_BUCKETS = 1024  # 배낭 DP 용량 칸 수 상한 (토큰 비용을 양자화)
+
+def overlap_length(previous: str, following: str) -> int:
+    """previous의 접미사와 following의 접두사가 겹치는 최대 길이 (접두사 함수, 선형 시간)"""
+    limit = min(len(previous), len(following))
+    if limit == 0:
+        return 0
+    combined = following[:limit] + "\0" + previous[-limit:]
+    prefix = [0] * len(combined)
+    for i in range(1, len(combined)):
+        k = prefix[i - 1]
+        while k and combined[i] != combined[k]:
+            k = prefix[k - 1]
+        if combined[i] == combined[k]:
+            k += 1
+        prefix[i] = k
+    return prefix[-1]
+
+def merge_text(previous: str, following: str, min_overlap: int = 8) -> str:
+    """연속 청크 결합 (겹치는 부분은 한 번만 포함)"""
+    overlap = overlap_length(previous, following)
+    if overlap >= min(min_overlap, len(following)):
+        return previous + following[overlap:]
+    return f"{previous}\n{following}"
+
+class ContextPacker:
+    """토큰 예산 기반 컨텍스트 패커"""
+
+    def __init__(self, model: Optional[str] = None):
+        self.model = model
+
+    def count(self, text: str) -> int:
+        return count_tokens(text, self.model)
+
+    def merge_adjacent(self, search_results: List[Dict]) -> List[Dict]:
+        """같은 파일의 연속 청크를 구간으로 병합 (구간 점수 = 청크 점수 합)"""
+        by_file: Dict[str, List[Dict]] = {}
+        for result in search_results:
+            chunk = result.get("chunk", {})
+            if not chunk.get("text"):
+                continue
+            by_file.setdefault(chunk.get("file_id", "unknown"), []).append(result)
+
+        segments = []
+        for file_id, results in by_file.items():
+            results.sort(key=lambda r: r.get("chunk", {}).get("sequence", 0))
+            current = None
+            for result in results:
+                chunk = result["chunk"]
+                sequence = chunk.get("sequence", 0)
+                score = result.get("score", 0.0)
+                if current is not None and sequence == current["sequence_end"]:
+                    continue  # 중복 청크
+                if current is not None and sequence == current["sequence_end"] + 1:
+                    current["text"] = merge_text(current["text"], chunk["text"])
+                    current["sequence_end"] = sequence
+                    current["score"] += score
+                    current["max_score"] = max(current["max_score"], score)
+                    current["results"].append(result)
+                    continue
+                current = {
+                    "file_id": file_id,
+                    "document": result.get("document", {}),
+                    "text": chunk["text"],
+                    "sequence_start": sequence,
+                    "sequence_end": sequence,
+                    "score": score,
+                    "max_score": score,
+                    "results": [result]
+                }
+                segments.append(current)
+        return segments
+
+    def pack(
+        self,
+        search_results: List[Dict],
+        max_tokens: int,
+        render: SegmentRenderer,
+        overhead_tokens: Optional[Callable[[Dict], int]] = None
+    ) -> List[Dict]:
+        """예산 내 점수 합이 최대인 구간 선택 (최고 점수순으로 반환, 각 구간에 "tokens" 포함)
+
+        overhead_tokens: 구간별 추가 비용 (예: 파일 헤더) - 보수적으로 구간마다 합산
+        """
+        segments = self._fit_segments(self.merge_adjacent(search_results), max_tokens, render, overhead_tokens)
+        if not segments:
+            return []
+
+        selected = self._knapsack(segments, max_tokens)
+        selected.sort(key=lambda s: (s["max_score"], s["score"]), reverse=True)
+
+        used = sum(s["cost"] for s in selected)
+        logger.info(
+            f"컨텍스트 패킹: 후보 {len(search_results)}개 청크 → {len(segments)}개 구간 중 "
+            f"{len(selected)}개 선택 ({used}/{max_tokens} 토큰)"
+        )
+        return selected
+
+    def _fit_segments(
+        self,
+        segments: List[Dict],
+        max_tokens: int,
+        render: SegmentRenderer,
+        overhead_tokens: Optional[Callable[[Dict], int]]
+    ) -> List[Dict]:
+        """구간 비용 계산 (예산보다 큰 병합 구간은 개별 청크로 다시 분리)"""
+        fitted = []
+        pending = list(segments)
+        while pending:
+            segment = pending.pop()
+            segment["tokens"] = self.count(render(segment, 0))
+            segment["cost"] = segment["tokens"] + (overhead_tokens(segment) if overhead_tokens else 0) + 1
+            if segment["cost"] <= max_tokens:
+                fitted.append(segment)
+            elif len(segment["results"]) > 1:
+                pending.extend(self.merge_adjacent([r])[0] for r in segment["results"])
+        return fitted
+
+    @staticmethod
+    def _knapsack(segments: List[Dict], max_tokens: int) -> List[Dict]:
+        """0/1 배낭 DP (비용은 올림 양자화하여 예산 초과 방지)"""
+        unit = max(1, -(-max_tokens // _MAX_DP_BUCKETS))
+        capacity = max_tokens // unit
+        weights = [-(-s["cost"] // unit) for s in segments]
+
+        best = [0.0] * (capacity + 1)
+        chosen = [[False] * (capacity + 1) for _ in segments]
+        for i, segment in enumerate(segments):
+            weight, value = weights[i], segment["score"]
+            for c in range(capacity, weight - 1, -1):
+                candidate = best[c - weight] + value
+                if candidate > best[c]:
+                    best[c] = candidate
+                    chosen[i][c] = True
+
+        selected = []
+        c = capacity
+        for i in range(len(segments) - 1, -1, -1):
+            if chosen[i][c]:
+                selected.append(segments[i])
+                c -= weights[i]
+        return selected
+
+# 싱글톤 인스턴스
+context_packer = ContextPacker()
@@ -0,0 +1,490 @@
+"""
+파일 검색 인덱스 모듈
+/upload/search용 파일명/본문 2-gram 역색인 (file_search_grams 컬렉션)
+- 문서의 (필드, gram)마다 레코드 하나: 출현 횟수와 앞쪽 출현 위치(문자 오프셋) 저장
+- 가장 드문 gram부터 후보 파일을 좁히고, 저장된 위치의 연속성으로 검색어 전체 일치 확인
+- 페이지는 가장 드문 gram의 게시 목록을 (출현 수, file_id) 순서로 읽는 키셋 방식 (커서 경계와 개수를 쿼리에 포함)
+- 전체 건수는 가장 드문 gram의 게시 목록 수로 추정하고, 본문은 현재 페이지의 스니펫 구간만 서버에서 잘라 조회
+"""
+import asyncio
+import base64
+import json
+import re
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from config.settings import settings
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+FIELD_FILENAME = "filename"
+FIELD_CONTENT = "content"
+ALL_FIELDS = (FIELD_FILENAME, FIELD_CONTENT)
+
+# 필드별 관련성 점수 (파일명 매치 우선)
+FIELD_RELEVANCE = {FIELD_FILENAME: 1.0, FIELD_CONTENT: 0.8}
+
+_INSERT_BATCH = 1000
+_SCAN_BATCH = 100  # 검색 시 게시 목록을 한 번에 읽어 확인할 후보 수
+
+def _fold_char(ch: str) -> str:
+    folded = ch.casefold()
+    return folded if len(folded) == 1 else ch
+
+def fold_text(text: str) -> str:
+    """검색용 정규화 (대소문자 통합, 원문과 문자 오프셋이 같도록 길이 유지)"""
+    folded = text.casefold()
+    if len(folded) == len(text):
+        return folded
+    return "".join(_fold_char(ch) for ch in text)
+
+def _indexable(gram: str) -> bool:
+    """공백 문자만으로 된 gram은 색인하지 않음 (빈 줄/들여쓰기 잡음)"""
+    return not gram.isspace()
+
+def extract_grams(text: str, max_offsets: int) -> Dict[str, Dict]:
+    """연속 두 글자(2-gram)별 출현 횟수와 앞쪽 출현 위치"""
+    text = fold_text(text)
+    grams: Dict[str, Dict] = {}
+    for i in range(len(text) - 1):
+        gram = text[i:i + 2]
+        entry = grams.get(gram)
+        if entry is None:
+            if not _indexable(gram):
+                continue
+            entry = grams[gram] = {"count": 0, "offsets": []}
+        entry["count"] += 1
+        if len(entry["offsets"]) < max_offsets:
+            entry["offsets"].append(i)
+    return grams
+
+def query_grams(query: str) -> List[Tuple[str, int]]:
+    """검색어의 (2-gram, 검색어 내 위치) 목록 - 위치가 모두 이어지면 검색어 전체와 일치"""
+    query = fold_text(query)
+    return [(query[i:i + 2], i) for i in range(len(query) - 1) if _indexable(query[i:i + 2])]
+
+def encode_cursor(key: Tuple[str, int, str]) -> str:
+    """정렬 키(필드, 기준 gram 출현 수, file_id)를 페이지 커서 문자열로 변환"""
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[str, int, str]:
+    """페이지 커서 해석 (형식 오류 시 ValueError)"""
+    try:
+        field, count, file_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if field not in ALL_FIELDS:
+            raise ValueError(field)
+        return field, int(count), str(file_id)
+    except Exception as e:
+        raise ValueError(f"잘못된 검색 커서: {cursor}") from e
+
+class FileSearchIndex:
+    """파일명/본문 n-gram 검색 인덱스"""
+
+    POSTING_PROJECTION = {"_id": 0, "file_id": 1, "count": 1, "offsets": 1}
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+        self.grams = db.file_search_grams
+        self.documents = db.documents
+        self.max_offsets = settings.FILE_SEARCH_MAX_OFFSETS
+        self.snippet_chars = settings.FILE_SEARCH_SNIPPET_CHARS
+
+    # ------------------------------------------------------------------
+    # 색인 유지
+    # ------------------------------------------------------------------
+
+    async def index_file(self, file_id: str, fields: Iterable[str] = ALL_FIELDS) -> int:
+        """파일 게시 목록 재구축 (문서가 없으면 제거), 저장한 레코드 수 반환"""
+        fields = tuple(fields)
+        projection = {"file_metadata.original_filename": 1, "folder_id": 1}
+        if FIELD_CONTENT in fields:
+            projection["raw_text"] = 1
+        doc = await self.documents.find_one({"file_metadata.file_id": file_id}, projection)
+        if doc is None:
+            await self.remove_files([file_id])
+            return 0
+
+        folder_id = doc.get("folder_id")
+        sources = {
+            FIELD_FILENAME: doc.get("file_metadata", {}).get("original_filename") or "",
+            FIELD_CONTENT: doc.get("raw_text") or ""
+        }
+        records = []
+        for field in fields:
+            grams = await asyncio.to_thread(extract_grams, sources[field], self.max_offsets)
+            records.extend(
+                {
+                    "file_id": file_id,
+                    "folder_id": folder_id,
+                    "field": field,
+                    "gram": gram,
+                    "count": entry["count"],
+                    "offsets": entry["offsets"]
+                }
+                for gram, entry in grams.items()
+            )
+
+        await self.grams.delete_many({"file_id": file_id, "field": {"$in": list(fields)}})
+        for start in range(0, len(records), _INSERT_BATCH):
+            await self.grams.insert_many(records[start:start + _INSERT_BATCH], ordered=False)
+        if set(fields) != set(ALL_FIELDS):
+            # 다시 색인하지 않은 필드에도 폴더 이동 반영
+            await self.grams.update_many({"file_id": file_id}, {"$set": {"folder_id": folder_id}})
+        await self.documents.update_one({"_id": doc["_id"]}, {"$set": {"search_indexed_at": datetime.utcnow()}})
+
+        logger.debug(f"파일 검색 색인: {file_id} ({', '.join(fields)}, {len(records)}개 gram)")
+        return len(records)
+
+    async def remove_files(self, file_ids: List[str]):
+        """파일 게시 목록 삭제"""
+        if file_ids:
+            await self.grams.delete_many({"file_id": {"$in": list(file_ids)}})
+
+    async def remove_folder(self, folder_id: str):
+        """폴더 전체 게시 목록 삭제"""
+        await self.grams.delete_many({"folder_id": folder_id})
+
+    async def backfill(self, batch_size: int = 100) -> int:
+        """색인되지 않은 기존 문서 색인, 처리한 문서 수 반환"""
+        indexed, failed = 0, []
+        while True:
+            docs = await self.documents.find(
+                {"search_indexed_at": {"$exists": False}, "_id": {"$nin": failed}},
+                {"file_metadata.file_id": 1}
+            ).limit(batch_size).to_list(batch_size)
+            if not docs:
+                break
+            for doc in docs:
+                file_id = doc.get("file_metadata", {}).get("file_id")
+                try:
+                    if not file_id:
+                        raise ValueError("file_metadata.file_id 없음")
+                    await self.index_file(file_id)
+                    indexed += 1
+                except Exception as e:
+                    logger.warning(f"파일 검색 색인 실패 {doc['_id']}: {e}")
+                    failed.append(doc["_id"])
+        if indexed or failed:
+            logger.info(f"파일 검색 인덱스 백필 완료: {indexed}개 색인, {len(failed)}개 실패")
+        return indexed
+
+    # ------------------------------------------------------------------
+    # 검색
+    # ------------------------------------------------------------------
+
+    async def search(
+        self,
+        query: str,
+        fields: Iterable[str] = ALL_FIELDS,
+        folder_id: Optional[str] = None,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        skip: int = 0
+    ) -> Optional[Dict]:
+        """구문 일치 파일 검색 (2-gram을 만들 수 없는 검색어면 None)
+
+        반환: {"total_found", "items": 현재 페이지, "next_cursor"}
+        정렬: 파일명 일치 → 본문만 일치, 각 단계 안에서는 가장 드문 gram의 출현 수 내림차순 → file_id
+        가장 드문 gram의 게시 목록을 정렬 순서대로 읽되 커서 경계를 쿼리 조건으로 넘기고 페이지가 찰 때까지만 확인
+        total_found는 가장 드문 gram이 나타나는 파일 수 (구문 확인 전 후보 기준 추정치)
+        """
+        query = query.strip()
+        grams = query_grams(query)
+        if not grams:
+            return None
+
+        relative: Dict[str, List[int]] = {}
+        for gram, position in grams:
+            relative.setdefault(gram, []).append(position)
+
+        # 필드별 gram 확인 순서 (드문 순) - 관련성 높은 필드부터
+        folder_filter = {"folder_id": folder_id} if folder_id else {}
+        plans: Dict[str, Tuple[List[str], int]] = {}
+        for field in ALL_FIELDS:
+            if field in fields:
+                plan = await self._gram_order(relative, {"field": field, **folder_filter})
+                if plan:
+                    plans[field] = plan
+        if not plans:
+            return {"total_found": 0, "items": [], "next_cursor": None}
+        total_found = await self._count_candidates(plans, folder_filter)
+
+        after = decode_cursor(cursor) if cursor else None
+        wanted = limit + 1 if after else skip + limit + 1
+        found: List[Tuple[Tuple[str, int, str], Dict[str, Dict]]] = []
+        for field, (order, _) in plans.items():
+            if after and ALL_FIELDS.index(field) < ALL_FIELDS.index(after[0]):
+                continue
+            bound = after[1:] if after and after[0] == field else None
+            # 본문 단계에서는 파일명 단계에서 이미 반환한 파일 제외
+            exclude = plans.get(FIELD_FILENAME) if field == FIELD_CONTENT else None
+            found.extend(await self._scan_field(
+                query, relative, field, order, folder_filter, bound, exclude, wanted - len(found)
+            ))
+            if len(found) >= wanted:
+                break
+
+        if not after:
+            found = found[skip:]
+        page, has_more = found[:limit], len(found) > limit
+
+        if FIELD_CONTENT in plans:
+            # 파일명 단계 항목의 본문 일치(출현 수/스니펫)는 현재 페이지만 확인
+            filename_ids = [key[2] for key, _ in page if key[0] == FIELD_FILENAME]
+            if filename_ids:
+                content = await self._match_files(
+                    query, relative, FIELD_CONTENT, plans[FIELD_CONTENT][0], folder_filter, filename_ids
+                )
+                for key, matches in page:
+                    if key[2] in content:
+                        matches[FIELD_CONTENT] = content[key[2]]
+
+        items = await self._load_page(page, len(query))
+        total_found -= len(page) - len(items)  # 문서가 삭제되었지만 게시 목록이 남은 파일
+
+        next_cursor = encode_cursor(page[-1][0]) if has_more and page else None
+        return {"total_found": max(total_found, len(items)), "items": items, "next_cursor": next_cursor}
+
+    async def _gram_order(self, relative: Dict[str, List[int]], base_filter: Dict) -> Optional[Tuple[List[str], int]]:
+        """gram을 게시 목록 크기 오름차순으로 정렬 → (gram 순서, 가장 드문 gram의 파일 수), 없는 gram이 있으면 None"""
+        frequencies = await asyncio.gather(*(
+            self.grams.count_documents({**base_filter, "gram": gram}) for gram in relative
+        ))
+        if min(frequencies) == 0:
+            return None
+        ranked = sorted(zip(frequencies, relative))
+        return [gram for _, gram in ranked], ranked[0][0]
+
+    async def _count_candidates(self, plans: Dict[str, Tuple[List[str], int]], folder_filter: Dict) -> int:
+        """필드별 가장 드문 gram이 나타나는 파일 수 (여러 필드면 서버에서 file_id 중복 제거)"""
+        if len(plans) == 1:
+            return next(iter(plans.values()))[1]
+        pipeline = [
+            {"$match": {"$or": [
+                {"field": field, "gram": order[0], **folder_filter} for field, (order, _) in plans.items()
+            ]}},
+            {"$group": {"_id": "$file_id"}},
+            {"$count": "files"}
+        ]
+        counted = await self.grams.aggregate(pipeline).to_list(1)
+        return counted[0]["files"] if counted else 0
+
+    async def _scan_field(
+        self,
+        query: str,
+        relative: Dict[str, List[int]],
+        field: str,
+        order: List[str],
+        folder_filter: Dict,
+        bound: Optional[Tuple[int, str]],
+        exclude: Optional[Tuple[List[str], int]],
+        needed: int
+    ) -> List[Tuple[Tuple[str, int, str], Dict[str, Dict]]]:
+        """가장 드문 gram의 게시 목록을 (출현 수 내림차순, file_id) 순서로 읽으며 구문 일치 파일을 needed개까지 수집
+
+        bound: 커서 위치 (출현 수, file_id) - 이후 항목만 조회, exclude: 제외할 파일을 찾을 파일명 gram 순서
+        """
+        base_filter = {"field": field, **folder_filter}
+        gram_filter = {**base_filter, "gram": order[0]}
+        if bound:
+            count, file_id = bound
+            gram_filter["$or"] = [{"count": {"$lt": count}}, {"count": count, "file_id": {"$gt": file_id}}]
+        batch_size = min(max(needed, _SCAN_BATCH), _INSERT_BATCH)
+        postings = self.grams.find(gram_filter, self.POSTING_PROJECTION).sort([("count", -1), ("file_id", 1)])
+
+        found = []
+        while len(found) < needed:
+            records = await postings.to_list(batch_size)
+            if not records:
+                break
+            matches = await self._verify_candidates(
+                query, relative, order, base_filter, {record["file_id"]: record for record in records}
+            )
+            excluded = {}
+            if exclude and matches:
+                excluded = await self._match_files(
+                    query, relative, FIELD_FILENAME, exclude[0], folder_filter, list(matches)
+                )
+            for record in records:
+                match = matches.get(record["file_id"])
+                if match is None or record["file_id"] in excluded:
+                    continue
+                found.append(((field, record["count"], record["file_id"]), {field: match}))
+                if len(found) >= needed:
+                    break
+            if len(records) < batch_size:
+                break
+        return found
+
+    async def _match_files(
+        self,
+        query: str,
+        relative: Dict[str, List[int]],
+        field: str,
+        order: List[str],
+        folder_filter: Dict,
+        file_ids: List[str]
+    ) -> Dict[str, Dict]:
+        """지정한 파일 중 필드에 검색어 구문이 나타나는 파일 → {file_id: {"positions", "count"}}"""
+        base_filter = {"field": field, **folder_filter}
+        driving = {}
+        async for record in self.grams.find(
+            {**base_filter, "gram": order[0], "file_id": {"$in": file_ids}},
+            self.POSTING_PROJECTION
+        ):
+            driving[record["file_id"]] = record
+        if not driving:
+            return {}
+        return await self._verify_candidates(query, relative, order, base_filter, driving)
+
+    async def _verify_candidates(
+        self,
+        query: str,
+        relative: Dict[str, List[int]],
+        order: List[str],
+        base_filter: Dict,
+        driving: Dict[str, Dict]
+    ) -> Dict[str, Dict]:
+        """가장 드문 gram 게시 레코드가 있는 후보 중 구문이 나타나는 파일 → {file_id: {"positions", "count"}}"""
+        postings: Dict[str, Dict[str, Dict]] = {file_id: {order[0]: record} for file_id, record in driving.items()}
+        candidates = set(driving)
+        for gram in order[1:]:
+            found = {}
+            async for record in self.grams.find(
+                {**base_filter, "gram": gram, "file_id": {"$in": list(candidates)}},
+                self.POSTING_PROJECTION
+            ):
+                found[record["file_id"]] = record
+            candidates &= set(found)
+            if not candidates:
+                return {}
+            for file_id in candidates:
+                postings[file_id][gram] = found[file_id]
+
+        # 저장된 위치로 구문 연속성 확인 (위치 목록이 잘린 파일은 원문으로 확인)
+        results, uncertain = {}, {}
+        for file_id in candidates:
+            starts, complete = None, True
+            for gram, positions in relative.items():
+                record = postings[file_id][gram]
+                complete = complete and record["count"] <= len(record["offsets"])
+                for position in positions:
+                    gram_starts = {offset - position for offset in record["offsets"]}
+                    starts = gram_starts if starts is None else starts & gram_starts
+            if starts:
+                results[file_id] = {"positions": sorted(starts), "count": len(starts)}
+            elif not complete:
+                rarest = postings[file_id][order[0]]
+                uncertain[file_id] = rarest["offsets"][0] - relative[order[0]][0]
+
+        if uncertain:
+            field = base_filter["field"]
+            results.update(await self._verify_by_text(query, field, uncertain))
+        return results
+
+    async def _verify_by_text(self, query: str, field: str, estimates: Dict[str, int]) -> Dict[str, Dict]:
+        """위치 목록만으로 판단할 수 없는 후보를 서버 측 정규식으로 확인 (본문은 전송하지 않음)"""
+        path = "file_metadata.original_filename" if field == FIELD_FILENAME else "raw_text"
+        cursor = self.documents.find(
+            {
+                "file_metadata.file_id": {"$in": list(estimates)},
+                path: {"$regex": re.escape(query), "$options": "i"}
+            },
+            {"_id": 0, "file_metadata.file_id": 1}
+        )
+        results = {}
+        async for doc in cursor:
+            file_id = doc["file_metadata"]["file_id"]
+            results[file_id] = {"positions": [max(0, estimates[file_id])], "count": 1}
+        return results
+
+    async def _load_page(self, page: List[Tuple[Tuple, Dict]], query_length: int) -> List[Dict]:
+        """현재 페이지 문서 메타데이터와 본문 스니펫 구간만 조회"""
+        if not page:
+            return []
+
+        file_ids = [key[2] for key, _ in page]
+        branches = []
+        for key, matches in page:
+            content = matches.get(FIELD_CONTENT)
+            if content and content["positions"]:
+                start = max(0, content["positions"][0] - self.snippet_chars)
+                branches.append({
+                    "case": {"$eq": ["$file_metadata.file_id", key[2]]},
+                    "then": {"$substrCP": ["$raw_text", start, query_length + 2 * self.snippet_chars]}
+                })
+
+        projection = {"_id": 0, "file_metadata": 1, "chunks_count": 1, "created_at": 1, "folder_id": 1}
+        if branches:
+            projection["snippet"] = {"$switch": {"branches": branches, "default": None}}
+        documents = {}
+        async for doc in self.documents.aggregate([
+            {"$match": {"file_metadata.file_id": {"$in": file_ids}}},
+            {"$project": projection}
+        ]):
+            documents.setdefault(doc["file_metadata"]["file_id"], doc)
+
+        items, stale = [], []
+        for key, matches in page:
+            file_id = key[2]
+            doc = documents.get(file_id)
+            if doc is None:
+                stale.append(file_id)
+                continue
+            items.append({
+                "file_id": file_id,
+                "document": doc,
+                "match_type": "both" if len(matches) > 1 else next(iter(matches)),
+                "relevance_score": FIELD_RELEVANCE[key[0]],
+                "occurrences": matches.get(FIELD_CONTENT, {}).get("count", 0),
+                "snippet": doc.get("snippet")
+            })
+        if stale:
+            await self.remove_files(stale)
+        return items
+
+# ----------------------------------------------------------------------
+# 문서 변경 시 호출하는 동기화 함수 (실패해도 원래 작업은 계속)
+# ----------------------------------------------------------------------
+
+async def sync_file_search_index(db: AsyncIOMotorDatabase, file_id: str, fields: Iterable[str] = ALL_FIELDS):
+    """문서 생성/본문 수정/이름 변경/폴더 이동 후 호출"""
+    if not settings.FILE_SEARCH_INDEX_ENABLED:
+        return
+    try:
+        await FileSearchIndex(db).index_file(file_id, fields)
+    except Exception as e:
+        logger.warning(f"파일 검색 인덱스 갱신 실패 {file_id}: {e}")
+
+async def remove_file_search_index(db: AsyncIOMotorDatabase, file_ids: List[str]):
+    """문서 삭제 후 호출"""
+    try:
+        await FileSearchIndex(db).remove_files(file_ids)
+    except Exception as e:
+        logger.warning(f"파일 검색 인덱스 삭제 실패 {file_ids}: {e}")
+
+async def remove_folder_search_index(db: AsyncIOMotorDatabase, folder_id: str):
+    """폴더 문서 일괄 삭제 후 호출"""
+    try:
+        await FileSearchIndex(db).remove_folder(folder_id)
+    except Exception as e:
+        logger.warning(f"파일 검색 인덱스 폴더 삭제 실패 {folder_id}: {e}")
+
+_backfill_task: Optional[asyncio.Task] = None
+
+async def start_file_search_backfill(db: AsyncIOMotorDatabase):
+    """기존 문서 색인 백그라운드 작업 시작 (애플리케이션 시작 시)"""
+    global _backfill_task
+    if settings.FILE_SEARCH_INDEX_ENABLED and _backfill_task is None:
+        _backfill_task = asyncio.create_task(FileSearchIndex(db).backfill(), name="file-search-backfill")
+
+async def stop_file_search_backfill():
+    """백필 작업 중지 (애플리케이션 종료 시)"""
+    global _backfill_task
+    if _backfill_task is not None:
+        _backfill_task.cancel()
+        await asyncio.gather(_backfill_task, return_exceptions=True)
+        _backfill_task = None
@@ -1,9 +1,13 @@
 """
 하이브리드 검색 모듈
 벡터 검색과 키워드 검색을 결합
+ENHANCED: 청크 BM25 어휘 인덱스 결과를 벡터 결과와 Reciprocal Rank Fusion으로 결합
 """
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from config.settings import settings
+from retrieval.lexical_index import lexical_index_manager
+from retrieval.result_enricher import ResultEnricher
 from retrieval.vector_search import VectorSearch
 from utils.logger import get_logger
 
@@ -12,11 +16,18 @@ logger = get_logger(__name__)
 class HybridSearch:
     """하이브리드 검색 클래스"""
     
-    def __init__(self, db: AsyncIOMotorDatabase):
+    # 어휘 검색 전용 결과의 청크 조회 프로젝션 (임베딩 제외)
+    CHUNK_PROJECTION = {"text_embedding": 0}
+    
+    def __init__(self, db: AsyncIOMotorDatabase, use_lexical_index: Optional[bool] = None):
         self.db = db
         self.vector_search = VectorSearch(db)
         self.documents = db.documents
         self.labels = db.labels
+        self.enricher = ResultEnricher(db)
+        self.use_lexical_index = (
+            settings.LEXICAL_INDEX_ENABLED if use_lexical_index is None else use_lexical_index
+        )
     
     async def search(
         self,
@@ -26,7 +37,11 @@ class HybridSearch:
         categories: Optional[List[str]] = None,
         tags: Optional[List[str]] = None
     ) -> List[Dict]:
-        """하이브리드 검색 실행"""
+        """하이브리드 검색 실행
+
+        어휘 인덱스 사용 시 score는 정규화된 RRF 순위 점수(0~1, 코사인 유사도 아님)이고
+        코사인 유사도는 vector_score(어휘 검색에서만 나온 청크는 None), BM25 점수는 lexical_score에 보관
+        """
         # 필터 조건 생성
         filter_dict = {}
         if folder_id:
@@ -37,14 +52,26 @@ class HybridSearch:
             query, k=k*2, filter_dict=filter_dict
         )
         
+        # 어휘 검색 결과와 순위 결합
+        if self.use_lexical_index:
+            try:
+                lexical_ranked = await lexical_index_manager.search(
+                    self.db, query, k*2, folder_id=folder_id, all_folders=not folder_id
+                )
+                vector_results = await self._fuse(vector_results, lexical_ranked)
+            except Exception as e:
+                logger.warning(f"어휘 검색 실패, 벡터 결과만 사용: {e}")
+        
         # 라벨 기반 필터링
         if categories or tags:
+            # 결과 전체의 라벨을 한 번에 조회 (labels.document_id = 청크 file_id)
+            labels = await self.enricher.get_labels(
+                result["chunk"].get("file_id") for result in vector_results
+            )
+            
             filtered_results = []
             for result in vector_results:
-                doc_id = str(result["document"]["_id"])
-                
-                # 라벨 조회
-                label = await self.labels.find_one({"document_id": doc_id})
+                label = labels.get(result["chunk"].get("file_id"))
                 
                 if label:
                     # 카테고리 필터
@@ -64,30 +91,117 @@ class HybridSearch:
         # 최종 결과 반환
         return vector_results[:k]
     
+    async def _fuse(
+        self,
+        vector_results: List[Dict],
+        lexical_ranked: List[Tuple[object, float]]
+    ) -> List[Dict]:
+        """벡터/어휘 순위를 RRF로 결합 (score는 두 목록 모두 1위일 때 1.0이 되도록 정규화)"""
+        rrf_k = settings.HYBRID_RRF_K
+        fused: Dict[object, Dict] = {}
+        
+        for rank, result in enumerate(vector_results, start=1):
+            entry = fused.setdefault(result["chunk"]["_id"], {"rrf": 0.0, "result": result})
+            entry["rrf"] += 1.0 / (rrf_k + rank)
+            entry["vector_score"] = result.get("score", 0.0)
+        
+        for rank, (chunk_oid, lexical_score) in enumerate(lexical_ranked, start=1):
+            entry = fused.setdefault(chunk_oid, {"rrf": 0.0, "result": None})
+            entry["rrf"] += 1.0 / (rrf_k + rank)
+            entry["lexical_score"] = lexical_score
+        
+        # 어휘 검색에서만 나온 청크는 본문/문서 정보를 일괄 조회
+        missing = [chunk_oid for chunk_oid, entry in fused.items() if entry["result"] is None]
+        if missing:
+            chunks = {}
+            async for chunk in self.db.chunks.find({"_id": {"$in": missing}}, self.CHUNK_PROJECTION):
+                chunks[chunk["_id"]] = chunk
+            enriched = await self.enricher.enrich([
+                {"chunk": chunks[chunk_oid], "score": 0.0} for chunk_oid in missing if chunk_oid in chunks
+            ])
+            for result in enriched:
+                fused[result["chunk"]["_id"]]["result"] = result
+        
+        max_rrf = 2.0 / (rrf_k + 1)
+        results = []
+        for entry in sorted(fused.values(), key=lambda e: e["rrf"], reverse=True):
+            if entry["result"] is None:
+                continue  # 인덱스 갱신 전에 삭제된 청크
+            results.append({
+                **entry["result"],
+                "score": entry["rrf"] / max_rrf,
+                "vector_score": entry.get("vector_score"),
+                "lexical_score": entry.get("lexical_score")
+            })
+        
+        logger.info(
+            f"하이브리드 결합: 벡터 {len(vector_results)}개 + 어휘 {len(lexical_ranked)}개 "
+            f"→ {len(results)}개 (어휘 전용 {len(missing)}개)"
+        )
+        return results
+    
     async def search_by_keyword(
         self,
         keyword: str,
-        k: int = 5
+        k: int = 5,
+        folder_id: Optional[str] = None
     ) -> List[Dict]:
-        """키워드 기반 검색"""
-        # 텍스트 검색 (새로운 구조에 맞게 수정)
+        """키워드 기반 검색 (문서 점수 = 가장 높은 청크 BM25 점수)"""
+        if not self.use_lexical_index:
+            return await self._search_by_regex(keyword, k)
+        
+        # 파일당 여러 청크가 걸리므로 후보를 넉넉히 조회
+        ranked = await lexical_index_manager.search(
+            self.db, keyword, k * 10, folder_id=folder_id, all_folders=not folder_id
+        )
+        if not ranked:
+            return []
+        
+        chunk_files = {}
+        async for chunk in self.db.chunks.find({"_id": {"$in": [oid for oid, _ in ranked]}}, {"file_id": 1}):
+            chunk_files[chunk["_id"]] = chunk.get("file_id")
+        
+        file_scores: Dict[str, float] = {}
+        for chunk_oid, score in ranked:
+            file_id = chunk_files.get(chunk_oid)
+            if file_id and file_id not in file_scores:
+                file_scores[file_id] = score  # ranked는 점수 내림차순
+            if len(file_scores) >= k:
+                break
+        
+        documents = await self.enricher.get_documents(file_scores)
+        results = []
+        for file_id, score in file_scores.items():
+            doc = documents.get(file_id)
+            if doc is None:
+                continue
+            results.append({"document": self._format_document(doc), "score": score})
+        return results
+    
+    async def _search_by_regex(self, keyword: str, k: int) -> List[Dict]:
+        """raw_text 정규식 검색 (어휘 인덱스 비활성화 시)"""
         text_filter = {"raw_text": {"$regex": keyword, "$options": "i"}}
         
         documents = []
         cursor = self.documents.find(text_filter).limit(k)
         
         async for doc in cursor:
-            file_metadata = doc.get("file_metadata", {})
             documents.append({
-                "document": {
-                    "original_filename": file_metadata.get("original_filename", "알 수 없는 파일"),
-                    "file_type": file_metadata.get("file_type", "unknown"),
-                    "file_size": file_metadata.get("file_size", 0),
-                    "description": file_metadata.get("description"),
-                    "upload_time": doc.get("created_at"),
-                    "folder_id": doc.get("folder_id")
-                },
+                "document": self._format_document(doc),
                 "score": 1.0  # 키워드 매칭은 동일한 점수
             })
         
         return documents
+
+    @staticmethod
+    def _format_document(doc: Dict) -> Dict:
+        """문서 메타데이터를 검색 결과 형식으로 변환"""
+        file_metadata = doc.get("file_metadata", {})
+        return {
+            "original_filename": file_metadata.get("original_filename", "알 수 없는 파일"),
+            "file_type": file_metadata.get("file_type", "unknown"),
+            "file_size": file_metadata.get("file_size", 0),
+            "description": file_metadata.get("description"),
+            "upload_time": doc.get("created_at"),
+            "folder_id": doc.get("folder_id")
+        }
@@ -0,0 +1,66 @@
+"""
+검색 인덱스 동기화 모듈
+chunks/documents 컬렉션의 삽입/삭제/수정을 인메모리 검색 인덱스와 캐시에 반영
+ENHANCED: 청크 변경 시 의미 기반 답변 캐시도 폴더 단위로 무효화
+"""
+from typing import Dict, List, Optional
+
+from retrieval.ann_index import ann_index_manager
+from retrieval.answer_cache import answer_cache
+from retrieval.lexical_index import lexical_index_manager
+from retrieval.result_enricher import invalidate_document_metadata
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# (이름, 관리자) - 같은 add_chunks/remove_file/remove_chunks/invalidate_folder/clear 인터페이스
+_INDEX_MANAGERS = (("ANN", ann_index_manager), ("어휘", lexical_index_manager))
+
+def on_chunks_inserted(chunk_records: List[Dict]):
+    """청크 삽입 후 호출 (insert_many가 채운 _id 필요)"""
+    for folder_id in {record.get("folder_id") for record in chunk_records}:
+        answer_cache.invalidate_folder(folder_id)
+    for name, manager in _INDEX_MANAGERS:
+        try:
+            manager.add_chunks(chunk_records)
+        except Exception as e:
+            # 인덱스 갱신 실패는 치명적이지 않음 - 파티션을 폐기하여 재구축 유도
+            logger.warning(f"{name} 인덱스 갱신 실패, 파티션 재구축 예정: {e}")
+            for folder_id in {record.get("folder_id") for record in chunk_records}:
+                manager.invalidate_folder(folder_id)
+
+def on_file_chunks_deleted(file_id: str):
+    """파일 단위 청크 삭제 후 호출"""
+    invalidate_document_metadata(file_id)
+    answer_cache.clear()  # 파일의 폴더를 알 수 없으므로 전체 무효화
+    for name, manager in _INDEX_MANAGERS:
+        try:
+            manager.remove_file(file_id)
+        except Exception as e:
+            logger.warning(f"{name} 인덱스 파일 제거 실패, 전체 재구축 예정: {e}")
+            manager.clear()
+
+def on_file_chunks_replaced(file_id: str, folder_id: Optional[str], removed_ids: List, chunk_records: List[Dict]):
+    """파일 청크 일부 교체 후 호출 (삭제된 청크 _id와 새로 삽입된 청크만 전달)"""
+    invalidate_document_metadata(file_id)
+    answer_cache.invalidate_folder(folder_id)
+    if removed_ids:
+        for name, manager in _INDEX_MANAGERS:
+            try:
+                manager.remove_chunks(file_id, removed_ids)
+            except Exception as e:
+                logger.warning(f"{name} 인덱스 청크 제거 실패, 파티션 재구축 예정: {e}")
+                manager.invalidate_folder(folder_id)
+    if chunk_records:
+        on_chunks_inserted(chunk_records)
+
+def on_folder_chunks_deleted(folder_id: Optional[str]):
+    """폴더 단위 청크 삭제 후 호출"""
+    invalidate_document_metadata()
+    answer_cache.invalidate_folder(folder_id)
+    for _, manager in _INDEX_MANAGERS:
+        manager.invalidate_folder(folder_id)
+
+def on_document_updated(file_id: Optional[str] = None):
+    """문서 메타데이터 수정/삭제 후 호출 (file_id 없으면 전체 무효화)"""
+    invalidate_document_metadata(file_id)
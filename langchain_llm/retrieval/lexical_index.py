@@ -0,0 +1,268 @@
+"""
+어휘(BM25) 인덱스 모듈
+chunks.text 기반 폴더별 인메모리 역색인
+- 한글/한자/가나는 글자 2-gram, 그 외 문자열은 단어 단위로 토큰화 (조사/어미가 붙어도 어간 2-gram이 일치)
+- BM25 점수화, 청크 삽입/삭제 시 로드된 파티션에 증분 반영
+"""
+import asyncio
+import heapq
+import math
+import re
+import time
+import unicodedata
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from config.settings import settings
+from retrieval.ann_index import NO_FOLDER_KEY
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 2-gram 대상 문자열 (한글 음절, 가나, CJK 한자)
+_NGRAM_SCRIPT = "\uac00-\ud7a3\u3040-\u30ff\u4e00-\u9fff"
+_TOKEN_RE = re.compile(rf"[{_NGRAM_SCRIPT}]+|[^\W_{_NGRAM_SCRIPT}]+")
+_NGRAM_RE = re.compile(rf"[{_NGRAM_SCRIPT}]")
+
+def tokenize(text: str) -> List[str]:
+    """검색 토큰 추출 (NFKC 정규화 + 대소문자 통합, 한글 등은 글자 2-gram)"""
+    tokens = []
+    for run in _TOKEN_RE.findall(unicodedata.normalize("NFKC", text or "").casefold()):
+        if len(run) == 1 or not _NGRAM_RE.match(run):
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+class BM25Index:
+    """BM25 역색인 (청크 _id 단위 문서)"""
+
+    def __init__(self, k1: Optional[float] = None, b: Optional[float] = None):
+        self.k1 = settings.LEXICAL_BM25_K1 if k1 is None else k1
+        self.b = settings.LEXICAL_BM25_B if b is None else b
+        self._postings: Dict[str, Dict[object, int]] = {}
+        self._docs: Dict[object, Tuple[str, int, Tuple[str, ...]]] = {}  # _id -> (file_id, 길이, 고유 토큰)
+        self._file_docs: Dict[str, List] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, ids: List, file_ids: List[str], texts: List[str]):
+        """청크 추가 (같은 _id가 있으면 교체)"""
+        for chunk_oid, file_id, text in zip(ids, file_ids, texts):
+            if chunk_oid in self._docs:
+                self._remove_doc(chunk_oid)
+            counts = Counter(tokenize(text))
+            for term, tf in counts.items():
+                self._postings.setdefault(term, {})[chunk_oid] = tf
+            length = sum(counts.values())
+            self._docs[chunk_oid] = (file_id, length, tuple(counts))
+            self._file_docs.setdefault(file_id, []).append(chunk_oid)
+            self._total_length += length
+
+    def remove_files(self, file_ids: List[str]) -> int:
+        """파일 단위 청크 제거, 제거된 수 반환"""
+        removed = 0
+        for file_id in file_ids:
+            for chunk_oid in self._file_docs.pop(file_id, []):
+                if chunk_oid in self._docs:
+                    self._remove_doc(chunk_oid, keep_file_list=True)
+                    removed += 1
+        return removed
+
+    def remove_chunks(self, file_id: str, chunk_ids: List) -> int:
+        """파일의 일부 청크 제거, 제거된 수 반환"""
+        removed = 0
+        for chunk_oid in chunk_ids:
+            if chunk_oid in self._docs:
+                self._remove_doc(chunk_oid)
+                removed += 1
+        return removed
+
+    def _remove_doc(self, chunk_oid, keep_file_list: bool = False):
+        file_id, length, terms = self._docs.pop(chunk_oid)
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(chunk_oid, None)
+            if not postings:
+                del self._postings[term]
+        self._total_length -= length
+        if not keep_file_list:
+            remaining = [oid for oid in self._file_docs.get(file_id, []) if oid != chunk_oid]
+            if remaining:
+                self._file_docs[file_id] = remaining
+            else:
+                self._file_docs.pop(file_id, None)
+
+    def search(
+        self,
+        query_terms: List[str],
+        k: int,
+        file_id: Optional[str] = None,
+        exclude_ids: Optional[Set] = None
+    ) -> List[Tuple[object, float]]:
+        """BM25 상위 k개 (청크 _id, 점수)"""
+        doc_count = len(self._docs)
+        if doc_count == 0 or k <= 0:
+            return []
+
+        avg_length = max(self._total_length / doc_count, 1.0)
+        k1, b = self.k1, self.b
+        scores: Dict[object, float] = {}
+        for term in set(query_terms):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1.0 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_oid, tf in postings.items():
+                length = self._docs[chunk_oid][1]
+                weight = idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / avg_length))
+                scores[chunk_oid] = scores.get(chunk_oid, 0.0) + weight
+
+        if file_id is not None or exclude_ids:
+            scores = {
+                chunk_oid: score for chunk_oid, score in scores.items()
+                if (file_id is None or self._docs[chunk_oid][0] == file_id)
+                and not (exclude_ids and chunk_oid in exclude_ids)
+            }
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+class _Partition:
+    """폴더 단위 어휘 인덱스 파티션"""
+
+    def __init__(self, index: BM25Index):
+        self.index = index
+        self.built_at = time.monotonic()
+
+class LexicalIndexManager:
+    """folder_id 단위로 분할된 BM25 인덱스 관리자 (프로세스 전역)"""
+
+    def __init__(self):
+        self._partitions: Dict[str, _Partition] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    @staticmethod
+    def _key(folder_id: Optional[str]) -> str:
+        return folder_id if folder_id else NO_FOLDER_KEY
+
+    def _is_fresh(self, partition: _Partition) -> bool:
+        return time.monotonic() - partition.built_at < settings.LEXICAL_INDEX_REFRESH_SECONDS
+
+    async def get_partition(self, db: AsyncIOMotorDatabase, folder_id: Optional[str]) -> BM25Index:
+        """폴더 파티션 반환 (없거나 오래되었으면 chunks 컬렉션에서 구축)"""
+        key = self._key(folder_id)
+        partition = self._partitions.get(key)
+        if partition and self._is_fresh(partition):
+            return partition.index
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            partition = self._partitions.get(key)
+            if partition and self._is_fresh(partition):
+                return partition.index
+
+            index = await self._build_partition(db, folder_id)
+            self._partitions[key] = _Partition(index)
+            return index
+
+    async def _build_partition(self, db: AsyncIOMotorDatabase, folder_id: Optional[str]) -> BM25Index:
+        """chunks 컬렉션에서 본문만 조회하여 파티션 구축"""
+        start_time = time.monotonic()
+        match_filter = {"folder_id": folder_id} if folder_id else {"folder_id": {"$in": [None, ""]}}
+
+        index = BM25Index()
+        ids, file_ids, texts = [], [], []
+        cursor = db.chunks.find(match_filter, {"_id": 1, "file_id": 1, "text": 1})
+        async for chunk in cursor:
+            ids.append(chunk["_id"])
+            file_ids.append(chunk.get("file_id"))
+            texts.append(chunk.get("text", ""))
+            if len(ids) >= 1000:
+                index.add(ids, file_ids, texts)
+                ids, file_ids, texts = [], [], []
+                await asyncio.sleep(0)  # 대형 폴더 구축 중 다른 요청 처리 허용
+        index.add(ids, file_ids, texts)
+
+        logger.info(
+            f"어휘 인덱스 파티션 구축 완료: folder={self._key(folder_id)}, "
+            f"{len(index)}개 청크, {time.monotonic() - start_time:.2f}초"
+        )
+        return index
+
+    async def _all_folder_ids(self, db: AsyncIOMotorDatabase) -> List[Optional[str]]:
+        """청크가 존재하는 모든 folder_id 조회"""
+        folder_ids = await db.chunks.distinct("folder_id")
+        keys = {self._key(folder_id) for folder_id in folder_ids}
+        return [None if key == NO_FOLDER_KEY else key for key in keys]
+
+    async def search(
+        self,
+        db: AsyncIOMotorDatabase,
+        query: str,
+        k: int,
+        folder_id: Optional[str] = None,
+        all_folders: bool = False,
+        file_id: Optional[str] = None,
+        exclude_ids: Optional[Set] = None
+    ) -> List[Tuple[object, float]]:
+        """BM25 검색 - all_folders=True면 모든 파티션 결과를 병합"""
+        query_terms = tokenize(query)
+        if not query_terms:
+            return []
+
+        if all_folders:
+            folder_ids = await self._all_folder_ids(db)
+        else:
+            folder_ids = [folder_id]
+
+        merged: List[Tuple[object, float]] = []
+        for fid in folder_ids:
+            index = await self.get_partition(db, fid)
+            merged.extend(index.search(query_terms, k, file_id=file_id, exclude_ids=exclude_ids))
+
+        merged.sort(key=lambda x: x[1], reverse=True)
+        return merged[:k]
+
+    def add_chunks(self, chunk_records: List[Dict]):
+        """삽입된 청크를 이미 로드된 파티션에 반영"""
+        grouped: Dict[str, List[Dict]] = {}
+        for record in chunk_records:
+            if "_id" not in record or "text" not in record:
+                continue
+            grouped.setdefault(self._key(record.get("folder_id")), []).append(record)
+
+        for key, records in grouped.items():
+            partition = self._partitions.get(key)
+            if partition is None:
+                continue  # 아직 로드되지 않은 파티션은 첫 검색 시 구축
+            partition.index.add(
+                [r["_id"] for r in records],
+                [r.get("file_id") for r in records],
+                [r["text"] for r in records]
+            )
+
+    def remove_file(self, file_id: str):
+        """로드된 모든 파티션에서 파일 청크 제거"""
+        for partition in self._partitions.values():
+            partition.index.remove_files([file_id])
+
+    def remove_chunks(self, file_id: str, chunk_ids: List):
+        """로드된 모든 파티션에서 파일의 일부 청크 제거"""
+        for partition in self._partitions.values():
+            partition.index.remove_chunks(file_id, chunk_ids)
+
+    def invalidate_folder(self, folder_id: Optional[str]):
+        """폴더 파티션 폐기 (다음 검색 시 재구축)"""
+        self._partitions.pop(self._key(folder_id), None)
+
+    def clear(self):
+        """모든 파티션 폐기"""
+        self._partitions.clear()
+
+# 싱글톤 인스턴스
+lexical_index_manager = LexicalIndexManager()
@@ -0,0 +1,107 @@
+"""
+검색 결과 보강 모듈
+상위 청크들의 문서 메타데이터/라벨을 컬렉션별 한 번의 $in 조회로 일괄 결합
+"""
+from typing import Dict, Iterable, List, Optional
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from config.settings import settings
+from utils.cache import TTLCache
+from utils.logger import get_logger
+from utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+# 결과 포맷팅에 필요한 문서 필드만 조회 (raw_text 등 대용량 필드 제외)
+DOCUMENT_PROJECTION = {
+    "_id": 0,
+    "file_metadata": 1,
+    "created_at": 1,
+    "folder_id": 1
+}
+
+UNKNOWN_DOCUMENT = {
+    "file_metadata": {
+        "original_filename": "알 수 없는 파일",
+        "file_type": "unknown",
+        "file_size": 0
+    }
+}
+
+# file_id -> 문서 메타데이터 (프로세스 공용)
+document_metadata_cache = TTLCache(
+    maxsize=settings.DOCUMENT_METADATA_CACHE_SIZE,
+    ttl=settings.DOCUMENT_METADATA_CACHE_TTL
+)
+metrics.register_cache("document_metadata", document_metadata_cache.stats)
+
+def invalidate_document_metadata(file_id: Optional[str] = None):
+    """문서 메타데이터 캐시 무효화 (file_id 없으면 전체)"""
+    if file_id is None:
+        document_metadata_cache.clear()
+    else:
+        document_metadata_cache.invalidate(file_id)
+
+class ResultEnricher:
+    """검색 결과 보강 클래스"""
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.documents = db.documents
+        self.labels = db.labels
+
+    async def get_documents(self, file_ids: Iterable[str]) -> Dict[str, Dict]:
+        """file_id 목록의 문서 메타데이터 조회 (캐시 미스만 한 번에 조회)"""
+        file_ids = list(dict.fromkeys(fid for fid in file_ids if fid))
+        documents = document_metadata_cache.get_many(file_ids)
+
+        missing = [fid for fid in file_ids if fid not in documents]
+        if missing:
+            cursor = self.documents.find(
+                {"file_metadata.file_id": {"$in": missing}},
+                DOCUMENT_PROJECTION
+            )
+            async for document in cursor:
+                file_id = document.get("file_metadata", {}).get("file_id")
+                if file_id and file_id not in documents:
+                    documents[file_id] = document
+                    document_metadata_cache.set(file_id, document)
+            logger.debug(f"문서 메타데이터 조회: 캐시 {len(file_ids) - len(missing)}개, DB {len(missing)}개")
+
+        return documents
+
+    async def get_labels(self, file_ids: Iterable[str]) -> Dict[str, Dict]:
+        """file_id 목록의 라벨 일괄 조회"""
+        file_ids = list(dict.fromkeys(fid for fid in file_ids if fid))
+        if not file_ids:
+            return {}
+
+        labels = {}
+        async for label in self.labels.find({"document_id": {"$in": file_ids}}):
+            labels.setdefault(label["document_id"], label)
+        return labels
+
+    async def enrich(self, top_chunks: List[Dict]) -> List[Dict]:
+        """{"chunk", "score"} 목록에 문서 정보 추가"""
+        documents = await self.get_documents(item["chunk"].get("file_id") for item in top_chunks)
+
+        results = []
+        for item in top_chunks:
+            chunk = item["chunk"]
+            document = documents.get(chunk.get("file_id"), UNKNOWN_DOCUMENT)
+            document_info = document.get("file_metadata", {})
+
+            results.append({
+                "chunk": chunk,
+                "document": {
+                    "original_filename": document_info.get("original_filename", "알 수 없는 파일"),
+                    "file_type": document_info.get("file_type", "unknown"),
+                    "file_size": document_info.get("file_size", 0),
+                    "description": document_info.get("description"),
+                    "upload_time": document.get("created_at"),
+                    "folder_id": document.get("folder_id")
+                },
+                "score": item["score"],
+                "chunk_id": chunk.get("chunk_id"),
+                "sequence": chunk.get("sequence", 0)
+            })
+
+        return results
@@ -0,0 +1,57 @@
+"""
+배치 유사도 계산 모듈
+후보 임베딩을 연속된 float32 행렬로 쌓아 한 번의 행렬-벡터 곱으로 코사인 유사도 계산
+"""
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from data_processing.embedding_codec import decode_embedding, decode_embeddings
+
+def stack_embeddings(embeddings: Sequence) -> np.ndarray:
+    """임베딩 목록(배열/바이너리 저장 형식)을 C-연속 float32 행렬로 변환"""
+    if len(embeddings) == 0:
+        return np.zeros((0, 0), dtype=np.float32)
+    if isinstance(embeddings, np.ndarray):
+        return np.array(embeddings, dtype=np.float32, order="C")
+    return np.ascontiguousarray(decode_embeddings(embeddings))
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """행 단위 L2 정규화 (제자리 연산, 영벡터는 0 유지)"""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+def normalize_vector(vector: Sequence[float]) -> np.ndarray:
+    """단일 벡터 정규화 (영벡터는 그대로 반환)"""
+    vector = np.asarray(decode_embedding(vector), dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """점수 상위 k개 인덱스를 내림차순으로 반환 (argpartition 사용)"""
+    n = scores.shape[0]
+    if n == 0 or k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    k = min(k, n)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+def cosine_top_k(
+    query: Sequence[float],
+    normalized_matrix: np.ndarray,
+    k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """정규화된 행렬에 대해 코사인 유사도 상위 k개 (인덱스, 점수) 반환"""
+    if normalized_matrix.shape[0] == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    scores = normalized_matrix @ normalize_vector(query)
+    top = top_k_indices(scores, k)
+    return top, scores[top]
+
+def score_candidates(query: Sequence[float], embeddings: List[Sequence[float]], k: int) -> List[Tuple[int, float]]:
+    """임베딩 목록을 한 번에 점수화하여 상위 k개 (원래 위치, 점수) 반환"""
+    matrix = normalize_rows(stack_embeddings(embeddings))
+    top, scores = cosine_top_k(query, matrix, k)
+    return [(int(i), float(s)) for i, s in zip(top, scores)]
@@ -2,11 +2,19 @@
 벡터 검색 모듈
 MongoDB 벡터 검색 기능 - 청크 기반 검색
 MODIFIED 2024-12-19: 청크 기반 검색으로 업데이트
+ENHANCED: 폴더별 인메모리 ANN 인덱스 검색 경로 추가
+ENHANCED: 2단계 조회 모드 (임베딩만 스캔 후 상위 k개만 본문 조회) 및 전송 바이트 측정
 """
-from typing import List, Dict, Optional
-import numpy as np
+from typing import List, Dict, Optional, Tuple
+import bson
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from config.settings import settings
 from data_processing.embedder import TextEmbedder
+from retrieval.ann_index import ann_index_manager
+from retrieval.result_enricher import ResultEnricher
+from retrieval.scoring import score_candidates
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -14,11 +22,30 @@ logger = get_logger(__name__)
 class VectorSearch:
     """벡터 검색 클래스"""
     
-    def __init__(self, db: AsyncIOMotorDatabase):
+    # ANN 인덱스로 처리 가능한 필터 키
+    ANN_FILTER_KEYS = {"folder_id", "file_id"}
+    
+    # 1단계 스캔 프로젝션 (점수 계산에 필요한 필드만)
+    SCORING_PROJECTION = {"_id": 1, "text_embedding": 1}
+    
+    def __init__(
+        self,
+        db: AsyncIOMotorDatabase,
+        use_ann_index: Optional[bool] = None,
+        two_phase: Optional[bool] = None
+    ):
         self.db = db
-        self.embedder = TextEmbedder()
+        self.embedder = TextEmbedder(feature="query_embedding")
         self.chunks_collection = db.chunks
         self.documents_collection = db.documents
+        self.enricher = ResultEnricher(db)
+        self.use_ann_index = settings.ANN_INDEX_ENABLED if use_ann_index is None else use_ann_index
+        self.two_phase = settings.VECTOR_SEARCH_TWO_PHASE if two_phase is None else two_phase
+        # 원본 BSON 그대로 받아 문서 크기(전송 바이트)를 측정
+        self._raw_chunks = self.chunks_collection.with_options(
+            codec_options=CodecOptions(document_class=RawBSONDocument)
+        )
+        self.last_query_stats: Dict = {}
     
     async def create_vector_index(self):
         """벡터 검색 인덱스 생성"""
@@ -41,85 +68,23 @@ class VectorSearch:
         """유사도 기반 청크 검색"""
         try:
             # 쿼리 임베딩
-            query_embedding = await self.embedder.embed_text(query)
-            
-            # 필터 조건 구성
-            match_filter = {}
-            if filter_dict:
-                if "folder_id" in filter_dict:
-                    # chunks 컬렉션에 직접 folder_id 필드 사용 (OCR Bridge 데이터 포함)
-                    match_filter["folder_id"] = filter_dict["folder_id"]
-                else:
-                    match_filter.update(filter_dict)
-            
-            # 청크 조회
-            chunks = []
-            cursor = self.chunks_collection.find(match_filter)
-            async for chunk in cursor:
-                chunks.append(chunk)
-            
-            logger.info(f"폴더 필터링으로 {len(chunks)}개 청크 조회됨")
-            
-            # 각 청크에 대해 유사도 계산
-            scored_chunks = []
-            for chunk in chunks:
-                if "text_embedding" in chunk:
-                    similarity = self._cosine_similarity(
-                        query_embedding,
-                        chunk["text_embedding"]
-                    )
-                    scored_chunks.append({
-                        "chunk": chunk,
-                        "score": similarity,
-                        "document_id": chunk.get("document_id"),
-                        "file_id": chunk.get("file_id")
-                    })
+            query_embedding = await self.embedder.embed_query(query)
             
-            # 유사도 순으로 정렬
-            scored_chunks.sort(key=lambda x: x["score"], reverse=True)
-            
-            # 상위 k개 반환
-            top_chunks = scored_chunks[:k]
+            # ANN 인덱스 경로 (folder_id / file_id 필터만 있는 경우)
+            use_index = self.use_ann_index and set(filter_dict or {}) <= self.ANN_FILTER_KEYS
+            self._reset_stats(use_index)
+            if use_index:
+                top_chunks = await self._search_with_index(query_embedding, k, filter_dict or {})
+            else:
+                top_chunks = await self._search_with_scan(query_embedding, k, filter_dict)
             
             # 결과 포맷팅 - 문서 정보 추가
-            results = []
-            for item in top_chunks:
-                chunk = item["chunk"]
-                
-                # 문서 정보 조회 (새로운 구조에 맞게 수정)
-                document = await self.documents_collection.find_one(
-                    {"file_metadata.file_id": chunk["file_id"]}
-                )
-                
-                # document가 없으면 기본값 설정
-                if not document:
-                    document = {
-                        "file_metadata": {
-                            "original_filename": "알 수 없는 파일",
-                            "file_type": "unknown",
-                            "file_size": 0
-                        }
-                    }
-                
-                # 새로운 구조에 맞게 document 정보 정리
-                document_info = document.get("file_metadata", {}) if document else {}
-                
-                results.append({
-                    "chunk": chunk,
-                    "document": {
-                        "original_filename": document_info.get("original_filename", "알 수 없는 파일"),
-                        "file_type": document_info.get("file_type", "unknown"),
-                        "file_size": document_info.get("file_size", 0),
-                        "description": document_info.get("description"),
-                        "upload_time": document.get("created_at") if document else None,
-                        "folder_id": document.get("folder_id") if document else None
-                    },
-                    "score": item["score"],
-                    "chunk_id": chunk.get("chunk_id"),
-                    "sequence": chunk.get("sequence", 0)
-                })
+            results = await self._format_results(top_chunks)
             
-            logger.info(f"벡터 검색 완료: {len(results)}개 청크 반환")
+            logger.info(
+                f"벡터 검색 완료: {len(results)}개 청크 반환 "
+                f"(전송 {self.last_query_stats['bytes_transferred']} bytes, 모드: {self.last_query_stats['mode']})"
+            )
             return results
             
         except Exception as e:
@@ -144,10 +109,27 @@ class VectorSearch:
     ) -> List[Dict]:
         """특정 청크와 유사한 청크들 검색"""
         try:
-            # 기준 청크 조회
-            base_chunk = await self.chunks_collection.find_one({"chunk_id": chunk_id})
+            # 기준 청크 조회 (검색에 필요한 필드만)
+            base_chunk = await self.chunks_collection.find_one(
+                {"chunk_id": chunk_id},
+                {"_id": 1, "file_id": 1, "folder_id": 1, "text_embedding": 1}
+            )
             if not base_chunk or "text_embedding" not in base_chunk:
                 return []
+            self._reset_stats(self.use_ann_index)
+            
+            if self.use_ann_index:
+                # ANN 인덱스 경로 - 기준 청크 제외
+                ranked = await ann_index_manager.search(
+                    self.db,
+                    base_chunk["text_embedding"],
+                    k,
+                    folder_id=base_chunk.get("folder_id"),
+                    all_folders=not same_document_only,
+                    file_id=base_chunk["file_id"] if same_document_only else None,
+                    exclude_ids={base_chunk["_id"]}
+                )
+                return await self._load_ranked_chunks(ranked)
             
             # 필터 조건
             filter_dict = {}
@@ -157,43 +139,140 @@ class VectorSearch:
             # 기준 청크 제외
             filter_dict["chunk_id"] = {"$ne": chunk_id}
             
-            # 모든 후보 청크 조회
-            chunks = []
-            cursor = self.chunks_collection.find(filter_dict)
-            async for chunk in cursor:
-                if "text_embedding" in chunk:
-                    similarity = self._cosine_similarity(
-                        base_chunk["text_embedding"],
-                        chunk["text_embedding"]
-                    )
-                    chunks.append({
-                        "chunk": chunk,
-                        "score": similarity
-                    })
-            
-            # 유사도 순 정렬 및 상위 k개 반환
-            chunks.sort(key=lambda x: x["score"], reverse=True)
-            return chunks[:k]
+            return await self._score_and_load(base_chunk["text_embedding"], k, filter_dict)
             
         except Exception as e:
             logger.error(f"유사 청크 검색 실패: {e}")
             raise
     
-    def _cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
-        """코사인 유사도 계산"""
-        try:
-            vec1 = np.array(vec1)
-            vec2 = np.array(vec2)
-            
-            dot_product = np.dot(vec1, vec2)
-            norm1 = np.linalg.norm(vec1)
-            norm2 = np.linalg.norm(vec2)
-            
-            if norm1 == 0 or norm2 == 0:
-                return 0.0
+    async def _search_with_index(
+        self,
+        query_embedding: List[float],
+        k: int,
+        filter_dict: Dict
+    ) -> List[Dict]:
+        """ANN 인덱스로 상위 k개 청크 검색"""
+        folder_id = filter_dict.get("folder_id")
+        file_id = filter_dict.get("file_id")
+        
+        # 파일 필터만 있으면 파일이 속한 폴더 파티션을 사용
+        if file_id and "folder_id" not in filter_dict:
+            owner = await self.chunks_collection.find_one({"file_id": file_id}, {"folder_id": 1})
+            if not owner:
+                return []
+            folder_id = owner.get("folder_id")
+        
+        ranked = await ann_index_manager.search(
+            self.db,
+            query_embedding,
+            k,
+            folder_id=folder_id,
+            all_folders=not folder_id and not file_id,
+            file_id=file_id
+        )
+        logger.info(f"ANN 인덱스 검색: {len(ranked)}개 후보")
+        return await self._load_ranked_chunks(ranked)
+    
+    async def _load_ranked_chunks(self, ranked: List[Tuple[object, float]]) -> List[Dict]:
+        """(청크 _id, 점수) 목록으로 청크 문서를 한 번에 조회하여 순서 유지"""
+        if not ranked:
+            return []
+        
+        chunk_ids = [chunk_oid for chunk_oid, _ in ranked]
+        chunks_by_id = {}
+        async for raw in self._raw_chunks.find({"_id": {"$in": chunk_ids}}):
+            chunk = self._decode(raw, "phase2_bytes")
+            chunks_by_id[chunk["_id"]] = chunk
+        
+        return [
+            {"chunk": chunks_by_id[chunk_oid], "score": score}
+            for chunk_oid, score in ranked
+            if chunk_oid in chunks_by_id
+        ]
+    
+    async def _search_with_scan(
+        self,
+        query_embedding: List[float],
+        k: int,
+        filter_dict: Optional[Dict]
+    ) -> List[Dict]:
+        """필터에 맞는 전체 청크를 조회하여 유사도 계산"""
+        # 필터 조건 구성
+        match_filter = {}
+        if filter_dict:
+            if "folder_id" in filter_dict:
+                # chunks 컬렉션에 직접 folder_id 필드 사용 (OCR Bridge 데이터 포함)
+                match_filter["folder_id"] = filter_dict["folder_id"]
+            else:
+                match_filter.update(filter_dict)
+        
+        return await self._score_and_load(query_embedding, k, match_filter)
+    
+    async def _score_and_load(
+        self,
+        query_embedding: List[float],
+        k: int,
+        match_filter: Dict
+    ) -> List[Dict]:
+        """후보 청크 스캔 후 일괄 점수화 (2단계 모드면 상위 k개만 본문 조회)"""
+        if self.two_phase:
+            # 1단계: _id와 임베딩만 스트리밍
+            chunk_ids, embeddings = [], []
+            cursor = self._raw_chunks.find(match_filter, self.SCORING_PROJECTION)
+            async for raw in cursor:
+                self._count_bytes("phase1_bytes", raw)
+                embedding = raw.get("text_embedding")
+                if embedding is not None:
+                    chunk_ids.append(raw["_id"])
+                    embeddings.append(embedding)
             
-            return float(dot_product / (norm1 * norm2))
+            self.last_query_stats["candidates"] = len(chunk_ids)
+            logger.info(f"필터링으로 {len(chunk_ids)}개 후보 임베딩 조회됨")
             
-        except Exception as e:
-            logger.error(f"코사인 유사도 계산 실패: {e}")
-            return 0.0
+            # 2단계: 최종 상위 k개만 전체 필드 조회
+            ranked = score_candidates(query_embedding, embeddings, k)
+            return await self._load_ranked_chunks([(chunk_ids[i], score) for i, score in ranked])
+        
+        # 단일 단계: 후보 청크 전체 필드 조회
+        chunks = []
+        cursor = self._raw_chunks.find(match_filter)
+        async for raw in cursor:
+            chunk = self._decode(raw, "phase1_bytes")
+            if "text_embedding" in chunk:
+                chunks.append(chunk)
+        
+        self.last_query_stats["candidates"] = len(chunks)
+        logger.info(f"필터링으로 {len(chunks)}개 청크 조회됨")
+        
+        # 후보 임베딩을 한 행렬로 쌓아 일괄 유사도 계산 후 상위 k개 선택
+        ranked = score_candidates(
+            query_embedding,
+            [chunk["text_embedding"] for chunk in chunks],
+            k
+        )
+        return [{"chunk": chunks[i], "score": score} for i, score in ranked]
+    
+    def _decode(self, raw: RawBSONDocument, stat_key: str) -> Dict:
+        """원본 BSON을 dict로 변환하며 전송 바이트 누적"""
+        self._count_bytes(stat_key, raw)
+        return bson.decode(raw.raw)
+    
+    def _count_bytes(self, stat_key: str, raw: RawBSONDocument):
+        """단계별/전체 전송 바이트 누적"""
+        size = len(raw.raw)
+        self.last_query_stats[stat_key] += size
+        self.last_query_stats["bytes_transferred"] += size
+    
+    def _reset_stats(self, use_index: bool):
+        """쿼리별 전송량 통계 초기화"""
+        self.last_query_stats = {
+            "mode": "ann" if use_index else ("two_phase" if self.two_phase else "full"),
+            "candidates": 0,
+            "phase1_bytes": 0,
+            "phase2_bytes": 0,
+            "bytes_transferred": 0
+        }
+    
+    async def _format_results(self, top_chunks: List[Dict]) -> List[Dict]:
+        """검색 결과에 문서 정보 추가 (문서 메타데이터 일괄 조회)"""
+        return await self.enricher.enrich(top_chunks)
@@ -0,0 +1,85 @@
+"""
+임베딩 저장 형식 마이그레이션
+chunks.text_embedding을 지정한 형식(array/float32/float16/int8)으로 일괄 변환
+실행: python -m scripts.migrate_embeddings --format float16 [--folder-id ID] [--batch-size 500] [--dry-run]
+"""
+import argparse
+import asyncio
+from typing import Dict, Optional
+
+from pymongo import UpdateOne
+
+from config.settings import settings
+from data_processing.embedding_codec import (
+    SUPPORTED_FORMATS, decode_embedding, embedding_format, encode_embedding
+)
+from database.connection import close_db, get_database
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+async def migrate(
+    target_format: str,
+    folder_id: Optional[str] = None,
+    batch_size: int = 500,
+    dry_run: bool = False
+) -> Dict:
+    """조건에 맞는 청크 임베딩을 대상 형식으로 변환"""
+    db = await get_database()
+
+    match_filter = {"text_embedding": {"$exists": True, "$ne": None}}
+    if folder_id:
+        match_filter["folder_id"] = folder_id
+
+    if target_format == "int8":
+        logger.warning("int8 양자화는 손실 변환입니다 (원본 정밀도 복원 불가)")
+
+    size_before = (await db.command("collStats", "chunks")).get("size", 0)
+    stats = {"scanned": 0, "converted": 0, "skipped": 0}
+    operations = []
+
+    cursor = db.chunks.find(match_filter, {"_id": 1, "text_embedding": 1}).batch_size(batch_size)
+    async for chunk in cursor:
+        stats["scanned"] += 1
+        embedding = chunk["text_embedding"]
+        if embedding_format(embedding) == target_format:
+            stats["skipped"] += 1
+            continue
+
+        converted = encode_embedding(decode_embedding(embedding), target_format)
+        operations.append(UpdateOne({"_id": chunk["_id"]}, {"$set": {"text_embedding": converted}}))
+
+        if len(operations) >= batch_size:
+            stats["converted"] += await _flush(db, operations, dry_run)
+            logger.info(f"마이그레이션 진행: {stats['scanned']}개 확인, {stats['converted']}개 변환")
+
+    stats["converted"] += await _flush(db, operations, dry_run)
+
+    size_after = (await db.command("collStats", "chunks")).get("size", 0)
+    stats.update({"size_before": size_before, "size_after": size_after, "dry_run": dry_run})
+    logger.info(f"임베딩 마이그레이션 완료 ({target_format}): {stats}")
+
+    await close_db()
+    return stats
+
+async def _flush(db, operations, dry_run: bool) -> int:
+    """대기 중인 변환 일괄 반영"""
+    count = len(operations)
+    if operations and not dry_run:
+        await db.chunks.bulk_write(operations, ordered=False)
+    operations.clear()
+    return count
+
+def main():
+    parser = argparse.ArgumentParser(description="chunks.text_embedding 저장 형식 변환")
+    parser.add_argument("--format", choices=SUPPORTED_FORMATS, default=settings.EMBEDDING_STORAGE_FORMAT)
+    parser.add_argument("--folder-id", default=None, help="특정 폴더만 변환")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true", help="변환 대상 수만 확인")
+    args = parser.parse_args()
+
+    stats = asyncio.run(migrate(args.format, args.folder_id, args.batch_size, args.dry_run))
+    print(stats)
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,12 @@
 """
 Agent Hub
 중앙 에이전트 관리자 - 대화형 메모리와 하이브리드 응답 지원
+ENHANCED: 스트리밍 쿼리 처리 (토큰 전달 후 완료 시점에 대화 저장)
 """
-from typing import Dict, Any, Optional, List
+from typing import AsyncIterator, Dict, Any, Optional, List
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from langchain_openai import ChatOpenAI
 
-from config.settings import settings
+from ai_processing.openai_clients import openai_clients
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -16,11 +16,7 @@ class AgentHub:
     
     def __init__(self, db: AsyncIOMotorDatabase):
         self.db = db
-        self.llm = ChatOpenAI(
-            openai_api_key=settings.OPENAI_API_KEY,
-            model=settings.OPENAI_MODEL,
-            temperature=0.1
-        )
+        self.llm = openai_clients.chat_model(temperature=0.1, feature="agent_hub")
         self._memory_manager = None
         self._hybrid_responder = None
         self._initialized = False
@@ -68,10 +64,10 @@ class AgentHub:
                 import uuid
                 session_id = f"session_{uuid.uuid4().hex[:8]}"
             
-            # 대화 기록 가져오기
+            # 대화 기록 가져오기 (누적 요약 + 토큰 예산 내 최근 메시지)
             conversation_history = []
             if self._memory_manager and session_id:
-                conversation_history = self._memory_manager.get_conversation_history(session_id, "buffer")
+                conversation_history = await self._memory_manager.get_conversation_history(session_id, "summary")
             
             # 컨텍스트에서 검색 옵션 추출
             folder_id = context.get("folder_id") if context else None
@@ -82,7 +78,8 @@ class AgentHub:
                 response_data = await self._hybrid_responder.generate_response(
                     query=query,
                     session_id=session_id,
-                    conversation_history=conversation_history
+                    conversation_history=conversation_history,
+                    folder_id=folder_id
                 )
                 
                 answer = response_data["answer"]
@@ -111,7 +108,7 @@ class AgentHub:
                 "sources": sources,
                 "confidence": confidence,
                 "strategy": strategy,
-                "session_context": self._get_session_context(session_id) if self._memory_manager else {}
+                "session_context": await self._get_session_context(session_id) if self._memory_manager else {}
             }
             
             logger.info(f"향상된 쿼리 처리 완료: {strategy} 전략 사용")
@@ -127,10 +124,65 @@ class AgentHub:
                 "session_id": session_id
             }
     
-    def _get_session_context(self, session_id: str) -> Dict[str, Any]:
+    async def process_query_stream(
+        self,
+        query: str,
+        session_id: Optional[str] = None,
+        context: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """스트리밍 쿼리 처리 - sources/token 이벤트를 전달하고 완료 시 대화 저장 후 done 이벤트"""
+        if not self._initialized or not self._hybrid_responder:
+            raise RuntimeError("Agent Hub가 초기화되지 않았습니다.")
+        
+        logger.info(f"스트리밍 쿼리 처리 시작: '{query}' (session: {session_id})")
+        
+        # 세션 ID가 없으면 생성
+        if not session_id:
+            import uuid
+            session_id = f"session_{uuid.uuid4().hex[:8]}"
+        
+        conversation_history = []
+        if self._memory_manager:
+            conversation_history = await self._memory_manager.get_conversation_history(session_id, "summary")
+        
+        folder_id = context.get("folder_id") if context else None
+        
+        async for event in self._hybrid_responder.stream_response(
+            query=query,
+            session_id=session_id,
+            conversation_history=conversation_history,
+            folder_id=folder_id
+        ):
+            if event["event"] != "done":
+                yield event
+                continue
+            
+            # 스트림이 끝까지 전달된 경우에만 대화 저장 (중간에 연결이 끊기면 저장하지 않음)
+            response_data = event["data"]
+            strategy = response_data.get("strategy", "hybrid")
+            if self._memory_manager:
+                await self._memory_manager.add_message(session_id, query, response_data["answer"])
+            
+            logger.info(f"스트리밍 쿼리 처리 완료: {strategy} 전략 사용")
+            yield {
+                "event": "done",
+                "data": {
+                    "status": "success",
+                    "query": query,
+                    "answer": response_data["answer"],
+                    "agent_type": f"hybrid_{strategy}",
+                    "session_id": session_id,
+                    "sources": response_data.get("sources", []),
+                    "confidence": response_data.get("confidence", 0.8),
+                    "strategy": strategy,
+                    "session_context": await self._get_session_context(session_id) if self._memory_manager else {}
+                }
+            }
+    
+    async def _get_session_context(self, session_id: str) -> Dict[str, Any]:
         """세션 컨텍스트 정보 반환"""
         if self._memory_manager:
-            return self._memory_manager.get_session_context(session_id)
+            return await self._memory_manager.get_session_context(session_id)
         return {}
     
     async def get_agent_capabilities(self) -> Dict[str, Any]:
@@ -155,7 +207,7 @@ class AgentHub:
         if not self._memory_manager:
             return {"error": "메모리 매니저 사용 불가"}
         
-        return self._memory_manager.get_session_context(session_id)
+        return await self._memory_manager.get_session_context(session_id)
     
     async def clear_session(self, session_id: str) -> Dict[str, Any]:
         """세션 삭제"""
@@ -173,9 +225,14 @@ class AgentHub:
         if not self._memory_manager:
             return {"sessions": {}, "error": "메모리 매니저 사용 불가"}
         
-        sessions = self._memory_manager.get_all_sessions()
+        sessions = await self._memory_manager.get_all_sessions()
         return {"sessions": sessions, "total_count": len(sessions)}
     
+    async def close(self):
+        """종료 시 저장 대기 중인 대화 기록 반영"""
+        if self._memory_manager:
+            await self._memory_manager.close()
+    
     async def run_tool_directly(
         self,
         tool_name: str,
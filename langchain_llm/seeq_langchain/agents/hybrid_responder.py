@@ -1,28 +1,48 @@
 """
 하이브리드 응답 생성기
 벡터 검색 + 일반 지식을 결합한 응답 시스템
+ENHANCED: 대화 기록(누적 요약 + 토큰 예산 내 최근 메시지)을 각 프롬프트에 포함
+ENHANCED: 폴더별 의미 기반 답변 캐시 (유사 질의 + 폴더 내용 버전 일치 시 검색/생성 생략)
+  대화 기록이 있어도 독립적인 질문은 캐시 사용, 지시어가 있거나 짧은 후속 질문은 기록에 의존하므로 생략 (stats의 bypassed)
+ENHANCED: 스트리밍 응답 (출처 먼저 전송 후 생성 토큰을 도착 순서대로 전달)
 """
 import asyncio
 import json
-from typing import Dict, Any, List, Optional
+import re
+import time
+from typing import AsyncIterator, Dict, Any, List, Optional
 from motor.motor_asyncio import AsyncIOMotorDatabase
-import openai
 
+from ai_processing.openai_clients import openai_clients
 from config.settings import settings
+from retrieval.answer_cache import answer_cache, folder_content_version
+from retrieval.context_builder import ContextBuilder
 from retrieval.vector_search import VectorSearch
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# 이전 대화를 가리키는 표현 (대화 기록이 있을 때 이런 질문은 답변 캐시 생략)
+_CONTEXT_REFERENCE_RE = re.compile(
+    r"그것|그거|그게|그건|그걸|이것|이거|이게|이건|저것|저거|위의|위에서|앞의|앞에서|아까|방금|이전|"
+    r"그럼|그러면|그래서|그 중|그중|더 자세히|자세히|계속|다시|"
+    r"\b(it|its|that|this|those|these|they|them|above|previous|earlier|again|more)\b",
+    re.IGNORECASE
+)
+
 class HybridResponder:
     """
     하이브리드 응답 생성기
     벡터 검색 + 일반 지식을 결합한 응답 시스템
     """
     
+    # 캐시에 저장하지 않는 응답 전략 (오류/대체 응답)
+    UNCACHEABLE_STRATEGIES = {"fallback", "vector_error", "hybrid_error", "general_error"}
+    
     def __init__(self, db: AsyncIOMotorDatabase):
         self.db = db
         self.vector_search = VectorSearch(db)
+        self.context_builder = ContextBuilder()
         self.openai_client = None
         self._initialized = False
     
@@ -32,10 +52,8 @@ class HybridResponder:
             return
         
         try:
-            # OpenAI 클라이언트 직접 사용
-            self.openai_client = openai.AsyncOpenAI(
-                api_key=settings.OPENAI_API_KEY
-            )
+            # 프로세스 전역 공유 OpenAI 클라이언트 사용
+            self.openai_client = openai_clients.get("chat", "hybrid_response")
             
             logger.info("Hybrid Responder 초기화 완료")
             
@@ -49,29 +67,36 @@ class HybridResponder:
         self,
         query: str,
         session_id: str,
-        conversation_history: List = None
+        conversation_history: List = None,
+        folder_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """응답 생성"""
         try:
+            # 0. 답변 캐시 조회 (이전 대화에 의존하는 후속 질문은 캐시하지 않음)
+            cache_key = await self._cache_key(query, conversation_history, folder_id)
+            cached = self._lookup_cache(cache_key)
+            if cached is not None:
+                return cached
+            
             # 1. 벡터 검색 수행
-            vector_results = await self.vector_search.search_similar(
-                query=query,
-                k=5,
-                filter_dict=None
-            )
+            vector_results = await self._search(query, folder_id)
             
             # 2. 전략 결정 및 응답 생성
             best_score = max([r.get("score", 0.0) for r in vector_results]) if vector_results else 0.0
             
             if best_score >= 0.8:
                 # 높은 유사도: 벡터 기반 응답
-                return await self._generate_vector_based_response(query, vector_results, conversation_history)
+                response = await self._generate_vector_based_response(query, vector_results, conversation_history)
             elif best_score >= 0.3:
                 # 중간 유사도: 하이브리드 응답
-                return await self._generate_hybrid_response(query, vector_results, conversation_history)
+                response = await self._generate_hybrid_response(query, vector_results, conversation_history)
             else:
                 # 낮은 유사도: 일반 지식 응답
-                return await self._generate_general_knowledge_response(query, conversation_history)
+                response = await self._generate_general_knowledge_response(query, conversation_history)
+            
+            # 3. 답변 캐시 저장
+            self._store_cache(cache_key, query, response)
+            return response
                 
         except Exception as e:
             logger.error(f"하이브리드 응답 생성 실패: {e}")
@@ -81,6 +106,93 @@ class HybridResponder:
                 "strategy": "fallback",
                 "confidence": 0.1
             }
+    
+    async def stream_response(
+        self,
+        query: str,
+        session_id: str,
+        conversation_history: List = None,
+        folder_id: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """스트리밍 응답 생성 - sources 이벤트, token 이벤트들, done 이벤트(전체 응답) 순서"""
+        cache_key = await self._cache_key(query, conversation_history, folder_id)
+        cached = self._lookup_cache(cache_key)
+        if cached is not None:
+            yield {"event": "sources", "data": self._plan_summary(cached)}
+            yield {"event": "token", "data": {"text": cached["answer"]}}
+            yield {"event": "done", "data": cached}
+            return
+        
+        vector_results = await self._search(query, folder_id)
+        best_score = max([r.get("score", 0.0) for r in vector_results]) if vector_results else 0.0
+        if best_score >= 0.8:
+            plan = self._vector_based_plan(query, vector_results, conversation_history)
+        elif best_score >= 0.3:
+            plan = self._hybrid_plan(query, vector_results, conversation_history)
+        else:
+            plan = self._general_knowledge_plan(query, conversation_history)
+        
+        # 출처를 먼저 전송한 뒤 생성되는 토큰을 그대로 전달
+        yield {"event": "sources", "data": self._plan_summary(plan)}
+        parts = []
+        async for text in self._stream_openai(plan["prompt"]):
+            parts.append(text)
+            yield {"event": "token", "data": {"text": text}}
+        
+        response = self._plan_response(plan, "".join(parts))
+        self._store_cache(cache_key, query, response)
+        yield {"event": "done", "data": response}
+    
+    async def _search(self, query: str, folder_id: Optional[str]) -> List[Dict]:
+        """벡터 검색 (folder_id가 있으면 해당 폴더로 제한)"""
+        return await self.vector_search.search_similar(
+            query=query,
+            k=5,
+            filter_dict={"folder_id": folder_id} if folder_id else None
+        )
+    
+    async def _cache_key(
+        self,
+        query: str,
+        conversation_history: Optional[List],
+        folder_id: Optional[str]
+    ) -> Optional[Dict[str, Any]]:
+        """답변 캐시 조회/저장 키 (캐시를 사용하지 않으면 None)"""
+        if not settings.ANSWER_CACHE_ENABLED:
+            return None
+        if conversation_history and self._depends_on_history(query):
+            answer_cache.record_bypass()
+            return None
+        return {
+            "folder_id": folder_id,
+            "embedding": await self.vector_search.embedder.embed_query(query),
+            # 검색 전에 읽은 버전으로 저장하여 생성 중 변경은 다음 조회에서 무효화
+            "version": await folder_content_version(self.db, folder_id),
+            "started_at": time.perf_counter()
+        }
+    
+    @staticmethod
+    def _depends_on_history(query: str) -> bool:
+        """이전 대화에 의존하는 후속 질문인지 (지시어 포함 또는 짧은 질문)"""
+        query = query.strip()
+        return len(query) < settings.ANSWER_CACHE_MIN_STANDALONE_CHARS or bool(_CONTEXT_REFERENCE_RE.search(query))
+    
+    def _lookup_cache(self, cache_key: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """답변 캐시 조회"""
+        if cache_key is None:
+            return None
+        cached = answer_cache.lookup(cache_key["folder_id"], cache_key["embedding"], cache_key["version"])
+        if cached is not None:
+            logger.info(
+                f"답변 캐시 적중 (유사도 {cached['cache']['similarity']}, "
+                f"{(time.perf_counter() - cache_key['started_at']) * 1000:.1f}ms)"
+            )
+        return cached
+    
+    def _store_cache(self, cache_key: Optional[Dict[str, Any]], query: str, response: Dict[str, Any]):
+        """답변 캐시 저장 (오류/대체 응답 제외)"""
+        if cache_key is not None and response.get("strategy") not in self.UNCACHEABLE_STRATEGIES:
+            answer_cache.store(cache_key["folder_id"], query, cache_key["embedding"], cache_key["version"], response)
 
     async def _call_openai(self, prompt: str) -> str:
         """OpenAI API 직접 호출"""
@@ -97,64 +209,112 @@ class HybridResponder:
             return response.choices[0].message.content
             
         except Exception as e:
+            # 호출자의 오류 응답(*_error 전략)으로 처리 - 오류 문구가 답변으로 캐시되지 않도록 함
             logger.error(f"OpenAI API 호출 실패: {e}")
-            return f"응답 생성 중 오류가 발생했습니다: {str(e)}"
+            raise
 
-    async def _generate_vector_based_response(
-        self, 
-        query: str, 
+    async def _stream_openai(self, prompt: str) -> AsyncIterator[str]:
+        """OpenAI API 스트리밍 호출 (텍스트 조각 단위)"""
+        try:
+            stream = await self.openai_client.chat.completions.create(
+                model=settings.OPENAI_MODEL,
+                messages=[
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.7,
+                max_tokens=1000,
+                stream=True
+            )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        
+        except Exception as e:
+            logger.error(f"OpenAI API 스트리밍 호출 실패: {e}")
+            raise
+
+    @staticmethod
+    def _plan_response(plan: Dict[str, Any], answer: str) -> Dict[str, Any]:
+        """프롬프트 계획과 생성된 답변으로 응답 구성"""
+        return {
+            "answer": answer,
+            "sources": plan["sources"],
+            "strategy": plan["strategy"],
+            "confidence": plan["confidence"]
+        }
+    
+    @staticmethod
+    def _plan_summary(plan: Dict[str, Any]) -> Dict[str, Any]:
+        """답변 생성 전에 보낼 수 있는 정보 (출처, 전략, 신뢰도)"""
+        summary = {key: plan[key] for key in ("sources", "strategy", "confidence")}
+        if "cache" in plan:
+            summary["cache"] = plan["cache"]
+        return summary
+    
+    @staticmethod
+    def _source_items(results: List[Dict]) -> List[Dict[str, Any]]:
+        """응답 출처 목록"""
+        return [
+            {
+                "text": result["chunk"]["text"][:200] + "...",
+                "score": result.get("score", 0.0),
+                "filename": result["document"].get("original_filename", ""),
+                "file_id": result["chunk"].get("file_id", ""),
+                "chunk_id": result["chunk"].get("chunk_id", "")
+            }
+            for result in results
+        ]
+
+    def _vector_based_plan(
+        self,
+        query: str,
         vector_results: List[Dict],
         conversation_history: List = None
     ) -> Dict[str, Any]:
-        """벡터 기반 응답 생성 - 출처 정보 포함"""
+        """벡터 기반 응답 프롬프트 구성"""
+        # 컨텍스트 구성 (연속 청크 병합, 토큰 예산 내 선택)
+        segments = self.context_builder.pack_results(vector_results, settings.CONTEXT_MAX_TOKENS)
+        used_results = [result for segment in segments for result in segment["results"]]
         
-        try:
-            # 컨텍스트 구성
-            context_texts = []
-            source_info = []
-            
-            for result in vector_results[:3]:
-                context_texts.append(result["chunk"]["text"])
-                filename = result["document"].get("original_filename", "알 수 없는 파일")
-                source_info.append(f"📄 {filename}")
-            
-            context = "\n\n".join(context_texts)
-            sources_text = "\n".join(source_info)
-            
-            # 단순한 프롬프트 생성
-            prompt = f"""
+        context = "\n\n".join(segment["text"] for segment in segments)
+        sources_text = self._sources_text(used_results)
+        
+        # 단순한 프롬프트 생성
+        prompt = f"""
 당신은 친근하고 도움이 되는 AI 어시스턴트입니다.
 아래 문서 내용을 바탕으로 사용자의 질문에 답변해주세요.
 
 참고 문서:
 {context}
 
-질문: {query}
+{self._history_block(conversation_history)}질문: {query}
 
 답변 마지막에는 다음과 같이 출처를 명시해주세요:
 
 📚 **참고 문서:**
 {sources_text}
 """
+        return {
+            "prompt": prompt,
+            "sources": self._source_items(used_results),
+            "strategy": "vector_based",
+            "confidence": 0.9
+        }
+
+    async def _generate_vector_based_response(
+        self, 
+        query: str, 
+        vector_results: List[Dict],
+        conversation_history: List = None
+    ) -> Dict[str, Any]:
+        """벡터 기반 응답 생성 - 출처 정보 포함"""
+        
+        try:
+            plan = self._vector_based_plan(query, vector_results, conversation_history)
             
             # OpenAI API 직접 호출
-            answer = await self._call_openai(prompt)
-            
-            return {
-                "answer": answer,
-                "sources": [
-                    {
-                        "text": result["chunk"]["text"][:200] + "...",
-                        "score": result.get("score", 0.0),
-                        "filename": result["document"].get("original_filename", ""),
-                        "file_id": result["chunk"].get("file_id", ""),
-                        "chunk_id": result["chunk"].get("chunk_id", "")
-                    }
-                    for result in vector_results[:3]
-                ],
-                "strategy": "vector_based",
-                "confidence": 0.9
-            }
+            answer = await self._call_openai(plan["prompt"])
+            return self._plan_response(plan, answer)
             
         except Exception as e:
             logger.error(f"벡터 기반 응답 생성 실패: {e}")
@@ -165,37 +325,51 @@ class HybridResponder:
                 "confidence": 0.3
             }
     
-    async def _generate_hybrid_response(
+    @staticmethod
+    def _history_block(conversation_history: Optional[List]) -> str:
+        """프롬프트용 이전 대화 블록 (기록이 없으면 빈 문자열)"""
+        if not conversation_history:
+            return ""
+        speakers = {"human": "사용자", "ai": "어시스턴트"}
+        lines = []
+        for msg in conversation_history:
+            speaker = speakers.get(getattr(msg, "type", None))
+            lines.append(f"{speaker}: {msg.content}" if speaker else msg.content)
+        return "이전 대화:\n" + "\n".join(lines) + "\n\n"
+    
+    @staticmethod
+    def _sources_text(results: List[Dict]) -> str:
+        """출처 파일 목록 (중복 파일 제거)"""
+        filenames = dict.fromkeys(
+            result["document"].get("original_filename", "알 수 없는 파일") for result in results
+        )
+        return "\n".join(f"📄 {filename}" for filename in filenames)
+    
+    def _hybrid_plan(
         self,
         query: str,
         vector_results: List[Dict],
         conversation_history: List = None
     ) -> Dict[str, Any]:
-        """하이브리드 응답 생성 - 부분적 정보 + 일반 지식"""
+        """하이브리드 응답 프롬프트 구성"""
+        # 관련 있는 문서들만 선별
+        relevant_docs = [r for r in vector_results if r.get("score", 0) >= 0.3]
         
-        try:
-            # 관련 있는 문서들만 선별
-            relevant_docs = [r for r in vector_results if r.get("score", 0) >= 0.3]
+        if relevant_docs:
+            # 부분적 정보가 있는 경우 (일반 지식 보완 여지를 위해 예산의 절반만 사용)
+            segments = self.context_builder.pack_results(relevant_docs, settings.CONTEXT_MAX_TOKENS // 2)
+            relevant_docs = [result for segment in segments for result in segment["results"]]
+            context = "\n\n".join(segment["text"] for segment in segments)
+            sources_text = self._sources_text(relevant_docs)
             
-            if relevant_docs:
-                # 부분적 정보가 있는 경우
-                context_texts = [result["chunk"]["text"] for result in relevant_docs[:2]]
-                context = "\n\n".join(context_texts)
-                
-                source_info = []
-                for result in relevant_docs[:2]:
-                    filename = result["document"].get("original_filename", "알 수 없는 파일")
-                    source_info.append(f"📄 {filename}")
-                sources_text = "\n".join(source_info)
-                
-                prompt = f"""
+            prompt = f"""
 당신은 친근하고 지식이 풍부한 AI 어시스턴트입니다.
 제공된 문서에는 부분적인 관련 정보만 있습니다. 이 정보를 참고하되, 부족한 부분은 당신의 일반 지식으로 보완하여 완전한 답변을 제공해주세요.
 
 부분적 관련 문서:
 {context}
 
-질문: {query}
+{self._history_block(conversation_history)}질문: {query}
 
 답변 형식:
 1. 문서에서 찾은 정보: [문서 내용 기반]
@@ -204,35 +378,37 @@ class HybridResponder:
 📚 **참고한 문서:**
 {sources_text}
 """
-                
-            else:
-                # 관련 문서가 전혀 없는 경우
-                prompt = f"""
-질문: {query}
+            
+        else:
+            # 관련 문서가 전혀 없는 경우
+            prompt = f"""
+{self._history_block(conversation_history)}질문: {query}
 
 ⚠️ 데이터베이스에서 이 질문과 직접 관련된 문서를 찾을 수 없었습니다.
 
 하지만 일반적인 지식을 바탕으로 도움이 되는 답변을 드리겠습니다:
 """
+        return {
+            "prompt": prompt,
+            "sources": self._source_items(relevant_docs),
+            "strategy": "hybrid",
+            "confidence": 0.8
+        }
+    
+    async def _generate_hybrid_response(
+        self,
+        query: str,
+        vector_results: List[Dict],
+        conversation_history: List = None
+    ) -> Dict[str, Any]:
+        """하이브리드 응답 생성 - 부분적 정보 + 일반 지식"""
+        
+        try:
+            plan = self._hybrid_plan(query, vector_results, conversation_history)
             
             # OpenAI API 직접 호출
-            answer = await self._call_openai(prompt)
-            
-            return {
-                "answer": answer,
-                "sources": [
-                    {
-                        "text": result["chunk"]["text"][:200] + "...",
-                        "score": result.get("score", 0.0),
-                        "filename": result["document"].get("original_filename", ""),
-                        "file_id": result["chunk"].get("file_id", ""),
-                        "chunk_id": result["chunk"].get("chunk_id", "")
-                    }
-                    for result in relevant_docs
-                ] if relevant_docs else [],
-                "strategy": "hybrid",
-                "confidence": 0.8
-            }
+            answer = await self._call_openai(plan["prompt"])
+            return self._plan_response(plan, answer)
             
         except Exception as e:
             logger.error(f"하이브리드 응답 생성 실패: {e}")
@@ -243,32 +419,40 @@ class HybridResponder:
                 "confidence": 0.3
             }
     
-    async def _generate_general_knowledge_response(
+    def _general_knowledge_plan(
         self,
         query: str,
         conversation_history: List = None
     ) -> Dict[str, Any]:
-        """일반 지식 기반 응답 생성 - 데이터베이스에 없음을 명시"""
-        
-        try:
-            prompt = f"""
-질문: {query}
+        """일반 지식 응답 프롬프트 구성"""
+        prompt = f"""
+{self._history_block(conversation_history)}질문: {query}
 
 ❌ **데이터베이스 검색 결과:** 이 질문과 관련된 문서를 찾을 수 없었습니다.
 
 💡 **일반 지식 기반 답변:**
 당신의 일반적인 지식을 바탕으로 위 질문에 대해 정확하고 유용한 정보를 제공해주세요.
 """
+        return {
+            "prompt": prompt,
+            "sources": [],
+            "strategy": "general_knowledge",
+            "confidence": 0.7
+        }
+    
+    async def _generate_general_knowledge_response(
+        self,
+        query: str,
+        conversation_history: List = None
+    ) -> Dict[str, Any]:
+        """일반 지식 기반 응답 생성 - 데이터베이스에 없음을 명시"""
+        
+        try:
+            plan = self._general_knowledge_plan(query, conversation_history)
             
             # OpenAI API 직접 호출
-            answer = await self._call_openai(prompt)
-            
-            return {
-                "answer": answer,
-                "sources": [],
-                "strategy": "general_knowledge",
-                "confidence": 0.7
-            }
+            answer = await self._call_openai(plan["prompt"])
+            return self._plan_response(plan, answer)
             
         except Exception as e:
             logger.error(f"일반 지식 응답 생성 실패: {e}")
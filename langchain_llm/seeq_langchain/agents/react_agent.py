@@ -5,9 +5,8 @@ ReAct Agent Implementation
 from typing import Dict, Any, List, Optional
 from langchain.agents import create_react_agent, AgentExecutor
 from langchain_core.prompts import PromptTemplate
-from langchain_openai import ChatOpenAI
 
-from config.settings import settings
+from ai_processing.openai_clients import openai_clients
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -16,11 +15,7 @@ class ReactAgent:
     """ReAct 에이전트"""
     
     def __init__(self):
-        self.llm = ChatOpenAI(
-            openai_api_key=settings.OPENAI_API_KEY,
-            model_name=settings.OPENAI_MODEL,
-            temperature=0.1
-        )
+        self.llm = openai_clients.chat_model(temperature=0.1, feature="react_agent")
         self.agent = None
         self.agent_executor = None
         self._initialized = False
@@ -4,10 +4,9 @@ Chain Manager
 """
 from typing import Dict, Any, Optional
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from langchain_openai import ChatOpenAI
 from langchain.memory import ConversationBufferMemory
 
-from config.settings import settings
+from ai_processing.openai_clients import openai_clients
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -17,11 +16,7 @@ class ChainManager:
     
     def __init__(self, db: AsyncIOMotorDatabase):
         self.db = db
-        self.llm = ChatOpenAI(
-            openai_api_key=settings.OPENAI_API_KEY,
-            model_name=settings.OPENAI_MODEL,
-            temperature=0.1
-        )
+        self.llm = openai_clients.chat_model(temperature=0.1, feature="chain_manager")
         self._chains: Dict[str, Any] = {}
         self._initialized = False
     
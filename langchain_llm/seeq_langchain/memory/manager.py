@@ -1,192 +1,447 @@
 """
 Memory Manager
 메모리 시스템 중앙 관리자 - 현대적인 대화 기록 관리
+ENHANCED: 세션은 첫 접근 시 chat_sessions에서 최근 메시지만 로드, LRU(세션 수/본문 크기) + 유휴 만료로 메모리 상한 유지
+ENHANCED: 대화 저장은 세션별 백그라운드 쓰기로 응답 경로에서 분리, 세션 목록은 MongoDB 프로젝션으로 조회
+ENHANCED: 메시지는 chat_message_buckets 고정 크기 버킷에 저장 (세션 문서는 메타데이터만 유지)
+ENHANCED: 오래된 대화는 백그라운드에서 누적 요약에 합치고, 프롬프트용 대화 기록은 요약 + 최근 메시지를 토큰 예산 내로 제한
 """
+import asyncio
+import time
+from collections import OrderedDict
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from langchain_openai import ChatOpenAI
-from langchain.schema import HumanMessage, AIMessage
+from langchain.schema import HumanMessage, AIMessage, SystemMessage
 
+from ai_processing.openai_clients import openai_clients
 from config.settings import settings
+from database.chat_message_store import ChatMessageStore
 from utils.logger import get_logger
+from utils.tokenizer import count_tokens
 
 logger = get_logger(__name__)
 
 class MemoryManager:
     """메모리 관리자 - 현대적인 대화 기록 관리"""
-    
+
+    # 세션 목록 조회 프로젝션 (요약용 첫 질문만 포함, 버킷 이전 전 세션은 앞부분 메시지)
+    SESSION_LIST_PROJECTION = {
+        "_id": 0,
+        "session_id": 1,
+        "created_at": 1,
+        "last_activity": 1,
+        "message_count": 1,
+        "first_questions": 1,
+        "summary": 1,
+        "messages": {"$slice": 6}
+    }
+
     def __init__(self, db: AsyncIOMotorDatabase):
         self.db = db
-        self.llm = ChatOpenAI(
-            openai_api_key=settings.OPENAI_API_KEY,
-            model_name=settings.OPENAI_MODEL,
-            temperature=0.1
-        )
-        self._sessions: Dict[str, Dict[str, Any]] = {}
+        self.message_store = ChatMessageStore(db)
+        self.llm = openai_clients.chat_model(temperature=0.1, feature="memory_summary")
+        # session_id -> 세션 (가장 오래 사용되지 않은 세션이 앞쪽)
+        self._sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._cached_chars = 0
+        self._load_locks: Dict[str, asyncio.Lock] = {}
+        self._flush_tasks: Dict[str, asyncio.Task] = {}
+        self._summary_tasks: Dict[str, asyncio.Task] = {}
+        self._closing = asyncio.Event()
         self._initialized = False
-    
+
     async def initialize(self):
-        """메모리 시스템 초기화"""
+        """메모리 시스템 초기화 (세션은 첫 접근 시 로드)"""
         if self._initialized:
             return
-        
-        try:
-            # 기존 세션 로드
-            await self._load_existing_sessions()
-            self._initialized = True
-            logger.info("Memory Manager 초기화 완료")
-            
-        except Exception as e:
-            logger.error(f"Memory Manager 초기화 실패: {e}")
-            raise
-    
-    async def _load_existing_sessions(self):
-        """기존 세션들을 데이터베이스에서 로드"""
+
+        self._initialized = True
+        logger.info("Memory Manager 초기화 완료 (세션 지연 로드)")
+
+    @staticmethod
+    def _new_session(created_at: Optional[datetime] = None, last_activity: Optional[datetime] = None,
+                     message_count: int = 0, message_total: int = 0, summary: str = "",
+                     summary_upto: int = 0) -> Dict[str, Any]:
+        """세션 캐시 항목 생성"""
+        now = datetime.now()
+        return {
+            "messages": [],  # 직접 메시지 관리 (마지막 메시지의 위치 = message_total - 1)
+            "created_at": created_at or now,
+            "last_activity": last_activity or now,
+            "message_count": message_count,
+            "message_total": message_total,  # 세션 전체 메시지 수
+            "summary": summary,  # 앞쪽 summary_upto개 메시지의 누적 요약
+            "summary_upto": summary_upto,
+            "chars": 0,  # 캐시된 메시지 본문 문자 수
+            "pending": [],  # 아직 저장되지 않은 메시지
+            "flush_failed_at": None,  # 저장 실패가 이어지기 시작한 시각 (성공하면 None)
+            "flush_waiting": False,  # 저장 재시도 대기 중 (저장 요청 진행 중이 아님)
+            "accessed_at": time.monotonic()
+        }
+
+    @staticmethod
+    def _to_message(msg: Dict[str, Any]):
+        """저장된 메시지를 LangChain 메시지로 변환"""
+        if msg.get("role") == "human":
+            return HumanMessage(content=msg.get("content", ""))
+        if msg.get("role") == "ai":
+            return AIMessage(content=msg.get("content", ""))
+        return None
+
+    def _set_messages(self, session: Dict[str, Any], messages: List):
+        """세션 메시지 교체 (캐시 크기 집계 갱신)"""
+        chars = sum(len(msg.content) for msg in messages)
+        self._cached_chars += chars - session["chars"]
+        session["messages"] = messages
+        session["chars"] = chars
+
+    async def _load_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """chat_sessions에서 세션 메타데이터, 버킷에서 최근 메시지만 로드"""
+        session_doc = await self.db.chat_sessions.find_one(
+            {"session_id": session_id},
+            {
+                "_id": 0, "created_at": 1, "last_activity": 1, "message_count": 1,
+                "message_total": 1, "summary": 1, "summary_upto": 1
+            }
+        )
+        if session_doc is None:
+            return None
+
+        message_total = session_doc.get("message_total")
+        if message_total is None:
+            # 세션 문서에 메시지가 내장된 이전 형식 - 첫 접근 시 버킷으로 이전
+            message_total = await self.message_store.migrate_legacy(session_id)
+
+        session = self._new_session(
+            session_doc.get("created_at"),
+            session_doc.get("last_activity"),
+            session_doc.get("message_count", 0),
+            message_total,
+            session_doc.get("summary", ""),
+            session_doc.get("summary_upto", 0)
+        )
+        # 채팅 기록 복원
+        recent = await self.message_store.recent(session_id, settings.MEMORY_SESSION_HISTORY_MESSAGES)
+        messages = [self._to_message(msg) for msg in recent]
+        self._set_messages(session, [msg for msg in messages if msg is not None])
+        return session
+
+    async def _get_session(self, session_id: str, create: bool = False) -> Optional[Dict[str, Any]]:
+        """세션 조회 (캐시에 없으면 로드, create=True면 없을 때 생성)"""
+        session = self._touch(session_id)
+        if session is not None:
+            return session
+
+        lock = self._load_locks.setdefault(session_id, asyncio.Lock())
         try:
-            collection = self.db.chat_sessions
-            sessions = await collection.find({}).to_list(length=None)
-            
-            for session_doc in sessions:
-                session_id = session_doc["session_id"]
-                self._sessions[session_id] = {
-                    "messages": [],  # 직접 메시지 관리
-                    "created_at": session_doc.get("created_at", datetime.now()),
-                    "last_activity": session_doc.get("last_activity", datetime.now()),
-                    "message_count": session_doc.get("message_count", 0)
-                }
-                
-                # 채팅 기록 복원
-                if "messages" in session_doc:
-                    for msg in session_doc["messages"]:
-                        if msg["role"] == "human":
-                            self._sessions[session_id]["messages"].append(
-                                HumanMessage(content=msg["content"])
-                            )
-                        elif msg["role"] == "ai":
-                            self._sessions[session_id]["messages"].append(
-                                AIMessage(content=msg["content"])
-                            )
-            
-            logger.info(f"기존 세션 {len(self._sessions)}개 로드 완료")
-            
-        except Exception as e:
-            logger.warning(f"기존 세션 로드 실패: {e}")
-    
-    def get_or_create_session(self, session_id: str) -> Dict[str, Any]:
+            async with lock:
+                session = self._touch(session_id)
+                if session is not None:
+                    return session
+
+                try:
+                    session = await self._load_session(session_id)
+                except Exception as e:
+                    logger.warning(f"세션 로드 실패 ({session_id}): {e}")
+                    session = None
+
+                if session is None:
+                    if not create:
+                        return None
+                    session = self._new_session()
+                    logger.info(f"새 세션 생성: {session_id}")
+
+                self._sessions[session_id] = session
+                self._evict()
+                return session
+        finally:
+            self._load_locks.pop(session_id, None)
+
+    def _touch(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """캐시된 세션을 최근 사용으로 표시 (유휴 만료된 세션은 제거 후 None)"""
+        session = self._sessions.get(session_id)
+        if session is None:
+            return None
+        if self._is_idle(session) and not self._is_dirty(session_id, session):
+            self._drop(session_id)
+            return None
+        session["accessed_at"] = time.monotonic()
+        self._sessions.move_to_end(session_id)
+        return session
+
+    @staticmethod
+    def _is_idle(session: Dict[str, Any]) -> bool:
+        return time.monotonic() - session["accessed_at"] > settings.MEMORY_SESSION_IDLE_SECONDS
+
+    def _is_dirty(self, session_id: str, session: Dict[str, Any]) -> bool:
+        """저장 대기/진행 중인 메시지가 있는지 (제거하면 재로드 시 누락됨)"""
+        return bool(session["pending"]) or session_id in self._flush_tasks
+
+    @staticmethod
+    def _is_pinned_too_long(session: Dict[str, Any]) -> bool:
+        """저장 실패가 MEMORY_SESSION_MAX_PIN_SECONDS 넘게 이어졌는지"""
+        failed_at = session["flush_failed_at"]
+        return failed_at is not None and time.monotonic() - failed_at > settings.MEMORY_SESSION_MAX_PIN_SECONDS
+
+    def _force_drop(self, session_id: str, session: Dict[str, Any]):
+        """저장되지 않은 메시지를 버리고 세션 제거 (저장 실패가 오래 이어져 캐시 상한을 지킬 수 없을 때)"""
+        dropped = session["pending"]
+        session["pending"] = []
+        task = self._flush_tasks.pop(session_id, None)
+        if task is not None:
+            task.cancel()
+        logger.error(
+            f"세션 {session_id} 저장 실패가 {time.monotonic() - session['flush_failed_at']:.0f}초간 이어져 캐시에서 제거 - "
+            f"저장되지 않은 메시지 {len(dropped)}개 유실"
+            + (f" ({dropped[0]['timestamp']} ~ {dropped[-1]['timestamp']})" if dropped else "")
+        )
+        self._drop(session_id)
+
+    def _drop(self, session_id: str):
+        session = self._sessions.pop(session_id, None)
+        if session is not None:
+            self._cached_chars -= session["chars"]
+
+    def _evict(self):
+        """세션 수/본문 크기 상한 및 유휴 만료 적용 (저장 대기 중인 세션은 유지)"""
+        for session_id in list(self._sessions):
+            session = self._sessions[session_id]
+            over_limit = (
+                len(self._sessions) > settings.MEMORY_SESSION_CACHE_SIZE
+                or self._cached_chars > settings.MEMORY_SESSION_CACHE_MAX_CHARS
+            )
+            if not over_limit and not self._is_idle(session):
+                break  # 앞쪽일수록 오래 사용되지 않았으므로 이후 세션은 더 최근
+            if session_id == next(reversed(self._sessions)):
+                continue
+            if self._is_dirty(session_id, session):
+                if self._is_pinned_too_long(session):
+                    self._force_drop(session_id, session)
+                continue
+            self._drop(session_id)
+
+    async def get_or_create_session(self, session_id: str) -> Dict[str, Any]:
         """세션 가져오기 또는 생성"""
-        if session_id not in self._sessions:
-            self._sessions[session_id] = {
-                "messages": [],
-                "created_at": datetime.now(),
-                "last_activity": datetime.now(),
-                "message_count": 0
-            }
-            logger.info(f"새 세션 생성: {session_id}")
-        
-        return self._sessions[session_id]
-    
+        return await self._get_session(session_id, create=True)
+
     async def add_message(self, session_id: str, human_message: str, ai_message: str):
-        """대화 메시지 추가"""
-        session = self.get_or_create_session(session_id)
-        
-        # 메시지 추가
-        session["messages"].append(HumanMessage(content=human_message))
-        session["messages"].append(AIMessage(content=ai_message))
-        
+        """대화 메시지 추가 (데이터베이스 저장은 백그라운드에서 진행)"""
+        session = await self.get_or_create_session(session_id)
+
+        # 메시지 추가 (최근 메시지만 유지)
+        messages = session["messages"] + [HumanMessage(content=human_message), AIMessage(content=ai_message)]
+        self._set_messages(session, messages[-settings.MEMORY_SESSION_HISTORY_MESSAGES:])
+
         # 세션 정보 업데이트
-        session["last_activity"] = datetime.now()
+        now = datetime.now()
+        session["last_activity"] = now
         session["message_count"] += 1
-        
-        # 메시지 제한 (최근 20개 메시지만 유지)
-        if len(session["messages"]) > 20:
-            session["messages"] = session["messages"][-20:]
-        
+        session["message_total"] += 2
+        session["pending"].extend([
+            {"role": "human", "content": human_message, "timestamp": now},
+            {"role": "ai", "content": ai_message, "timestamp": now}
+        ])
+
         # 데이터베이스에 저장
-        await self._save_session_to_db(session_id, human_message, ai_message)
-        
+        self._schedule_flush(session_id, session)
+        self._schedule_summary(session_id, session)
+        self._evict()
+
         logger.debug(f"세션 {session_id}에 메시지 추가")
-    
-    async def _save_session_to_db(self, session_id: str, human_message: str, ai_message: str):
-        """세션을 데이터베이스에 저장"""
+
+    def _schedule_flush(self, session_id: str, session: Dict[str, Any]):
+        """세션 저장 태스크 예약 (세션당 하나, 진행 중이면 해당 태스크가 이어서 저장)"""
+        if session_id in self._flush_tasks:
+            return
+        self._flush_tasks[session_id] = asyncio.create_task(self._flush_session(session_id, session))
+
+    async def _flush_session(self, session_id: str, session: Dict[str, Any]):
+        """저장 대기 메시지를 순서대로 데이터베이스에 반영 (실패 시 지수 백오프로 재시도, 종료 중이면 한 번만 시도)"""
+        failures = 0
         try:
-            collection = self.db.chat_sessions
-            session = self._sessions[session_id]
-            
-            # 세션 문서 업데이트 또는 생성
-            await collection.update_one(
-                {"session_id": session_id},
-                {
-                    "$set": {
-                        "session_id": session_id,
-                        "last_activity": session["last_activity"],
-                        "message_count": session["message_count"]
-                    },
-                    "$setOnInsert": {
-                        "created_at": session["created_at"]
-                    },
-                    "$push": {
-                        "messages": {
-                            "$each": [
-                                {
-                                    "role": "human",
-                                    "content": human_message,
-                                    "timestamp": datetime.now()
-                                },
-                                {
-                                    "role": "ai", 
-                                    "content": ai_message,
-                                    "timestamp": datetime.now()
-                                }
-                            ]
-                        }
-                    }
-                },
-                upsert=True
-            )
-            
+            while session["pending"]:
+                pending = session["pending"]
+                session["pending"] = []
+                try:
+                    await self._save_session_to_db(session_id, session, pending)
+                except Exception as e:
+                    # 실패한 메시지는 앞쪽에 되돌려 순서 유지
+                    session["pending"] = pending + session["pending"]
+                    if session["flush_failed_at"] is None:
+                        session["flush_failed_at"] = time.monotonic()
+                    if self._closing.is_set():
+                        logger.error(f"세션 저장 실패 ({session_id}, 메시지 {len(session['pending'])}개 미저장): {e}")
+                        return
+                    delay = min(
+                        settings.MEMORY_FLUSH_RETRY_BASE_SECONDS * 2 ** failures,
+                        settings.MEMORY_FLUSH_RETRY_MAX_SECONDS
+                    )
+                    failures += 1
+                    logger.error(f"세션 저장 실패 ({session_id}), {delay:.0f}초 후 재시도 ({failures}회): {e}")
+                    session["flush_waiting"] = True
+                    try:
+                        # 종료(close) 시에는 대기 없이 마지막으로 한 번 더 시도
+                        await asyncio.wait_for(self._closing.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+                    finally:
+                        session["flush_waiting"] = False
+                    continue
+                failures = 0
+                session["flush_failed_at"] = None
+        finally:
+            # 대기 메시지 확인과 태스크 해제 사이에 await가 없어야 추가된 메시지가 누락되지 않음
+            # (강제 제거 후 새로 예약된 태스크는 해제하지 않음)
+            if self._flush_tasks.get(session_id) is asyncio.current_task():
+                del self._flush_tasks[session_id]
+
+    async def _save_session_to_db(self, session_id: str, session: Dict[str, Any], messages: List[Dict[str, Any]]):
+        """세션을 데이터베이스에 저장 (세션 메타데이터 갱신 + 메시지 버킷 추가)"""
+        await self.message_store.append(session_id, messages, session["created_at"])
+
+    def _schedule_summary(self, session_id: str, session: Dict[str, Any]):
+        """요약되지 않은 메시지가 임계값을 넘으면 누적 요약 갱신 태스크 예약 (세션당 하나)"""
+        if not settings.MEMORY_SUMMARY_ENABLED or session_id in self._summary_tasks:
+            return
+        if session["message_total"] - session["summary_upto"] <= settings.MEMORY_SUMMARY_TRIGGER_MESSAGES:
+            return
+        self._summary_tasks[session_id] = asyncio.create_task(self._update_summary(session_id, session))
+
+    async def _update_summary(self, session_id: str, session: Dict[str, Any]):
+        """최근 KEEP개를 제외한 요약되지 않은 메시지를 누적 요약에 합침 (응답 경로 밖에서 실행)"""
+        try:
+            messages = session["messages"]
+            window_start = session["message_total"] - len(messages)
+            start = max(session["summary_upto"], window_start)
+            end = session["message_total"] - settings.MEMORY_SUMMARY_KEEP_MESSAGES
+            if end <= start:
+                return
+            if start > session["summary_upto"]:
+                # 요약이 밀려 메모리 창 밖으로 나간 메시지는 요약에서 빠짐
+                logger.warning(f"세션 {session_id}: 요약되지 않은 메시지 {start - session['summary_upto']}개 누락")
+
+            summary = await self._summarize_messages(session["summary"], messages[start - window_start:end - window_start])
+            if end <= session["summary_upto"]:
+                return
+            session["summary"] = summary
+            session["summary_upto"] = end
+
+            # 세션 문서가 먼저 생성되도록 진행 중인 저장을 기다린 뒤 기록
+            flush_task = self._flush_tasks.get(session_id)
+            if flush_task is not None:
+                await asyncio.gather(flush_task, return_exceptions=True)
+            await self.message_store.save_summary(session_id, summary, end)
+            logger.debug(f"세션 {session_id} 대화 요약 갱신 ({end}개 메시지 포함)")
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
-            logger.error(f"세션 저장 실패: {e}")
-    
-    def get_conversation_history(self, session_id: str, memory_type: str = "buffer") -> List:
+            logger.warning(f"대화 요약 갱신 실패 ({session_id}): {e}")
+        finally:
+            self._summary_tasks.pop(session_id, None)
+
+    async def _summarize_messages(self, summary: str, messages: List) -> str:
+        """기존 요약과 새 대화를 합쳐 새 누적 요약 생성"""
+        dialogue = "\n".join(self._format_message(msg) for msg in messages)
+        prompt = f"""다음은 사용자와 AI 어시스턴트의 대화입니다. 기존 요약에 새 대화 내용을 합쳐 하나의 요약으로 갱신하세요.
+사용자의 관심사, 질문한 주제, 중요한 사실과 결론을 유지하고 인사말 등은 생략하세요.
+요약은 한국어로 {settings.MEMORY_SUMMARY_MAX_TOKENS}토큰 이내로 작성하세요.
+
+기존 요약:
+{summary or "(없음)"}
+
+새 대화:
+{dialogue}
+
+갱신된 요약:"""
+        response = await self.llm.ainvoke(prompt)
+        return response.content.strip()
+
+    @staticmethod
+    def _format_message(msg) -> str:
+        """메시지를 "역할: 내용" 한 줄로 변환"""
+        if isinstance(msg, HumanMessage):
+            return f"사용자: {msg.content}"
+        if isinstance(msg, AIMessage):
+            return f"어시스턴트: {msg.content}"
+        return msg.content
+
+    async def close(self):
+        """저장 대기 중인 모든 세션을 데이터베이스에 반영"""
+        self._closing.set()
+        for task in list(self._summary_tasks.values()):
+            task.cancel()
+        for session_id, session in list(self._sessions.items()):
+            if session["pending"]:
+                self._schedule_flush(session_id, session)
+        if self._flush_tasks:
+            await asyncio.gather(*list(self._flush_tasks.values()), return_exceptions=True)
+            logger.info("대화 세션 저장 완료")
+
+    async def get_conversation_history(self, session_id: str, memory_type: str = "buffer") -> List:
         """대화 기록 가져오기"""
-        if session_id not in self._sessions:
+        session = await self._get_session(session_id)
+        if session is None:
             return []
-        
-        session = self._sessions[session_id]
-        
+
         if memory_type == "buffer":
             return session["messages"]
         elif memory_type == "summary":
-            # 요약된 대화 기록 반환 (향후 구현)
-            return session["messages"][-10:]  # 최근 10개만
-        
+            return self._budgeted_history(session, settings.MEMORY_HISTORY_MAX_TOKENS)
+
         return []
-    
-    def get_conversation_summary(self, session_id: str) -> str:
-        """대화 요약 생성"""
-        if session_id not in self._sessions:
-            return ""
-        
-        messages = self._sessions[session_id]["messages"]
-        if not messages:
+
+    def _budgeted_history(self, session: Dict[str, Any], max_tokens: int) -> List:
+        """누적 요약(SystemMessage) + 요약 이후 최근 메시지를 토큰 예산 내에서 반환"""
+        history = []
+        budget = max_tokens
+        if session["summary"]:
+            summary_message = SystemMessage(content=f"이전 대화 요약: {session['summary']}")
+            budget -= count_tokens(summary_message.content, settings.OPENAI_MODEL)
+            history.append(summary_message)
+
+        messages = session["messages"]
+        window_start = session["message_total"] - len(messages)
+        unsummarized = messages[max(session["summary_upto"] - window_start, 0):]
+
+        # 최신 메시지부터 예산이 허용하는 만큼 포함
+        recent = []
+        for msg in reversed(unsummarized):
+            budget -= count_tokens(msg.content, settings.OPENAI_MODEL)
+            if budget < 0:
+                break
+            recent.append(msg)
+        return history + recent[::-1]
+
+    @staticmethod
+    def _summarize(human_messages: List[str], question_count: int) -> str:
+        """질문 목록 기반 간단 요약"""
+        if not human_messages:
             return ""
-        
+
         # 간단한 요약 (향후 LLM을 사용한 요약으로 확장 가능)
-        human_messages = [msg.content for msg in messages if isinstance(msg, HumanMessage)]
-        
-        if len(human_messages) > 3:
-            return f"이 대화에서는 {len(human_messages)}개의 주제에 대해 논의했습니다."
+        if question_count > 3:
+            return f"이 대화에서는 {question_count}개의 주제에 대해 논의했습니다."
         else:
             topics = ", ".join(human_messages[:3])
             return f"주요 질문: {topics}"
-    
-    def get_session_context(self, session_id: str) -> Dict[str, Any]:
+
+    def get_conversation_summary(self, session_id: str) -> str:
+        """대화 요약 반환 (누적 요약이 없으면 캐시된 질문 기준 간단 요약)"""
+        session = self._sessions.get(session_id)
+        if session is None:
+            return ""
+        if session["summary"]:
+            return session["summary"]
+
+        human_messages = [msg.content for msg in session["messages"] if isinstance(msg, HumanMessage)]
+        return self._summarize(human_messages, len(human_messages))
+
+    async def get_session_context(self, session_id: str) -> Dict[str, Any]:
         """세션 컨텍스트 정보 반환"""
-        if session_id not in self._sessions:
+        session = await self._get_session(session_id)
+        if session is None:
             return {}
-        
-        session = self._sessions[session_id]
+
         return {
             "session_id": session_id,
             "created_at": session["created_at"],
@@ -195,27 +450,55 @@ class MemoryManager:
             "has_history": session["message_count"] > 0,
             "conversation_summary": self.get_conversation_summary(session_id)
         }
-    
+
     async def clear_session(self, session_id: str):
         """세션 삭제"""
-        if session_id in self._sessions:
-            del self._sessions[session_id]
-            
-            # 데이터베이스에서도 삭제
-            try:
-                await self.db.chat_sessions.delete_one({"session_id": session_id})
+        session = self._sessions.get(session_id)
+        if session is not None:
+            # 진행 중인 저장이 끝난 뒤 삭제해야 upsert로 되살아나지 않음
+            session["pending"] = []
+            summary_task = self._summary_tasks.get(session_id)
+            if summary_task is not None:
+                summary_task.cancel()
+            task = self._flush_tasks.get(session_id)
+            if task is not None:
+                if session["flush_waiting"]:
+                    # 재시도 대기 중이면 저장 요청이 없으므로 바로 중단
+                    task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+            self._drop(session_id)
+
+        # 데이터베이스에서도 삭제 (메시지 버킷 포함)
+        try:
+            if await self.message_store.delete_session(session_id):
                 logger.info(f"세션 {session_id} 삭제 완료")
-            except Exception as e:
-                logger.error(f"세션 삭제 실패: {e}")
-    
-    def get_all_sessions(self) -> Dict[str, Dict[str, Any]]:
-        """모든 세션 정보 반환"""
-        return {
-            session_id: {
-                "created_at": session["created_at"],
-                "last_activity": session["last_activity"],
-                "message_count": session["message_count"],
-                "conversation_summary": self.get_conversation_summary(session_id)
+        except Exception as e:
+            logger.error(f"세션 삭제 실패: {e}")
+
+    async def get_all_sessions(self) -> Dict[str, Dict[str, Any]]:
+        """모든 세션 정보 반환 (chat_sessions 프로젝션, 저장 대기 중인 세션은 캐시 값 사용)"""
+        sessions = {}
+        cursor = self.db.chat_sessions.find({}, self.SESSION_LIST_PROJECTION).sort("last_activity", -1)
+        async for session_doc in cursor:
+            message_count = session_doc.get("message_count", 0)
+            human_messages = session_doc.get("first_questions") or [
+                msg.get("content", "") for msg in session_doc.get("messages", [])
+                if msg.get("role") == "human"
+            ]
+            sessions[session_doc["session_id"]] = {
+                "created_at": session_doc.get("created_at"),
+                "last_activity": session_doc.get("last_activity"),
+                "message_count": message_count,
+                "conversation_summary": session_doc.get("summary") or self._summarize(human_messages, message_count)
             }
-            for session_id, session in self._sessions.items()
-        } 
\ No newline at end of file
+
+        for session_id, session in self._sessions.items():
+            if self._is_dirty(session_id, session):
+                entry = sessions.setdefault(session_id, {
+                    "created_at": session["created_at"],
+                    "conversation_summary": self.get_conversation_summary(session_id)
+                })
+                entry["last_activity"] = session["last_activity"]
+                entry["message_count"] = session["message_count"]
+
+        return sessions
@@ -5,10 +5,10 @@ MongoDB VectorStore 관리자
 from typing import List, Dict, Optional, Any
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from langchain_community.vectorstores import MongoDBAtlasVectorSearch
-from langchain_openai import OpenAIEmbeddings
 from langchain_core.documents import Document
 from langchain_core.vectorstores import VectorStoreRetriever
 
+from ai_processing.openai_clients import openai_clients
 from config.settings import settings
 from utils.logger import get_logger
 
@@ -19,10 +19,7 @@ class VectorStoreManager:
     
     def __init__(self, db: AsyncIOMotorDatabase):
         self.db = db
-        self.embeddings = OpenAIEmbeddings(
-            openai_api_key=settings.OPENAI_API_KEY,
-            model=settings.OPENAI_EMBEDDING_MODEL
-        )
+        self.embeddings = openai_clients.embeddings_model(feature="vectorstore")
         self._vectorstore = None
         self._retriever = None
     
@@ -0,0 +1,245 @@
+"""
+메트릭 유틸리티
+프로세스 내 카운터/히스토그램을 Prometheus 텍스트 형식(/metrics)으로 노출
+- LLM/임베딩 호출: 지연 시간, 첫 토큰 지연, 토큰 수, 추정 비용, 오류 종류 (route, feature 레이블)
+- route 레이블: MetricsRouteMiddleware가 요청 scope를 컨텍스트에 보관하고 기록 시점에 경로 템플릿을 읽음
+- 캐시 적중: register_cache()로 등록한 캐시의 stats()를 수집 시점에 읽어 노출
+"""
+import threading
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 모델별 100만 토큰당 가격 (USD, 입력/출력) - 추정 비용 계산용, 가격 변경 시 갱신
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "text-embedding-3-large": (0.13, 0.0),
+    "text-embedding-3-small": (0.02, 0.0),
+    "text-embedding-ada-002": (0.10, 0.0)
+}
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# 요청 scope (라우팅 후 scope["route"]가 채워지므로 기록 시점에 읽음)
+_request_scope: ContextVar[Optional[dict]] = ContextVar("metrics_request_scope", default=None)
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+class Counter:
+    """레이블별 누적 카운터"""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str]):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(dict(zip(self.labelnames, key)))} {_format_value(value)}")
+        return lines
+
+class Histogram:
+    """레이블별 누적 버킷 히스토그램"""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str], buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 레이블 -> [버킷별 개수..., 합계, 전체 개수]
+        self._values: Dict[Tuple, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            state = self._values.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+        for key, state in items:
+            labels = dict(zip(self.labelnames, key))
+            for bound, count in zip(self.buckets, state):
+                lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': _format_value(bound)})} {_format_value(count)}")
+            lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': '+Inf'})} {_format_value(state[-1])}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {_format_value(state[-1])}")
+        return lines
+
+class MetricsRegistry:
+    """메트릭/캐시 수집기 레지스트리 (프로세스 전역)"""
+
+    def __init__(self):
+        self._metrics: List = []
+        self._caches: Dict[str, Callable[[], Dict]] = {}
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str]) -> Counter:
+        metric = Counter(name, help_text, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str], buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, help_text, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_cache(self, name: str, stats: Callable[[], Dict]):
+        """캐시 통계 함수 등록 (hits/misses와 size 또는 entries 키 사용)"""
+        self._caches[name] = stats
+
+    def _render_caches(self) -> List[str]:
+        samples = {"cache_hits_total": [], "cache_misses_total": [], "cache_entries": []}
+        for name, stats in self._caches.items():
+            try:
+                values = stats()
+            except Exception as e:
+                logger.warning(f"캐시 통계 수집 실패 ({name}): {e}")
+                continue
+            labels = _format_labels({"cache": name})
+            samples["cache_hits_total"].append(f"cache_hits_total{labels} {_format_value(values.get('hits', 0))}")
+            samples["cache_misses_total"].append(f"cache_misses_total{labels} {_format_value(values.get('misses', 0))}")
+            samples["cache_entries"].append(f"cache_entries{labels} {_format_value(values.get('entries', values.get('size', 0)))}")
+
+        lines = []
+        for metric_name, metric_type, help_text in (
+            ("cache_hits_total", "counter", "캐시 적중 수"),
+            ("cache_misses_total", "counter", "캐시 미스 수"),
+            ("cache_entries", "gauge", "캐시 항목 수")
+        ):
+            if samples[metric_name]:
+                lines += [f"# HELP {metric_name} {help_text}", f"# TYPE {metric_name} {metric_type}"]
+                lines += samples[metric_name]
+        return lines
+
+    def render(self) -> str:
+        """Prometheus 텍스트 형식"""
+        lines = []
+        for metric in self._metrics:
+            lines += metric.render()
+        lines += self._render_caches()
+        return "\n".join(lines) + "\n"
+
+# 싱글톤 인스턴스
+metrics = MetricsRegistry()
+
+LLM_REQUESTS = metrics.counter(
+    "llm_requests_total", "OpenAI 완성/임베딩 호출 수 (status: ok 또는 오류 클래스)",
+    ("kind", "model", "feature", "route", "status")
+)
+LLM_DURATION = metrics.histogram(
+    "llm_request_duration_seconds", "OpenAI 호출 지연 시간 (스트리밍은 마지막 조각까지)",
+    ("kind", "model", "feature", "route")
+)
+LLM_FIRST_TOKEN = metrics.histogram(
+    "llm_time_to_first_token_seconds", "스트리밍 호출의 첫 조각 도착 시간",
+    ("model", "feature", "route")
+)
+LLM_TOKENS = metrics.counter(
+    "llm_tokens_total", "OpenAI 호출 토큰 수 (direction: input/output, 스트리밍은 추정치)",
+    ("kind", "model", "feature", "route", "direction")
+)
+LLM_COST = metrics.counter(
+    "llm_estimated_cost_usd_total", "MODEL_PRICES 기준 추정 비용 (USD)",
+    ("model", "feature", "route")
+)
+LLM_RETRIES = metrics.counter(
+    "llm_retries_total", "애플리케이션 수준 재시도 수 (reason: 오류 클래스)",
+    ("kind", "feature", "route", "reason")
+)
+OPENAI_HTTP_RESPONSES = metrics.counter(
+    "openai_http_responses_total", "OpenAI HTTP 응답 수 (SDK 내부 재시도 포함)",
+    ("route", "status_code")
+)
+
+def current_route() -> str:
+    """현재 요청의 경로 템플릿 (요청 밖이면 background)"""
+    scope = _request_scope.get()
+    if scope is None:
+        return "background"
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int) -> float:
+    """추정 비용 (USD, 가격표에 없는 모델은 0)"""
+    for name in sorted(MODEL_PRICES, key=len, reverse=True):
+        if model.startswith(name):
+            input_price, output_price = MODEL_PRICES[name]
+            return (input_tokens * input_price + output_tokens * output_price) / 1000000
+    return 0.0
+
+def record_llm_call(
+    kind: str,
+    model: str,
+    feature: str,
+    duration: float,
+    status: str = "ok",
+    input_tokens: int = 0,
+    output_tokens: int = 0,
+    first_token: Optional[float] = None
+):
+    """OpenAI 호출 한 건 기록"""
+    route = current_route()
+    LLM_REQUESTS.inc(kind=kind, model=model, feature=feature, route=route, status=status)
+    LLM_DURATION.observe(duration, kind=kind, model=model, feature=feature, route=route)
+    if first_token is not None:
+        LLM_FIRST_TOKEN.observe(first_token, model=model, feature=feature, route=route)
+    if input_tokens:
+        LLM_TOKENS.inc(input_tokens, kind=kind, model=model, feature=feature, route=route, direction="input")
+    if output_tokens:
+        LLM_TOKENS.inc(output_tokens, kind=kind, model=model, feature=feature, route=route, direction="output")
+    if input_tokens or output_tokens:
+        LLM_COST.inc(estimate_cost(model, input_tokens, output_tokens), model=model, feature=feature, route=route)
+
+def record_retry(kind: str, feature: str, reason: str):
+    """애플리케이션 수준 재시도 한 건 기록"""
+    LLM_RETRIES.inc(kind=kind, feature=feature, route=current_route(), reason=reason)
+
+def record_http_response(status_code: int):
+    """OpenAI HTTP 응답 한 건 기록"""
+    OPENAI_HTTP_RESPONSES.inc(route=current_route(), status_code=status_code)
+
+class MetricsRouteMiddleware:
+    """요청 scope를 메트릭 컨텍스트에 보관하는 ASGI 미들웨어 (route 레이블용)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _request_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_scope.reset(token)
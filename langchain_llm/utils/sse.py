@@ -0,0 +1,31 @@
+"""
+Server-Sent Events 유틸리티
+{"event", "data"} 이벤트 스트림을 text/event-stream 형식으로 변환
+"""
+import json
+from typing import Any, AsyncIterator, Dict
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 프록시 버퍼링/캐시로 이벤트가 묶여 전달되지 않도록 하는 헤더
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no"
+}
+
+def format_sse(event: str, data: Any) -> str:
+    """SSE 메시지 한 건 (data는 JSON, 한글은 이스케이프하지 않음)"""
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+async def sse_stream(events: AsyncIterator[Dict]) -> AsyncIterator[str]:
+    """이벤트 스트림을 SSE 문자열로 변환 (처리 중 오류는 error 이벤트로 전달 후 종료)"""
+    try:
+        async for event in events:
+            yield format_sse(event["event"], event.get("data"))
+    except Exception as e:
+        logger.error(f"스트리밍 응답 실패: {e}")
+        yield format_sse("error", {"detail": str(e)})
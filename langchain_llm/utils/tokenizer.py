@@ -0,0 +1,55 @@
+"""
+토크나이저 유틸리티
+임베딩 모델 기준 토큰 수 계산
+- tiktoken이 설치되어 있고 인코딩을 불러올 수 있으면 실제 BPE 토큰 수 사용
+- 그렇지 않으면 문자 종류 기반 근사치 사용 (ASCII 약 4자당 1토큰, 한글 등 1자당 1토큰)
+"""
+from functools import lru_cache
+from typing import Optional
+
+from config.settings import settings
+from utils.logger import get_logger
+
+try:
+    import tiktoken
+except ImportError:  # 선택적 의존성
+    tiktoken = None
+
+logger = get_logger(__name__)
+
+DEFAULT_ENCODING = "cl100k_base"  # text-embedding-3-* 계열 인코딩
+
+@lru_cache(maxsize=4)
+def get_encoding(model: Optional[str] = None):
+    """모델용 tiktoken 인코딩 (사용할 수 없으면 None)"""
+    if tiktoken is None:
+        logger.info("tiktoken 미설치, 근사 토큰 수 사용")
+        return None
+    model = model or settings.OPENAI_EMBEDDING_MODEL
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        pass
+    except Exception as e:
+        logger.warning(f"tiktoken 인코딩 로드 실패 ({model}), 근사 토큰 수 사용: {e}")
+        return None
+    try:
+        return tiktoken.get_encoding(DEFAULT_ENCODING)
+    except Exception as e:
+        # BPE 파일을 내려받을 수 없는 오프라인 환경 등
+        logger.warning(f"tiktoken 인코딩 로드 실패 ({DEFAULT_ENCODING}), 근사 토큰 수 사용: {e}")
+        return None
+
+def approximate_tokens(text: str) -> int:
+    """토큰 수 근사 (ASCII 약 4자당 1토큰, 한글 등 비ASCII 1자당 1토큰)"""
+    ascii_count = sum(1 for ch in text if ch.isascii())
+    return (ascii_count + 3) // 4 + (len(text) - ascii_count)
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """토큰 수 계산 (tiktoken 사용 불가 시 근사치)"""
+    if not text:
+        return 0
+    encoding = get_encoding(model)
+    if encoding is None:
+        return approximate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))